@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.datasets import build
+from benchmarks.suite import BACKENDS, REGRESSION_THRESHOLD, compare, run_suite
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Функция разбирает аргументы командной строки набора замеров
+    :param argv: аргументы (None - sys.argv)
+    :return: разобранные аргументы
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Замеры скорости консольных команд на синтетических данных")
+    parser.add_argument("-o", "--output", type=Path, help="Файл для результата в JSON (по умолчанию - только вывод в консоль)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Базовый результат для сравнения (по умолчанию benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результат как новый базовый")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Допустимое замедление медианы (0.1 - на 10%%)")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Количество повторов каждого замера")
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель количества и размеров файлов")
+    parser.add_argument("--seed", type=int, default=0, help="Seed генератора данных")
+    parser.add_argument("-k", "--only", action="append", help="Glob-шаблон имён замеров (можно несколько), например 'zip/*'")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto", help="Реализация сервиса консоли (auto - как в main)")
+    parser.add_argument("--workdir", type=Path, help="Каталог для данных (по умолчанию - временный, удаляется после замеров)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Функция создаёт данные, выполняет замеры, сохраняет результат и сравнивает его с базовым
+    :param argv: аргументы (None - sys.argv)
+    :return: код завершения: 0 - без замедлений, 1 - есть замедления больше порога
+    """
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-", dir=args.workdir) as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        data = build(root / "data", scale=args.scale, seed=args.seed)
+        print(f"данные: {time.perf_counter() - start:.1f} с (scale={args.scale}, seed={args.seed})", file=sys.stderr)
+        work = root / "work"
+        work.mkdir()
+
+        def progress(name: str, result: dict[str, Any]) -> None:
+            speed = f", {result['mb_per_s']:.1f} МБ/с" if result.get("mb_per_s") else ""
+            ratio = f", сжатие {result['ratio']:.3f}" if result.get("ratio") is not None else ""
+            print(f"{name:<24} {result['median'] * 1000:>10.1f} мс{speed}{ratio}", file=sys.stderr)
+
+        current = run_suite(data, work, repeat=args.repeat, only=args.only, on_result=progress, backend=args.backend)
+    current["meta"].update(scale=args.scale, seed=args.seed)
+
+    text = json.dumps(current, ensure_ascii=False, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(text + "\n", encoding="utf-8")
+        print(f"базовый результат: {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        print(f"базовый результат {args.baseline} не найден, сравнение пропущено (--save-baseline сохранит текущий)", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("meta", {}).get("scale") != args.scale:
+        print(f"внимание: базовый результат снят с scale={baseline.get('meta', {}).get('scale')}", file=sys.stderr)
+    lines, regressions = compare(current, baseline, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"замедлились больше чем на {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+TINY_FILES = 2000
+TINY_SIZE = 256
+HUGE_SIZE = 32 * 1024 * 1024
+MIXED_SIZE = 4 * 1024 * 1024
+MIXED_TINY_FILES = 200
+DEEP_LEVELS = 64
+VOCABULARY = 2000
+NEEDLE = "needle"
+
+
+@dataclass
+class Dataset:
+    root: Path
+    tiny: Path
+    huge_text: Path
+    huge_random: Path
+    deep: Path
+    mixed: Path
+
+    @property
+    def huge_text_file(self) -> Path:
+        """
+        Функция возвращает путь к большому сжимаемому файлу
+        :return: путь к файлу
+        """
+        return self.huge_text / "text.txt"
+
+
+def text_lines(rng: random.Random, count: int) -> list[str]:
+    """
+    Функция генерирует строки «текста» из случайных слов словаря; примерно каждая тысячная строка содержит NEEDLE
+    (для grep). Такой текст сжимается примерно как обычный: deflate - в 2-3 раза
+    :param rng: генератор случайных чисел с фиксированным seed
+    :param count: количество различных строк
+    :return: строки с переводом строки в конце
+    """
+    words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 10))) for _ in range(VOCABULARY)]
+    lines = []
+    for _ in range(count):
+        line = rng.choices(words, k=rng.randint(6, 14))
+        if rng.random() < 0.001:
+            line[rng.randrange(len(line))] = NEEDLE
+        lines.append(" ".join(line) + "\n")
+    return lines
+
+
+def write_text(path: Path, rng: random.Random, lines: list[str], size: int) -> None:
+    """
+    Функция записывает текстовый файл примерно заданного размера из случайно выбранных строк (без длинных повторов,
+    чтобы xz со словарём в мегабайты не сжимал его нереалистично хорошо)
+    :param path: путь к файлу
+    :param rng: генератор случайных чисел
+    :param lines: набор строк
+    :param size: размер файла в байтах
+    :return: функция ничего не возвращает
+    """
+    average = sum(map(len, lines)) / len(lines)
+    with path.open("w", encoding="ascii") as fh:
+        written = 0
+        while written < size:
+            block = "".join(rng.choices(lines, k=max(1, int(min(size - written, 1024 * 1024) / average))))
+            fh.write(block)
+            written += len(block)
+
+
+def build(root: Path, scale: float = 1.0, seed: int = 0) -> Dataset:
+    """
+    Функция создаёт синтетические деревья для замеров: много маленьких файлов, большие сжимаемый и случайный файлы,
+    глубокую вложенность и смешанный каталог для архиваторов. При одинаковых scale и seed содержимое совпадает
+    :param root: каталог, в котором создаются данные
+    :param scale: множитель количества и размеров файлов
+    :param seed: seed генератора случайных чисел
+    :return: описание созданных данных
+    """
+    rng = random.Random(seed)
+    lines = text_lines(rng, 50000)
+    dataset = Dataset(root, root / "tiny", root / "huge_text", root / "huge_random", root / "deep", root / "mixed")
+    for path in (dataset.tiny, dataset.huge_text, dataset.huge_random, dataset.deep, dataset.mixed):
+        path.mkdir(parents=True)
+
+    tiny_files = max(1, int(TINY_FILES * scale))
+    for i in range(tiny_files):
+        (dataset.tiny / f"f{i:05}.txt").write_text("".join(rng.choices(lines, k=4))[:TINY_SIZE], encoding="ascii")
+
+    huge_size = max(1024, int(HUGE_SIZE * scale))
+    write_text(dataset.huge_text_file, rng, lines, huge_size)
+    (dataset.huge_random / "random.bin").write_bytes(rng.randbytes(huge_size))
+
+    level = dataset.deep
+    for i in range(DEEP_LEVELS):
+        level = level / f"d{i:02}"
+        level.mkdir()
+        (level / "file.txt").write_text(lines[i], encoding="ascii")
+
+    mixed_size = max(1024, int(MIXED_SIZE * scale))
+    for i in range(max(1, int(MIXED_TINY_FILES * scale))):
+        (dataset.mixed / f"f{i:04}.txt").write_text(lines[i], encoding="ascii")
+    write_text(dataset.mixed / "text.txt", rng, lines, mixed_size)
+    (dataset.mixed / "random.bin").write_bytes(rng.randbytes(mixed_size))
+    return dataset
@@ -0,0 +1,230 @@
+import functools
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any
+
+from benchmarks.datasets import NEEDLE, Dataset
+from src.container import create_console_service
+from src.enums import FileDisplayMode, FileReadMode, TarCodec
+from src.services.base import OSConsoleServiceBase
+from src.services.windows_console import WindowsConsoleService
+
+REGRESSION_THRESHOLD = 0.10
+BACKENDS = ("auto", "windows", "linux")
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], Any]
+    nbytes: int | None = None
+    setup: Callable[[], Any] | None = None
+    teardown: Callable[[], Any] | None = None
+    output_size: Callable[[], int] | None = None
+
+
+def tree_size(path: Path) -> int:
+    """
+    Функция считает суммарный размер файлов в дереве (для пропускной способности)
+    :param path: файл или каталог
+    :return: размер в байтах
+    """
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def quiet_service(backend: str = "auto") -> OSConsoleServiceBase:
+    """
+    Функция создаёт сервис с логгером, который ничего не пишет: замеряется работа команды, а не логирование
+    :param backend: реализация сервиса: auto (как в main), windows или linux
+    :return: сервис консоли
+    """
+    logger = logging.getLogger("benchmarks")
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.CRITICAL)
+    logger.propagate = False
+    if backend == "windows":
+        return WindowsConsoleService(logger)
+    if backend == "linux":
+        from src.services.linux_console import LinuxConsoleService
+
+        return LinuxConsoleService(logger)
+    return create_console_service(logger)
+
+
+def remove(path: Path) -> None:
+    """
+    Функция удаляет результат предыдущего запуска (файл или каталог), если он есть
+    :param path: путь
+    :return: функция ничего не возвращает
+    """
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def remove_all(*paths: Path) -> None:
+    """
+    Функция удаляет результаты предыдущего запуска (например, архив и каталог распаковки)
+    :param paths: пути
+    :return: функция ничего не возвращает
+    """
+    for path in paths:
+        remove(path)
+
+
+def build_cases(data: Dataset, work: Path, service: OSConsoleServiceBase) -> list[Case]:
+    """
+    Функция составляет замеры всех консольных команд на синтетических данных. Имя замера - '<команда>/<данные>'.
+    Подготовка (например, копия дерева для rm или архив для unzip) и уборка в замер не входят
+    :param data: синтетические данные
+    :param work: каталог для результатов команд
+    :param service: замеряемый сервис консоли
+    :return: список замеров
+    """
+    cases: list[Case] = []
+    trees = {"tiny": data.tiny, "deep": data.deep, "huge_text": data.huge_text, "huge_random": data.huge_random}
+
+    def exhaust(iterator: Any) -> None:
+        for _ in iterator:
+            pass
+
+    # запуск из рабочего каталога, чтобы shell.log писался туда, а не в корень репозитория
+    startup_env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    cases.append(Case("startup/ls", lambda: subprocess.run([sys.executable, "-m", "src.main", "ls", str(data.tiny)], cwd=work, env=startup_env,
+                                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True),
+                      teardown=lambda: remove(work / "shell.log")))
+    cases.append(Case("ls/tiny", lambda: exhaust(service.ls_iter(data.tiny))))
+    cases.append(Case("ls-long/tiny", lambda: exhaust(service.ls_iter(data.tiny, FileDisplayMode.long))))
+    cases.append(Case("cat/huge_text", lambda: exhaust(service.cat_stream(data.huge_text_file, FileReadMode.bytes)), tree_size(data.huge_text_file)))
+    cases.append(Case("grep/tiny", lambda: exhaust(service.grep_iter(NEEDLE, data.tiny, r=True, ignore_case=False)), tree_size(data.tiny)))
+    cases.append(Case("grep/huge_text", lambda: exhaust(service.grep_iter(NEEDLE, data.huge_text_file, r=False, ignore_case=False)), tree_size(data.huge_text_file)))
+
+    # аргументы каждого замера связываются через functools.partial: лямбда в цикле видела бы последнее значение
+    for label, src in trees.items():
+        dst = work / f"cp-{label}"
+        cases.append(Case(f"cp/{label}", functools.partial(service.cp, src, dst, recursive=True), tree_size(src), teardown=functools.partial(remove, dst)))
+
+    for label in ("tiny", "deep"):
+        src, moved, copy = trees[label], work / f"mv-{label}-dst", work / f"mv-{label}-src"
+        cases.append(Case(f"mv/{label}", functools.partial(service.mv, copy, moved), None,
+                          setup=functools.partial(shutil.copytree, src, copy), teardown=functools.partial(remove, moved)))
+        target = work / f"rm-{label}"
+        cases.append(Case(f"rm/{label}", functools.partial(service.rm, target, recursive=True), None,
+                          setup=functools.partial(shutil.copytree, src, target), teardown=functools.partial(remove, target)))
+
+    for label in ("tiny", "huge_text", "huge_random"):
+        src, archive, out = trees[label], work / f"{label}.zip", work / f"unzip-{label}"
+        cases.append(Case(f"zip/{label}", functools.partial(service.zip, src, archive), tree_size(src),
+                          teardown=functools.partial(remove, archive), output_size=functools.partial(tree_size, archive)))
+        cases.append(Case(f"unzip/{label}", functools.partial(service.unzip, archive, out), tree_size(src),
+                          setup=functools.partial(service.zip, src, archive), teardown=functools.partial(remove_all, archive, out)))
+
+    mixed_size = tree_size(data.mixed)
+    for codec in TarCodec:
+        archive, out = work / f"mixed.{codec.value}.tar", work / f"untar-{codec.value}"
+        cases.append(Case(f"tar-{codec.value}/mixed", functools.partial(service.tar_dir, data.mixed, archive, codec=codec), mixed_size,
+                          teardown=functools.partial(remove, archive), output_size=functools.partial(tree_size, archive)))
+        cases.append(Case(f"untar-{codec.value}/mixed", functools.partial(service.untar, archive, out), mixed_size,
+                          setup=functools.partial(service.tar_dir, data.mixed, archive, codec=codec),
+                          teardown=functools.partial(remove_all, archive, out)))
+    return cases
+
+
+def measure(case: Case, repeat: int) -> dict[str, Any]:
+    """
+    Функция выполняет замер repeat раз (подготовка и уборка не входят во время) и считает статистику.
+    Для сжатия размер результата снимается до уборки, а ratio = out_bytes / bytes показывает степень сжатия
+    :param case: замер
+    :param repeat: количество повторов
+    :return: время каждого запуска, минимум, медиана, пропускная способность по медиане и размер результата
+    """
+    runs = []
+    out_bytes = None
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        runs.append(time.perf_counter() - start)
+        if case.output_size is not None:
+            out_bytes = case.output_size()
+        if case.teardown is not None:
+            case.teardown()
+    median = statistics.median(runs)
+    result: dict[str, Any] = {"runs": runs, "min": min(runs), "median": median}
+    if case.nbytes:
+        result["bytes"] = case.nbytes
+        result["mb_per_s"] = case.nbytes / median / 1024 / 1024 if median > 0 else None
+    if out_bytes is not None:
+        result["out_bytes"] = out_bytes
+        result["ratio"] = out_bytes / case.nbytes if case.nbytes else None
+    return result
+
+
+def run_suite(data: Dataset, work: Path, repeat: int = 3, only: list[str] | None = None, on_result: Callable[[str, dict[str, Any]], None] | None = None, backend: str = "auto") -> dict[str, Any]:
+    """
+    Функция выполняет замеры и собирает результат для сохранения в JSON
+    :param data: синтетические данные
+    :param work: каталог для результатов команд
+    :param repeat: количество повторов каждого замера
+    :param only: glob-шаблоны имён замеров (None - все)
+    :param on_result: функция, вызываемая после каждого замера (для вывода по ходу)
+    :param backend: реализация сервиса: auto (как в main), windows или linux
+    :return: {'meta': {...}, 'results': {имя: статистика}}
+    """
+    service = quiet_service(backend)
+    results = {}
+    for case in build_cases(data, work, service):
+        if only and not any(fnmatchcase(case.name, p) for p in only):
+            continue
+        results[case.name] = measure(case, repeat)
+        if on_result is not None:
+            on_result(case.name, results[case.name])
+    meta = {
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "backend": type(service).__name__,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> tuple[list[str], list[str]]:
+    """
+    Функция сравнивает медианы замеров с сохранённым базовым результатом
+    :param current: текущий результат run_suite
+    :param baseline: базовый результат run_suite
+    :param threshold: допустимое замедление (0.10 - на 10%)
+    :return: строки отчёта и имена замеров, замедлившихся больше threshold
+    """
+    lines = [f"{'замер':<24} {'медиана, мс':>12} {'база, мс':>12} {'изменение':>10}"]
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            lines.append(f"{name:<24} {result['median'] * 1000:>12.1f} {'-':>12} {'новый':>10}")
+            continue
+        change = result["median"] / base["median"] - 1 if base["median"] > 0 else 0.0
+        mark = ""
+        if change > threshold:
+            regressions.append(name)
+            mark = " !"
+        lines.append(f"{name:<24} {result['median'] * 1000:>12.1f} {base['median'] * 1000:>12.1f} {change:>+10.1%}{mark}")
+    return lines, regressions
@@ -1,3 +1,15 @@
+import atexit
+import copy
+import logging
+import os
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from logging.handlers import QueueListener
+
+LOG_LEVEL_ENV = "SHELL_LOG_LEVEL"
+CONSOLE_LOG_LEVEL_ENV = "SHELL_CONSOLE_LOG_LEVEL"
+
 LOGGING_CONFIG = {
     "version": 1,
 
@@ -18,7 +30,7 @@ LOGGING_CONFIG = {
 
             "formatter": "standard",
 
-            "level": "DEBUG",
+            "level": "WARNING",
         },
 
         "file": {
@@ -36,7 +48,7 @@ LOGGING_CONFIG = {
 
             "backupCount": 5,
 
-            "level": "DEBUG",
+            "level": "INFO",
         },
     },
 
@@ -44,9 +56,144 @@ LOGGING_CONFIG = {
         "": {
             "handlers": ["console", "file"],
 
-            "level": "DEBUG",
+            "level": "INFO",
 
             "propagate": True,
         }
     },
 }
+
+
+_listener: "QueueListener | None" = None
+
+
+def parse_level(value: str | int) -> int:
+    """
+    Функция переводит уровень логирования из имени (DEBUG, info, ...) или числа в число
+    :param value: имя или номер уровня
+    :return: номер уровня
+    :raises ValueError: если уровень неизвестен
+    """
+    if isinstance(value, int) or value.isdigit():
+        return int(value)
+    level = logging.getLevelNamesMapping().get(value.upper())
+    if level is None:
+        raise ValueError(f"Неизвестный уровень логирования: '{value}'")
+    return level
+
+
+def with_levels(config: dict[str, Any], level: str | None = None, console_level: str | None = None) -> dict[str, Any]:
+    """
+    Функция возвращает копию конфигурации с уровнями обработчиков из аргументов или переменных окружения
+    SHELL_LOG_LEVEL (файл и остальные обработчики) и SHELL_CONSOLE_LOG_LEVEL (обработчик 'console').
+    Уровень root ставится по самому подробному обработчику: записи, которые не нужны ни одному обработчику,
+    отбрасываются ещё в logger.isEnabledFor, до форматирования сообщения
+    :param config: конфигурация в формате logging.config.dictConfig
+    :param level: уровень файла лога (None - из окружения или конфигурации)
+    :param console_level: уровень консоли (None - из окружения или конфигурации)
+    :return: новая конфигурация
+    :raises ValueError: если уровень неизвестен
+    """
+    level = level or os.environ.get(LOG_LEVEL_ENV)
+    console_level = console_level or os.environ.get(CONSOLE_LOG_LEVEL_ENV)
+    config = copy.deepcopy(config)
+    handlers = config.get("handlers", {})
+    for name, handler in handlers.items():
+        value = console_level if name == "console" else level
+        handler["level"] = parse_level(value or handler.get("level", logging.NOTSET))
+    if handlers:
+        config.setdefault("loggers", {}).setdefault("", {})["level"] = min(h["level"] for h in handlers.values())
+    return config
+
+
+def stop_logging() -> None:
+    """
+    Функция останавливает поток записи логов, дописав все записи из очереди
+    :return: функция ничего не возвращает
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def apply_config(config: dict[str, Any]) -> None:
+    """
+    Функция применяет конфигурацию и переносит обработчики root за очередь: логгер только кладёт запись
+    в очередь (QueueHandler), а вывод в консоль и запись в файл с ротацией выполняет отдельный поток
+    (QueueListener), поэтому команда не ждёт диск при каждой записи
+    :param config: конфигурация в формате logging.config.dictConfig
+    :return: функция ничего не возвращает
+    """
+    global _listener
+    import logging.config as logging_config
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    stop_logging()
+    logging_config.dictConfig(config)
+    root = logging.getLogger()
+    if not root.handlers:
+        return
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(records, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(records)]
+    _listener.start()
+
+
+class DeferredLoggingConfig(logging.Handler):
+    def __init__(self, config: dict[str, Any]) -> None:
+        """
+        Функция инициализирует обработчик, который применяет конфигурацию логирования при первой записи.
+        Импорт logging.config и открытие файла лога откладываются, пока команде действительно есть что записать
+        :param config: конфигурация в формате logging.config.dictConfig
+        :return: функция ничего не возвращает
+        """
+        super().__init__(logging.NOTSET)
+        self._config = config
+        self._configured: list[logging.Handler] | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Функция при первой записи применяет конфигурацию (заменяя этот обработчик настроенными) и передаёт
+        запись настроенным обработчикам, остальные записи передаёт им же
+        :param record: запись лога
+        :return: функция ничего не возвращает
+        """
+        # вызывается под self.lock (Handler.handle), поэтому настройка выполняется один раз
+        if self._configured is None:
+            root = logging.getLogger()
+            # новый список: callHandlers текущей записи продолжает обход старого, и запись не дублируется
+            extra = [h for h in root.handlers if h is not self]
+            root.handlers = list(extra)
+            apply_config(self._config)
+            self._configured = list(root.handlers)
+            # обработчики, добавленные до настройки (например, счётчик ошибок run), dictConfig снял бы с root
+            for handler in extra:
+                root.addHandler(handler)
+        for handler in self._configured:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def setup_logging(config: dict[str, Any] = LOGGING_CONFIG, level: str | None = None, console_level: str | None = None) -> None:
+    """
+    Функция настраивает логирование отложенно: до первой записи в root стоит только DeferredLoggingConfig,
+    поэтому команды без записей в лог не импортируют logging.config и не открывают файл лога.
+    Повторная настройка (например, повторный запуск приложения в том же процессе) выполняется сразу
+    :param config: конфигурация в формате logging.config.dictConfig
+    :param level: уровень файла лога (None - из SHELL_LOG_LEVEL или конфигурации)
+    :param console_level: уровень консоли (None - из SHELL_CONSOLE_LOG_LEVEL или конфигурации)
+    :return: функция ничего не возвращает
+    :raises ValueError: если уровень неизвестен
+    """
+    config = with_levels(config, level, console_level)
+    root = logging.getLogger()
+    if root.handlers:
+        apply_config(config)
+        return
+    root.setLevel(config.get("loggers", {}).get("", {}).get("level", logging.WARNING))
+    root.addHandler(DeferredLoggingConfig(config))
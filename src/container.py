@@ -1,7 +1,38 @@
+from __future__ import annotations
+
+import sys
 from dataclasses import dataclass
+from logging import Logger
+from typing import TYPE_CHECKING
+
 from src.services.base import OSConsoleServiceBase
+from src.services.throttle import IOLimiter
+
+if TYPE_CHECKING:
+    from src.services.async_console import AsyncConsoleService
 
 
 @dataclass
 class Container:
     console_service: OSConsoleServiceBase
+    async_console_service: AsyncConsoleService | None = None
+    # глобальные опции ввода-вывода, с которыми запущен процесс: их получает фоновый purge
+    limiter: IOLimiter | None = None
+    ionice: bool = False
+
+
+def create_console_service(logger: Logger, limiter: IOLimiter | None = None) -> OSConsoleServiceBase:
+    """
+    Функция выбирает реализацию сервиса консоли для текущей платформы: на Linux - LinuxConsoleService
+    (copy_file_range, O_NOATIME, обход каталогов по дескрипторам), на остальных системах - WindowsConsoleService
+    :param logger: логгер сервиса
+    :param limiter: общий ограничитель ввода-вывода (None - без ограничений)
+    :return: сервис консоли
+    """
+    if sys.platform.startswith("linux"):
+        from src.services.linux_console import LinuxConsoleService
+
+        return LinuxConsoleService(logger=logger, limiter=limiter)
+    from src.services.windows_console import WindowsConsoleService
+
+    return WindowsConsoleService(logger=logger, limiter=limiter)
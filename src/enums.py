@@ -9,3 +9,18 @@ class FileReadMode(str, Enum):
 class FileDisplayMode(str, Enum):
     simple = "simple"
     long = "long"
+
+
+class ZipMethod(str, Enum):
+    deflate = "deflate"
+    bzip2 = "bzip2"
+    lzma = "lzma"
+    store = "store"
+    auto = "auto"
+
+
+class TarCodec(str, Enum):
+    none = "none"
+    gz = "gz"
+    bz2 = "bz2"
+    xz = "xz"
@@ -1,12 +1,22 @@
-from src.config import LOGGING_CONFIG
-import logging.config
+from src.config import setup_logging
+import logging
+import os
+import subprocess
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
 import typer
 from typer import Typer, Context
-from src.container import Container
-from src.enums import FileReadMode, FileDisplayMode
-from src.services.windows_console import WindowsConsoleService
+from src.container import Container, create_console_service
+from src.enums import FileReadMode, FileDisplayMode, TarCodec, ZipMethod
+from src.services.archive import ArchiveMember, is_stdio
+from src.services.base import OSConsoleServiceBase
+from src.services.memory import MemoryBudget, MemoryReport
+from src.services.progress import ProgressCallback, ProgressEvent, ProgressPrinter, ProgressStats
+from src.services.throttle import IOLimiter, lower_io_priority, parse_size
+from src.services.timings import CallTimings, report_profile, start_profile
+from src.shell import format_report, read_lines, run_script, run_shell
 
 app = Typer()
 
@@ -25,17 +35,101 @@ def get_container(ctx: Context)->Container:
     return container
 
 
+def print_members(members: list[ArchiveMember]) -> None:
+    """
+    Функция выводит оглавление архива: тип, размер, сжатый размер (для tar - '-'), время изменения и имя элемента
+    :param members: элементы архива
+    :return: функция ничего не возвращает
+    """
+    for m in members:
+        entry_type = "d" if m.is_dir else "-"
+        compressed = "-" if m.compressed_size is None else m.compressed_size
+        mtime = datetime.fromtimestamp(m.mtime).strftime("%Y-%m-%d %H:%M:%S")
+        typer.echo(f"{entry_type} {m.size:>12} {compressed:>12} {mtime} {m.name}")
+
+
 @app.callback()
-def main(ctx: Context)->None:
+def main(ctx: Context, bwlimit: str = typer.Option(None, "--bwlimit", help="Ограничение скорости ввода-вывода в байтах/с (можно с суффиксом K/M/G) для cp, mv, rm, zip, tar", show_default=False), iops_limit: float = typer.Option(None, "--iops-limit", help="Ограничение количества операций ввода-вывода в секунду", show_default=False), ionice: bool = typer.Option(False, "--ionice", help="Понизить приоритет ввода-вывода процесса (Linux, класс idle)"), progress: bool = typer.Option(False, "--progress", help="Показывать прогресс, скорость и ETA длительных операций в stderr"), stats_json: bool = typer.Option(False, "--stats-json", help="Вывести в конце итоговую статистику операций в формате JSON"), log_level: str = typer.Option(None, "--log-level", help="Уровень записи в файл лога (по умолчанию SHELL_LOG_LEVEL или INFO)", show_default=False), console_log_level: str = typer.Option(None, "--console-log-level", help="Уровень вывода лога в консоль (по умолчанию SHELL_CONSOLE_LOG_LEVEL или WARNING)", show_default=False), profile: bool = typer.Option(False, "--profile", help="Профилировать команду через cProfile и вывести самые дорогие функции в stderr"), profile_out: Path = typer.Option(None, "--profile-out", help="Сохранить профиль в файл pstats вместо вывода сводки (включает --profile)", show_default=False), profile_top: int = typer.Option(25, "--profile-top", min=1, help="Количество строк сводки профиля"), timings: bool = typer.Option(False, "--timings", help="Вывести в stderr время, процессорное время, байты и системные вызовы ввода-вывода каждого вызова сервиса"), mem_report: bool = typer.Option(False, "--mem-report", help="Вывести в stderr пик памяти tracemalloc и пиковый RSS команды"), max_memory: str = typer.Option(None, "--max-memory", help="Бюджет памяти процесса (RSS) в байтах, можно с суффиксом K/M/G: буферы уменьшаются, чтение целиком отказывает заранее", show_default=False))->None:
     """
     Основная функция, которая выполняется перед каждой командой, инициализирует систему логирования и создает контейнер зависимостей
     :param ctx: Контекст typer
+    :param bwlimit: ограничение пропускной способности (байт в секунду)
+    :param iops_limit: ограничение операций ввода-вывода в секунду
+    :param ionice: True/False (понизить приоритет ввода-вывода/нет)
+    :param progress: True/False (показывать прогресс/нет)
+    :param stats_json: True/False (вывести итоговую статистику в JSON/нет)
+    :param log_level: уровень записи в файл лога
+    :param console_log_level: уровень вывода лога в консоль
+    :param profile: True/False (профилировать команду/нет)
+    :param profile_out: путь к файлу pstats (None - вывести сводку в stderr)
+    :param profile_top: количество строк сводки профиля
+    :param timings: True/False (вывести замеры вызовов сервиса/нет)
+    :param mem_report: True/False (вывести пик памяти/нет)
+    :param max_memory: бюджет памяти процесса
     """
-    logging.config.dictConfig(LOGGING_CONFIG)
+    if isinstance(ctx.obj, Container):
+        # команда из shell/run: логирование и сервис уже настроены при запуске оболочки, поэтому глобальные
+        # опции здесь не применились бы - лучше отказать, чем молча выполнить команду без них
+        given = [param.opts[0] for param in ctx.command.params if param.name is not None and ctx.params.get(param.name) != param.default]
+        if given:
+            raise typer.BadParameter("глобальные опции задаются при запуске shell/run, а не для отдельной команды", param_hint=", ".join(given))
+        return
+
+    try:
+        setup_logging(level=log_level, console_level=console_log_level)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--log-level/--console-log-level")
 
     logger = logging.getLogger(__name__)
 
-    ctx.obj = Container(console_service=WindowsConsoleService(logger=logger))
+    limiter: IOLimiter | None = None
+    try:
+        if bwlimit or iops_limit:
+            limiter = IOLimiter(bwlimit=parse_size(bwlimit) if bwlimit else None, iops_limit=iops_limit)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--bwlimit")
+
+    budget: MemoryBudget | None = None
+    try:
+        if max_memory:
+            budget = MemoryBudget(int(parse_size(max_memory)))
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--max-memory")
+
+    if ionice and not lower_io_priority():
+        logger.warning("Не удалось понизить приоритет ввода-вывода на этой платформе")
+
+    service = create_console_service(logger, limiter)
+
+    callbacks: list[ProgressCallback] = []
+    if progress:
+        callbacks.append(ProgressPrinter())
+    if stats_json:
+        import json
+
+        stats = ProgressStats()
+        callbacks.append(stats)
+        ctx.call_on_close(lambda: typer.echo(json.dumps({"operations": stats.operations}, ensure_ascii=False)))
+    if callbacks:
+        def notify_all(event: ProgressEvent) -> None:
+            for callback in callbacks:
+                callback(event)
+
+        service.set_progress_callback(notify_all)
+    if budget is not None:
+        service.set_memory_budget(budget)
+    if mem_report:
+        memory_report = MemoryReport()
+        ctx.call_on_close(memory_report.report)
+    if timings:
+        call_timings = CallTimings()
+        call_timings.instrument(service, set(OSConsoleServiceBase.__abstractmethods__))
+        ctx.call_on_close(call_timings.report)
+    if profile or profile_out is not None:
+        profiler = start_profile()
+        ctx.call_on_close(lambda: report_profile(profiler, str(profile_out) if profile_out is not None else None, profile_top))
+
+    ctx.obj = Container(console_service=service, limiter=limiter, ionice=ionice)
 
 
 @app.command()
@@ -54,11 +148,12 @@ def ls(ctx: Context, path: Path = typer.Argument(..., readable=False, help="Dire
         if long:
             dm = FileDisplayMode.long
 
-        cnt = call.console_service.ls(path, dm)
-        out = list(cnt)
-        sys.stdout.writelines(out)
+        sys.stdout.writelines(call.console_service.ls_iter(path, dm))
     except OSError as e:
         typer.echo(e)
+    except MemoryError as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1)
     except Exception as e:
         raise e
 
@@ -79,15 +174,19 @@ def cat(ctx: Context, path: Path = typer.Argument(..., exists=False, readable=Fa
         if mode:
             read_mode = FileReadMode.bytes
 
-        d = c.console_service.cat(path, mode=read_mode)
+        for chunk in c.console_service.cat_stream(path, mode=read_mode):
+            if isinstance(chunk, bytes):
+                sys.stdout.buffer.write(chunk)
+            else:
+                sys.stdout.write(chunk)
 
-        if isinstance(d, bytes):
-            sys.stdout.buffer.write(d)
-
-        else:
-            typer.echo(str(d))
+        if read_mode == FileReadMode.string:
+            typer.echo()
     except OSError as e:
         typer.echo(e)
+    except MemoryError as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1)
     except Exception as e:
         raise e
 
@@ -147,12 +246,37 @@ def mv(ctx: Context, path1: Path = typer.Argument(..., help="Источник (
         raise e
 
 @app.command()
-def rm(ctx: Context, path: Path = typer.Argument(..., help="Путь к удаляемому файлу или каталогу"), r: bool = typer.Option(False, "-r", help="Рекурсивное удаление каталога")) -> None:
+def rename(ctx: Context, expression: str = typer.Argument(..., help="Выражение замены для имени файла: s/шаблон/замена/[gi]"), paths: list[str] = typer.Argument(..., help="Файлы или glob-шаблоны (например 'dir/*.log')"), dry_run: bool = typer.Option(False, "-n", "--dry-run", help="Только показать план переименования")) -> None:
+    """
+    Функция вызывает команду массового переименования rename (все операции выполняются в одном процессе) и обрабатывает ошибки
+    :param ctx: контекст Typer
+    :param expression: выражение замены s/шаблон/замена/
+    :param paths: список файлов или glob-шаблонов
+    :param dry_run: True/False (только вывести план/выполнить переименование)
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        plan = c.console_service.rename(expression, list(paths), dry_run=dry_run)
+
+        if dry_run:
+            for src, dst in plan:
+                typer.echo(f"'{src}' -> '{dst}'")
+        typer.echo(f"rename: {'запланировано' if dry_run else 'переименовано'} {len(plan)}")
+    except (OSError, ValueError) as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+@app.command()
+def rm(ctx: Context, path: Path = typer.Argument(..., help="Путь к удаляемому файлу или каталогу"), r: bool = typer.Option(False, "-r", help="Рекурсивное удаление каталога"), workers: int = typer.Option(None, "-j", "--workers", help="Количество потоков для удаления каталога (по умолчанию - число ядер)", show_default=False), defer: bool = typer.Option(False, "--defer", help="Мгновенно перенести в корзину (место освободит purge, можно вернуть через restore)")) -> None:
     """
     Функция запускает команду удаления файла/каталога rm и обрабатывает ошибки
     :param ctx: контекст Typer
     :param path: путь к удаляемому файлу или каталогу
     :param r: True/False (рекурсивное удаление каталога/нет)
+    :param workers: количество потоков для параллельного удаления каталога
+    :param defer: True/False (перенести в корзину/удалить сразу)
     :return: функция ничего не возвращает
     """
     try:
@@ -160,9 +284,9 @@ def rm(ctx: Context, path: Path = typer.Argument(..., help="Путь к удал
 
         if path.is_dir() and not r:
             typer.echo(f"Ошибка: {path} — это директория. Укажите -r для рекурсивного удаления.")
-            return
+            raise typer.Exit(code=1)
 
-        if path.is_dir() and r:
+        if path.is_dir() and r and not defer:
             answer = typer.prompt("Вы уверены, что хотите удалить каталог рекурсивно? (да/нет)")
             if answer.strip().lower() not in {"да"}:
                 typer.echo("Операция отменена")
@@ -170,9 +294,9 @@ def rm(ctx: Context, path: Path = typer.Argument(..., help="Путь к удал
 
         if not path.exists():
             typer.echo(f"Файл или каталог не найден: {path}")
-            return
+            raise typer.Exit(code=1)
 
-        c.console_service.rm(path, recursive=r)
+        c.console_service.rm(path, recursive=r, workers=workers, defer=defer)
 
     except OSError as e:
         typer.echo(e)
@@ -181,18 +305,103 @@ def rm(ctx: Context, path: Path = typer.Argument(..., help="Путь к удал
 
 
 @app.command()
-def zip(ctx: Context, path: Path = typer.Argument(..., help="Каталог для упаковки"), path_arch: Path = typer.Argument(..., help="Файл архива ZIP")) -> None:
+def trash(ctx: Context) -> None:
+    """
+    Функция вызывает команду trash, которая выводит содержимое корзин (объекты, удалённые через rm --defer)
+    :param ctx: контекст Typer
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        for entry in c.console_service.trash_list():
+            deleted = datetime.fromtimestamp(entry.deleted_at).strftime("%Y-%m-%d %H:%M:%S")
+            typer.echo(f"{entry.entry_id} {deleted} {entry.original}")
+    except OSError as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+
+@app.command()
+def restore(ctx: Context, entry_id: str = typer.Argument(..., help="Идентификатор записи корзины (см. команду trash)")) -> None:
+    """
+    Функция вызывает команду restore, которая возвращает объект из корзины на исходное место, и обрабатывает ошибки
+    :param ctx: контекст Typer
+    :param entry_id: идентификатор записи корзины
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        restored = c.console_service.restore(entry_id)
+        typer.echo(f"restore: восстановлено {restored}")
+    except OSError as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+
+@app.command()
+def purge(ctx: Context, older_than: float = typer.Option(0.0, "--older-than", help="Очищать только записи старше N секунд"), pause: float = typer.Option(0.0, "--pause", help="Пауза в секундах между записями (ограничение нагрузки)"), workers: int = typer.Option(1, "-j", "--workers", help="Количество потоков для удаления одной записи"), background: bool = typer.Option(False, "--background", help="Очищать в фоновом процессе и сразу вернуть управление")) -> None:
+    """
+    Функция вызывает команду purge, которая окончательно освобождает место, занятое корзиной, и обрабатывает ошибки
+    :param ctx: контекст Typer
+    :param older_than: очищать только записи старше указанного количества секунд
+    :param pause: пауза между записями в секундах
+    :param workers: количество потоков для удаления одной записи
+    :param background: True/False (запустить очистку в отдельном фоновом процессе/выполнить сейчас)
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        if background:
+            # фоновый процесс получает те же ограничения ввода-вывода (глобальные опции идут до имени команды)
+            # и рабочий каталог вызывающего, а пакет src находится через PYTHONPATH
+            args = [sys.executable, "-m", "src.main"]
+            if c.limiter is not None and c.limiter.bwlimit:
+                args += ["--bwlimit", str(c.limiter.bwlimit)]
+            if c.limiter is not None and c.limiter.iops_limit:
+                args += ["--iops-limit", str(c.limiter.iops_limit)]
+            if c.ionice:
+                args.append("--ionice")
+            args += ["purge", "--older-than", str(older_than), "--pause", str(pause), "--workers", str(workers)]
+            root = str(Path(__file__).resolve().parent.parent)
+            env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+            proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True, env=env)
+            typer.echo(f"purge: запущена фоновая очистка, pid={proc.pid}")
+            return
+
+        purged = c.console_service.purge(older_than=older_than, pause=pause, workers=workers)
+        typer.echo(f"purge: очищено записей {purged}")
+    except OSError as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+
+@app.command()
+def zip(ctx: Context, path: Path = typer.Argument(..., help="Каталог для упаковки"), path_arch: Path = typer.Argument(None, help="Файл архива ZIP ('-' - stdout)", show_default=False), workers: int = typer.Option(1, "-j", "--workers", help="Количество процессов для сжатия (0 - по числу ядер)"), method: ZipMethod = typer.Option(ZipMethod.deflate, "--method", help="Способ сжатия (auto - несжимаемые файлы хранятся без сжатия)"), level: int = typer.Option(None, "--level", min=0, max=9, help="Уровень сжатия 0-9", show_default=False), update: bool = typer.Option(False, "-u", "--update", help="Обновить существующий архив, сжимая только новые и изменённые файлы"), list_: bool = typer.Option(False, "-l", "--list", help="Показать содержимое архива PATH (только центральный каталог)"), checksums: bool = typer.Option(False, "--checksums", help="Записать в архив список SHA-256 файлов (.sha256sums) для verify")) -> None:
     """
     Функция вызывает команду zip, которая создаёт архив формата zip из указанного каталога, и обрабатывает ошибки
     :param ctx: контекст Typer
     :param path: путь к каталогу
     :param path_arch: путь к итоговому zip-файлу
+    :param workers: количество процессов для параллельного сжатия
+    :param method: способ сжатия (deflate, bzip2, lzma, store, auto)
+    :param level: уровень сжатия
+    :param update: обновить существующий архив вместо создания заново
+    :param list_: True/False (показать содержимое архива path/создать архив)
+    :param checksums: True/False (записать список SHA-256 файлов/нет)
     :return: функция ничего не возвращает
     """
     try:
         c: Container = get_container(ctx)
-        c.console_service.zip(path, path_arch)
-        typer.echo(f"zip: Cоздан архив {path_arch}")
+        if list_:
+            print_members(c.console_service.zip_list(path))
+            return
+        if path_arch is None:
+            raise typer.BadParameter("Не указан файл архива", param_hint="PATH_ARCH")
+        c.console_service.zip(path, path_arch, workers=workers, method=method, level=level, update=update, checksums=checksums)
+        typer.echo(f"zip: Cоздан архив {path_arch}", err=is_stdio(path_arch))
 
     except OSError as e:
         typer.echo(e)
@@ -200,17 +409,19 @@ def zip(ctx: Context, path: Path = typer.Argument(..., help="Каталог дл
         raise e
 
 @app.command()
-def unzip(ctx: Context, path_arch: Path = typer.Argument(..., help="ZIP архив для распаковки"), res: Path = typer.Argument(None, help="Папка назначения (по умолчанию текущая)", show_default=False)) -> None:
+def unzip(ctx: Context, path_arch: Path = typer.Argument(..., help="ZIP архив для распаковки ('-' - stdin)"), res: Path = typer.Argument(None, help="Папка назначения (по умолчанию текущая)", show_default=False), workers: int = typer.Option(1, "-j", "--workers", help="Количество потоков для распаковки (0 - по числу ядер)"), members: list[str] = typer.Option(None, "-m", "--member", help="Распаковать только этот элемент (имя, каталог или glob-шаблон; можно указать несколько раз)", show_default=False)) -> None:
     """
     Функция вызывает команду unzip, которая распаковывает zip-архив в указанную директорию (или текущую, если не задано) и обрабатывает ошибки
     :param ctx: Контекст Typer для доступа к контейнеру зависимостей
     :param path_arch: путь к zip-файлу
     :param res: папка назначения (если None — используется текущая рабочая директория)
+    :param workers: количество потоков для параллельной распаковки
+    :param members: имена и glob-шаблоны элементов для выборочной распаковки
     :return: функция ничего не возвращает
     """
     try:
         c: Container = get_container(ctx)
-        c.console_service.unzip(path_arch, res)
+        c.console_service.unzip(path_arch, res, workers=workers, members=members or None)
 
         if res:
             typer.echo(f"unzip: распаковано в {res}")
@@ -222,35 +433,66 @@ def unzip(ctx: Context, path_arch: Path = typer.Argument(..., help="ZIP архи
         raise e
 
 @app.command()
-def tar(ctx: Context, path: Path = typer.Argument(..., help="Каталог для упаковки"), path_arch: Path = typer.Argument(..., help="Файл архива TAR.GZ")) -> None:
+def tar(ctx: Context, path: Path = typer.Argument(..., help="Каталог для упаковки"), path_arch: Path = typer.Argument(None, help="Файл архива TAR.GZ ('-' - stdout)", show_default=False), list_: bool = typer.Option(False, "-l", "--list", help="Показать содержимое архива PATH (только заголовки элементов)"), index: bool = typer.Option(False, "--index", help="Записать рядом индекс ARCHIVE.idx для быстрой выборочной распаковки"), workers: int = typer.Option(1, "-j", "--workers", help="Количество процессов для сжатия (0 - по числу ядер)"), codec: TarCodec = typer.Option(None, "--codec", help="Способ сжатия (по умолчанию - по расширению архива)", show_default=False), level: int = typer.Option(None, "--level", min=0, max=9, help="Уровень сжатия 0-9", show_default=False), incremental: Path = typer.Option(None, "-g", "--incremental", help="Файл снимка: архивировать только изменения с прошлого запуска и список удалённых файлов", show_default=False), checksums: bool = typer.Option(False, "--checksums", help="Записать в архив список SHA-256 файлов (.sha256sums) для verify")) -> None:
     """
-    Функция вызывает команду tar, которая создаёт архив формата tar.gz из указанного каталога и обрабатывает ошибки
+    Функция вызывает команду tar, которая создаёт tar-архив (без сжатия, gz, bz2 или xz) из указанного каталога и обрабатывает ошибки
     :param ctx: Контекст Typer для доступа к контейнеру зависимостей
     :param path: Путь к каталогу для упаковки
     :param path_arch: Путь к результирующему TAR.GZ файлу
+    :param list_: True/False (показать содержимое архива path/создать архив)
+    :param index: True/False (записать индекс для выборочной распаковки/нет)
+    :param workers: количество процессов для параллельного сжатия
+    :param codec: способ сжатия (none, gz, bz2, xz)
+    :param level: уровень сжатия
+    :param incremental: путь к файлу снимка для инкрементального архива
+    :param checksums: True/False (записать список SHA-256 файлов/нет)
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        if list_:
+            print_members(c.console_service.tar_list(path))
+            return
+        if path_arch is None:
+            raise typer.BadParameter("Не указан файл архива", param_hint="PATH_ARCH")
+        c.console_service.tar_dir(path, path_arch, index=index, workers=workers, codec=codec, level=level, incremental=incremental, checksums=checksums)
+        typer.echo(f"tar: Cоздан архив {path_arch}", err=is_stdio(path_arch))
+    except OSError as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+
+@app.command("tar-index")
+def tar_index(ctx: Context, path_arch: Path = typer.Argument(..., help="TAR.GZ архив")) -> None:
+    """
+    Функция вызывает команду tar-index, которая строит индекс для уже существующего tar.gz архива
+    :param ctx: контекст Typer
+    :param path_arch: путь к tar.gz архиву
     :return: функция ничего не возвращает
     """
     try:
         c: Container = get_container(ctx)
-        c.console_service.tar_dir(path, path_arch)
-        typer.echo(f"tar: Cоздан архив {path_arch}")
+        idx = c.console_service.tar_index(path_arch)
+        typer.echo(f"tar-index: Создан индекс {idx}")
     except OSError as e:
         typer.echo(e)
     except Exception as e:
         raise e
 
 @app.command()
-def untar(ctx: Context, path_arch: Path = typer.Argument(..., help="TAR.GZ архив для распаковки"), res: Path = typer.Argument(None, help="Папка назначения (по умолчанию текущая)", show_default=False)) -> None:
+def untar(ctx: Context, path_arch: Path = typer.Argument(..., help="TAR.GZ архив для распаковки ('-' - stdin)"), res: Path = typer.Argument(None, help="Папка назначения (по умолчанию текущая)", show_default=False), members: list[str] = typer.Option(None, "-m", "--member", help="Распаковать только этот элемент (имя, каталог или glob-шаблон; можно указать несколько раз)", show_default=False)) -> None:
     """
     Функция вызывает команду untar, которая распаковывает tar.gz архив в указанную директорию (или текущую, если не задано)
     :param ctx: контекст Typer
     :param path_arch: путь к tar архиву
     :param res: папка назначения (если None — используется текущая рабочая директория)
+    :param members: имена и glob-шаблоны элементов для выборочной распаковки
     :return: функция ничего не возвращает
     """
     try:
         c: Container = get_container(ctx)
-        c.console_service.untar(path_arch, res)
+        c.console_service.untar(path_arch, res, members=members or None)
 
         if res:
             typer.echo(f"untar: распаковано в {res}")
@@ -262,6 +504,49 @@ def untar(ctx: Context, path_arch: Path = typer.Argument(..., help="TAR.GZ ар
         raise e
 
 
+@app.command("untar-chain")
+def untar_chain(ctx: Context, paths: list[Path] = typer.Argument(..., help="Полный архив и инкрементальные архивы по порядку создания"), res: Path = typer.Option(None, "-C", "--directory", help="Папка назначения (по умолчанию текущая)", show_default=False)) -> None:
+    """
+    Функция вызывает команду untar-chain, которая восстанавливает каталог из цепочки инкрементальных архивов
+    :param ctx: контекст Typer
+    :param paths: пути к архивам цепочки (от полного к последнему)
+    :param res: папка назначения (если None — используется текущая рабочая директория)
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        c.console_service.untar_chain(list(paths), res)
+        typer.echo(f"untar-chain: восстановлено из {len(paths)} архивов в {res or Path('.').resolve()}")
+    except OSError as e:
+        typer.echo(e)
+    except Exception as e:
+        raise e
+
+
+@app.command()
+def verify(ctx: Context, path_arch: Path = typer.Argument(..., help="ZIP или TAR архив для проверки"), workers: int = typer.Option(0, "-j", "--workers", help="Количество потоков для проверки zip (0 - по числу ядер)")) -> None:
+    """
+    Функция вызывает команду verify, которая проверяет CRC-32 (и SHA-256, если он записан) всех элементов архива
+    без распаковки на диск; при повреждениях команда завершается с кодом 1
+    :param ctx: контекст Typer
+    :param path_arch: путь к архиву
+    :param workers: количество потоков для проверки zip
+    :return: функция ничего не возвращает
+    """
+    try:
+        c: Container = get_container(ctx)
+        report = c.console_service.verify(path_arch, workers=workers)
+    except OSError as e:
+        typer.echo(e)
+        return
+    for name, error in report.corrupt:
+        typer.echo(f"{name}: {error}")
+    checksums = "CRC-32 и SHA-256" if report.has_checksums else "CRC-32"
+    typer.echo(f"verify: проверено {report.checked} ({checksums}), повреждено {len(report.corrupt)}")
+    if not report.ok:
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def grep(ctx: Context, pattern: str = typer.Argument(..., help="Шаблон для поиска (регулярное выражение)"), path: Path = typer.Argument('.', help="Каталог или файл для поиска"), r: bool = typer.Option(False, '-р', '--recursive', help="Рекурсивный поиск в подкаталогах"), ignore_case: bool = typer.Option(False, '-і', '--ignore-case', help="Поиск без учёта регистра")) -> None:
     """
@@ -275,12 +560,58 @@ def grep(ctx: Context, pattern: str = typer.Argument(..., help="Шаблон д
     """
     try:
         c: Container = get_container(ctx)
-        res = c.console_service.grep(pattern, path, r=r, ignore_case=ignore_case)
-        for i in res:
+        for i in c.console_service.grep_iter(pattern, path, r=r, ignore_case=ignore_case):
             typer.echo(i)
+    except MemoryError as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1)
     except Exception as e:
         typer.echo(e)
 
 
+@app.command()
+def shell(ctx: Context) -> None:
+    """
+    Функция вызывает команду shell: один долгоживущий процесс читает команды из приглашения (или из stdin, если это
+    не терминал) и выполняет их без повторного запуска интерпретатора, импорта модулей и настройки логирования.
+    Текущий каталог (cd), логгер и сервис сохраняются между командами; глобальные опции задаются при запуске shell
+    :param ctx: контекст Typer
+    :return: функция ничего не возвращает
+    """
+    c: Container = get_container(ctx)
+    status = run_shell(typer.main.get_command(app), c, read_lines(sys.stdin, sys.stdin.isatty()))
+    if status:
+        raise typer.Exit(code=status)
+
+@app.command()
+def run(ctx: Context, script: Path = typer.Argument(None, help="Файл со списком команд (по одной в строке)", show_default=False), from_stdin: bool = typer.Option(False, "--stdin", help="Читать команды из stdin"), jobs: int = typer.Option(0, "-j", "--jobs", help="Количество одновременно выполняемых фоновых строк '&' (0 - по числу ядер)"), fail_fast: bool = typer.Option(True, "--fail-fast/--continue", help="Остановиться после первой ошибки или выполнить все строки")) -> None:
+    """
+    Функция вызывает команду run, которая выполняет скрипт команд (cp, mv, rm, zip, ...) в одном процессе
+    с одним контейнером и печатает в stderr отчёт о времени выполнения по командам
+    :param ctx: контекст Typer
+    :param script: путь к файлу скрипта
+    :param from_stdin: True/False (читать скрипт из stdin/из файла)
+    :param jobs: количество одновременно выполняемых фоновых строк
+    :param fail_fast: True/False (остановиться после первой ошибки/выполнить все строки)
+    :return: функция ничего не возвращает
+    """
+    if (script is None) == (not from_stdin):
+        raise typer.BadParameter("Укажите файл скрипта или --stdin", param_hint="SCRIPT")
+    c: Container = get_container(ctx)
+    start = time.perf_counter()
+    try:
+        if from_stdin:
+            results = run_script(typer.main.get_command(app), c, sys.stdin, jobs or None, fail_fast)
+        else:
+            with open(script, encoding="utf-8") as fh:
+                results = run_script(typer.main.get_command(app), c, fh, jobs or None, fail_fast)
+    except (OSError, ValueError) as e:
+        typer.echo(f"run: {e}", err=True)
+        raise typer.Exit(code=2)
+    for line in format_report(results, time.perf_counter() - start):
+        typer.echo(line, err=True)
+    if any(r.status for r in results):
+        raise typer.Exit(code=1)
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,150 @@
+import glob
+import os
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from os import PathLike
+from typing import Any, BinaryIO
+
+from src.services.lazy import lazy_import
+
+hashlib = lazy_import("hashlib")
+
+STDIO = "-"
+CHECKSUMS_NAME = ".sha256sums"
+HASH_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class ArchiveMember:
+    name: str
+    size: int
+    compressed_size: int | None
+    mtime: float
+    is_dir: bool
+
+
+@dataclass
+class VerifyReport:
+    checked: int
+    corrupt: list[tuple[str, str]]
+    has_checksums: bool
+
+    @property
+    def ok(self) -> bool:
+        """
+        Функция сообщает, прошёл ли архив проверку
+        :return: True/False (повреждённых элементов нет/есть)
+        """
+        return not self.corrupt
+
+
+class HashingReader:
+    def __init__(self, fh: BinaryIO) -> None:
+        """
+        Функция инициализирует обёртку файла, считающую SHA-256 прочитанных данных (чтобы при упаковке
+        не читать файл второй раз)
+        :param fh: файл, открытый на чтение в двоичном режиме
+        :return: функция ничего не возвращает
+        """
+        self._fh = fh
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Функция читает данные из файла и учитывает их в хеше
+        :param size: количество байт (-1 - до конца)
+        :return: прочитанные байты
+        """
+        data = self._fh.read(size)
+        self.digest.update(data)
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fh, name)
+
+
+def file_sha256(path: PathLike[str] | str) -> str:
+    """
+    Функция считает SHA-256 файла блоками по HASH_READ_SIZE
+    :param path: путь к файлу
+    :return: хеш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(HASH_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def format_checksums(digests: dict[str, str]) -> bytes:
+    """
+    Функция формирует список хешей в формате sha256sum (его можно проверить 'sha256sum -c' в распакованном каталоге)
+    :param digests: хеши по именам элементов
+    :return: содержимое элемента CHECKSUMS_NAME
+    """
+    return "".join(f"{digest}  {name}\n" for name, digest in sorted(digests.items())).encode("utf-8")
+
+
+def parse_checksums(data: bytes) -> dict[str, str]:
+    """
+    Функция читает список хешей в формате sha256sum
+    :param data: содержимое элемента CHECKSUMS_NAME
+    :return: хеши по именам элементов
+    """
+    digests = {}
+    for line in data.decode("utf-8").splitlines():
+        digest, sep, name = line.partition("  ")
+        if not sep or len(digest) != 64:
+            raise ValueError(f"Некорректная строка списка SHA-256: '{line}'")
+        digests[name] = digest.lower()
+    return digests
+
+
+def is_stdio(path: PathLike[str] | str) -> bool:
+    """
+    Функция проверяет, обозначает ли путь к архиву стандартный поток ('-' - stdin при чтении, stdout при записи)
+    :param path: путь к архиву
+    :return: True/False (стандартный поток/файл)
+    """
+    return os.fspath(path) == STDIO
+
+
+def member_matches(name: str, pattern: str) -> bool:
+    """
+    Функция проверяет, подходит ли элемент архива под шаблон: точное имя, glob-шаблон или каталог
+    (тогда подходят все элементы внутри него)
+    :param name: имя элемента в архиве
+    :param pattern: имя или glob-шаблон
+    :return: True/False (элемент подходит/нет)
+    """
+    name = name.rstrip("/")
+    pattern = pattern.rstrip("/")
+    return name == pattern or name.startswith(f"{pattern}/") or fnmatchcase(name, pattern)
+
+
+def select_members[T](members: Iterable[T], patterns: list[str], describe: Callable[[T], tuple[str, bool]]) -> Iterator[T]:
+    """
+    Функция отбирает элементы архива по именам и glob-шаблонам. Если все шаблоны - точные имена файлов,
+    перебор прекращается, как только каждый из них найден (для tar это позволяет не читать остаток архива)
+    :param members: элементы архива (ZipInfo или TarInfo)
+    :param patterns: имена и glob-шаблоны
+    :param describe: функция, возвращающая имя элемента и признак каталога
+    :return: итератор по подходящим элементам
+    """
+    literal = not any(glob.has_magic(p) for p in patterns)
+    pending = {p.rstrip("/") for p in patterns}
+    unmatched = set(patterns)
+    for member in members:
+        name, is_dir = describe(member)
+        matched = [p for p in patterns if member_matches(name, p)]
+        if not matched:
+            continue
+        unmatched.difference_update(matched)
+        yield member
+        if not is_dir:
+            pending.discard(name.rstrip("/"))
+        if literal and not pending:
+            return
+    if unmatched:
+        raise FileNotFoundError(f"Элементы не найдены в архиве: {', '.join(sorted(unmatched))}")
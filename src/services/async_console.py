@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, Self, TypeVar
+
+from src.enums import FileDisplayMode, FileReadMode, TarCodec, ZipMethod
+from src.services.archive import ArchiveMember, VerifyReport
+from src.services.base import OSConsoleServiceBase
+from src.services.memory import MemoryBudget
+from src.services.progress import ProgressCallback, ProgressEvent
+
+if TYPE_CHECKING:
+    from src.services.trash import TrashEntry
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+ITER_BATCH = 256
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+class AsyncConsoleService:
+    def __init__(self, service: OSConsoleServiceBase, limit: int | None = None) -> None:
+        """
+        Функция инициализирует асинхронную обёртку над сервисом консоли. Вызовы выполняются в собственном пуле
+        потоков, поэтому не блокируют цикл событий; одновременно выполняется не больше limit вызовов, остальные
+        ждут в цикле событий (их отмена не трогает пул). Отмена выполняющегося вызова кооперативная: cp, mv,
+        zip, unzip, tar, untar и verify останавливаются на ближайшем событии прогресса, итераторы ls/cat/grep -
+        между порциями, остальные вызовы (в том числе rm, который не отправляет событий) доводятся до конца.
+        Признак отмены хранится в thread-local переменной потока, выполняющего вызов, поэтому события из собственных
+        пулов сервиса его не видят: unzip с workers != 1 и verify zip-архива (проверяется в пуле потоков) тоже
+        доводятся до конца. Подписчик прогресса, уже заданный у сервиса, продолжает получать события, а после aclose
+        снова подписывается на сервис напрямую.
+        Асинхронные методы без собственного описания принимают те же параметры и возвращают то же, что одноимённые
+        методы OSConsoleServiceBase, и выполняют их в пуле
+        :param service: синхронный сервис консоли
+        :param limit: количество одновременных вызовов (по умолчанию os.cpu_count())
+        :return: функция ничего не возвращает
+        """
+        self.service = service
+        self.limit = max(1, limit or os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix="console")
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self._local = threading.local()
+        self._progress_callback: ProgressCallback | None = None
+        self._service_callback = service.get_progress_callback()
+        service.set_progress_callback(self._on_progress)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Функция дожидается завершения выполняющихся вызовов, останавливает пул потоков и возвращает сервису
+        прежнего подписчика прогресса
+        :return: функция ничего не возвращает
+        """
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        if self.service.get_progress_callback() == self._on_progress:
+            self.service.set_progress_callback(self._service_callback)
+
+    def set_progress_callback(self, callback: ProgressCallback | None) -> None:
+        """
+        Функция подписывает получателя на события прогресса. Он вызывается в потоке пула, поэтому для передачи
+        в цикл событий используйте loop.call_soon_threadsafe
+        :param callback: функция, принимающая ProgressEvent (None - отписаться)
+        :return: функция ничего не возвращает
+        """
+        self._progress_callback = callback
+
+    def set_memory_budget(self, budget: MemoryBudget | None) -> None:
+        """
+        Функция задаёт бюджет памяти синхронного сервиса
+        :param budget: бюджет памяти (None - без ограничения)
+        :return: функция ничего не возвращает
+        """
+        self.service.set_memory_budget(budget)
+
+    def _on_progress(self, event: ProgressEvent) -> None:
+        """
+        Функция получает события прогресса в потоке пула: останавливает отменённый вызов и передаёт событие прежнему
+        подписчику сервиса и подписчику обёртки
+        :param event: событие прогресса
+        :return: функция ничего не возвращает
+        :raises OperationCancelled: если вызов, выполняющийся в этом потоке, отменён
+        """
+        cancelled = getattr(self._local, "cancelled", None)
+        if cancelled is not None and cancelled.is_set() and not event.finished:
+            raise OperationCancelled(f"{event.operation}: Операция отменена")
+        if self._service_callback is not None:
+            self._service_callback(event)
+        if self._progress_callback is not None:
+            self._progress_callback(event)
+
+    def _call(self, cancelled: threading.Event, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Функция выполняет вызов в потоке пула, запоминая для него признак отмены
+        :param cancelled: признак отмены вызова
+        :param func: метод синхронного сервиса
+        :return: результат метода
+        :raises OperationCancelled: если вызов отменён до начала выполнения
+        """
+        if cancelled.is_set():
+            raise OperationCancelled("Операция отменена")
+        self._local.cancelled = cancelled
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._local.cancelled = None
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Функция выполняет метод синхронного сервиса в пуле с учётом ограничения одновременных вызовов.
+        При отмене задачи вызову сообщается об отмене, а задача завершается после того, как он остановится,
+        чтобы отменённая операция не продолжала менять файлы в фоне
+        :param func: метод синхронного сервиса
+        :return: результат метода
+        """
+        async with self._semaphore:
+            cancelled = threading.Event()
+            future = asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(self._call, cancelled, func, *args, **kwargs))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancelled.set()
+                try:
+                    await future
+                except OperationCancelled:
+                    pass
+                except Exception:
+                    logger.exception("%s: ошибка в отменённом вызове", getattr(func, "__name__", func))
+                raise
+
+    async def _iterate(self, iterator: Iterator[T], batch: int) -> AsyncIterator[T]:
+        """
+        Функция превращает итератор синхронного сервиса в асинхронный: элементы читаются в пуле порциями по batch,
+        чтобы не переключать потоки на каждую строку. Прерванный итератор закрывается (освобождает файлы)
+        :param iterator: итератор синхронного сервиса
+        :param batch: количество элементов в порции
+        :return: асинхронный итератор элементов
+        """
+        def take() -> list[T]:
+            items = []
+            for item in iterator:
+                items.append(item)
+                if len(items) >= batch:
+                    break
+            return items
+
+        try:
+            while items := await self._run(take):
+                for item in items:
+                    yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await asyncio.shield(self._run(close))
+
+    async def ls(self, path: PathLike[str] | str, display_mode: FileDisplayMode = FileDisplayMode.simple) -> list[str]:
+        return await self._run(self.service.ls, path, display_mode)
+
+    async def ls_iter(self, path: PathLike[str] | str, display_mode: FileDisplayMode = FileDisplayMode.simple) -> AsyncIterator[str]:
+        """
+        Функция выводит содержимое каталога по мере чтения (ошибки пути возникают при первом элементе)
+        :param path: путь к каталогу или файлу
+        :param display_mode: режим отображения
+        :return: асинхронный итератор строк
+        """
+        iterator = await self._run(self.service.ls_iter, path, display_mode)
+        async for line in self._iterate(iterator, ITER_BATCH):
+            yield line
+
+    async def format_long(self, entry: PathLike[str] | str) -> str:
+        return await self._run(self.service.format_long, entry)
+
+    async def cat(self, filename: PathLike | str, mode: Literal[FileReadMode.string, FileReadMode.bytes] = FileReadMode.string) -> str | bytes:
+        return await self._run(self.service.cat, filename, mode)
+
+    async def cat_stream(self, filename: PathLike | str, mode: Literal[FileReadMode.string, FileReadMode.bytes] = FileReadMode.string) -> AsyncIterator[str | bytes]:
+        """
+        Функция читает файл порциями (по одной порции синхронного сервиса за переход в пул)
+        :param filename: путь к файлу
+        :param mode: режим чтения
+        :return: асинхронный итератор порций
+        """
+        iterator = await self._run(self.service.cat_stream, filename, mode)
+        async for chunk in self._iterate(iterator, 1):
+            yield chunk
+
+    async def cd(self, path: PathLike[str] | str) -> str:
+        """
+        Функция меняет текущий каталог. Он общий для всего процесса, поэтому относительные пути одновременно
+        выполняющихся вызовов могут разрешиться уже от нового каталога - передавайте им абсолютные пути
+        :param path: путь к каталогу
+        :return: новый текущий каталог
+        """
+        return await self._run(self.service.cd, path)
+
+    async def cp(self, src: PathLike[str] | str, dst: PathLike[str] | str, recursive: bool = False) -> None:
+        await self._run(self.service.cp, src, dst, recursive)
+
+    async def mv(self, src: PathLike[str] | str, dst: PathLike[str] | str) -> None:
+        await self._run(self.service.mv, src, dst)
+
+    async def rename(self, expression: str, paths: list[PathLike[str] | str], dry_run: bool = False) -> list[tuple[Path, Path]]:
+        return await self._run(self.service.rename, expression, paths, dry_run)
+
+    async def rm(self, target: PathLike[str] | str, recursive: bool = False, workers: int | None = None, defer: bool = False) -> None:
+        await self._run(self.service.rm, target, recursive, workers, defer)
+
+    async def trash_list(self) -> list[TrashEntry]:
+        return await self._run(self.service.trash_list)
+
+    async def restore(self, entry_id: str) -> Path:
+        return await self._run(self.service.restore, entry_id)
+
+    async def purge(self, older_than: float = 0.0, pause: float = 0.0, workers: int | None = 1) -> int:
+        return await self._run(self.service.purge, older_than, pause, workers)
+
+    async def zip(self, path: PathLike[str] | str, path_arch: PathLike[str] | str, workers: int = 1, method: ZipMethod = ZipMethod.deflate, level: int | None = None, update: bool = False, checksums: bool = False) -> None:
+        await self._run(self.service.zip, path, path_arch, workers, method, level, update, checksums)
+
+    async def unzip(self, path_arch: PathLike[str] | str, res: PathLike[str] | str | None = None, workers: int = 1, members: list[str] | None = None) -> None:
+        await self._run(self.service.unzip, path_arch, res, workers, members)
+
+    async def tar_dir(self, path_file: PathLike[str] | str, path_arch: PathLike[str] | str, index: bool = False, workers: int = 1, codec: TarCodec | None = None, level: int | None = None, incremental: PathLike[str] | str | None = None, checksums: bool = False) -> None:
+        await self._run(self.service.tar_dir, path_file, path_arch, index, workers, codec, level, incremental, checksums)
+
+    async def tar_index(self, path_arch: PathLike[str] | str) -> Path:
+        return await self._run(self.service.tar_index, path_arch)
+
+    async def untar(self, path_archive_tar_gz: PathLike[str] | str, res: PathLike[str] | str | None = None, members: list[str] | None = None) -> None:
+        await self._run(self.service.untar, path_archive_tar_gz, res, members)
+
+    async def untar_chain(self, paths: list[PathLike[str] | str], res: PathLike[str] | str | None = None) -> None:
+        await self._run(self.service.untar_chain, paths, res)
+
+    async def zip_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        return await self._run(self.service.zip_list, path_arch)
+
+    async def tar_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        return await self._run(self.service.tar_list, path_arch)
+
+    async def verify(self, path_arch: PathLike[str] | str, workers: int = 0) -> VerifyReport:
+        return await self._run(self.service.verify, path_arch, workers)
+
+    async def grep(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> list[str]:
+        return await self._run(self.service.grep, pattern, path, r, ignore_case)
+
+    async def grep_iter(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> AsyncIterator[str]:
+        """
+        Функция выводит совпадения по мере поиска (ошибка в шаблоне возникает при первом элементе)
+        :param pattern: регулярное выражение
+        :param path: путь к файлу или каталогу
+        :param r: True/False (искать рекурсивно/нет)
+        :param ignore_case: True/False (без учёта регистра/с учётом)
+        :return: асинхронный итератор строк с совпадениями
+        """
+        iterator = await self._run(self.service.grep_iter, pattern, path, r, ignore_case)
+        async for line in self._iterate(iterator, ITER_BATCH):
+            yield line
@@ -1,14 +1,64 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from os import PathLike
-from typing import Literal
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from src.enums import FileReadMode, FileDisplayMode, TarCodec, ZipMethod
+from src.services.archive import ArchiveMember, VerifyReport
+from src.services.memory import MemoryBudget
+from src.services.progress import ProgressCallback, ProgressTracker
 
-from src.enums import FileReadMode, FileDisplayMode
+if TYPE_CHECKING:
+    from src.services.trash import TrashEntry
 
 class OSConsoleServiceBase(ABC):
+    _progress_callback: ProgressCallback | None = None
+    _memory_budget: MemoryBudget | None = None
+
+    def set_progress_callback(self, callback: ProgressCallback | None) -> None:
+        """
+        Функция подписывает получателя на события прогресса длительных операций (cp, mv, zip, unzip, tar, untar)
+        :param callback: функция, принимающая ProgressEvent (None - отписаться)
+        :return: функция ничего не возвращает
+        """
+        self._progress_callback = callback
+
+    def get_progress_callback(self) -> ProgressCallback | None:
+        """
+        Функция возвращает текущего получателя событий прогресса (например, чтобы обёртка могла передавать ему события)
+        :return: функция, принимающая ProgressEvent, или None
+        """
+        return self._progress_callback
+
+    def set_memory_budget(self, budget: MemoryBudget | None) -> None:
+        """
+        Функция задаёт бюджет памяти: потоковые операции уменьшают буферы, а чтение целиком отказывает заранее
+        :param budget: бюджет памяти (None - без ограничения)
+        :return: функция ничего не возвращает
+        """
+        self._memory_budget = budget
+
+    def _start_progress(self, operation: str, bytes_total: int | None = None, files_total: int | None = None) -> ProgressTracker:
+        """
+        Функция создаёт счётчик прогресса операции, отправляющий события текущему подписчику
+        :param operation: название операции
+        :param bytes_total: общий объём в байтах, если известен
+        :param files_total: общее количество файлов, если известно
+        :return: счётчик прогресса
+        """
+        return ProgressTracker(operation, self._progress_callback, bytes_total, files_total)
+
     @abstractmethod
     def ls(self, path: PathLike[str] | str, display_mode: FileDisplayMode = FileDisplayMode.simple) -> list[str]:
         ...
 
+    @abstractmethod
+    def ls_iter(self, path: PathLike[str] | str, display_mode: FileDisplayMode = FileDisplayMode.simple) -> Iterator[str]:
+        ...
+
     @abstractmethod
     def format_long(self, entry: PathLike[str] | str) -> str:
         ...
@@ -17,6 +67,10 @@ class OSConsoleServiceBase(ABC):
     def cat(self, filename: PathLike | str, mode: Literal[FileReadMode.string, FileReadMode.bytes] = FileReadMode.string)->str | bytes:
         ...
 
+    @abstractmethod
+    def cat_stream(self, filename: PathLike | str, mode: Literal[FileReadMode.string, FileReadMode.bytes] = FileReadMode.string) -> Iterator[str | bytes]:
+        ...
+
     @abstractmethod
     def cd(self, path: PathLike[str] | str)->str:
         ...
@@ -30,25 +84,65 @@ class OSConsoleServiceBase(ABC):
         ...
 
     @abstractmethod
-    def rm(self, target: PathLike[str] | str, recursive: bool = False) -> None:
+    def rename(self, expression: str, paths: list[PathLike[str] | str], dry_run: bool = False) -> list[tuple[Path, Path]]:
+        ...
+
+    @abstractmethod
+    def rm(self, target: PathLike[str] | str, recursive: bool = False, workers: int | None = None, defer: bool = False) -> None:
+        ...
+
+    @abstractmethod
+    def trash_list(self) -> list[TrashEntry]:
+        ...
+
+    @abstractmethod
+    def restore(self, entry_id: str) -> Path:
         ...
 
     @abstractmethod
-    def zip(self, path: PathLike[str] | str, path_arch: PathLike[str] | str) -> None:
+    def purge(self, older_than: float = 0.0, pause: float = 0.0, workers: int | None = 1) -> int:
         ...
 
     @abstractmethod
-    def unzip(self, path_arch: PathLike[str] | str, res: PathLike[str] | str | None = None) -> None:
+    def zip(self, path: PathLike[str] | str, path_arch: PathLike[str] | str, workers: int = 1, method: ZipMethod = ZipMethod.deflate, level: int | None = None, update: bool = False, checksums: bool = False) -> None:
         ...
 
     @abstractmethod
-    def tar_dir(self, path_file: PathLike[str] | str, path_arch: PathLike[str] | str) -> None:
+    def unzip(self, path_arch: PathLike[str] | str, res: PathLike[str] | str | None = None, workers: int = 1, members: list[str] | None = None) -> None:
         ...
 
     @abstractmethod
-    def untar(self, path_archive_tar_gz: PathLike[str] | str, res: PathLike[str] | str | None = None) -> None:
+    def tar_dir(self, path_file: PathLike[str] | str, path_arch: PathLike[str] | str, index: bool = False, workers: int = 1, codec: TarCodec | None = None, level: int | None = None, incremental: PathLike[str] | str | None = None, checksums: bool = False) -> None:
+        ...
+
+    @abstractmethod
+    def tar_index(self, path_arch: PathLike[str] | str) -> Path:
+        ...
+
+    @abstractmethod
+    def untar(self, path_archive_tar_gz: PathLike[str] | str, res: PathLike[str] | str | None = None, members: list[str] | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def untar_chain(self, paths: list[PathLike[str] | str], res: PathLike[str] | str | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def zip_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        ...
+
+    @abstractmethod
+    def tar_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        ...
+
+    @abstractmethod
+    def verify(self, path_arch: PathLike[str] | str, workers: int = 0) -> VerifyReport:
         ...
 
     @abstractmethod
     def grep(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> list[str]:
         ...
+
+    @abstractmethod
+    def grep_iter(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> Iterator[str]:
+        ...
@@ -0,0 +1,28 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Функция возвращает модуль, который будет загружен при первом обращении к его атрибуту. Тяжёлые модули
+    (zipfile, tarfile, lzma, сервисы архивов) нужны не каждой команде, поэтому их загрузка не должна
+    замедлять запуск ls или cd
+    :param name: полное имя модуля
+    :return: модуль (уже загруженный или отложенный)
+    :raises ModuleNotFoundError: если модуль не найден
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
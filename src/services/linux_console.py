@@ -0,0 +1,221 @@
+import errno
+import os
+import shutil
+import stat as stat_module
+from collections.abc import Iterator
+from os import PathLike
+from pathlib import Path
+from typing import BinaryIO
+
+from src.enums import FileDisplayMode
+from src.services.memory import CHECK_EVERY
+from src.services.windows_console import WindowsConsoleService
+
+O_NOATIME = getattr(os, "O_NOATIME", 0)
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0)
+_DIR_FLAGS = _READ_FLAGS | getattr(os, "O_DIRECTORY", 0)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+
+# ошибки copy_file_range, после которых файл копируется обычным способом: старое ядро, копирование между
+# файловыми системами до Linux 5.3, файловые системы без поддержки (например, /proc и некоторые FUSE)
+_COPY_RANGE_FALLBACK = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM}
+COPY_RANGE_CHUNK = 64 * 1024 * 1024
+
+
+def open_noatime(path: PathLike[str] | str, dir_fd: int | None = None) -> int:
+    """
+    Функция открывает файл на чтение без обновления времени доступа (O_NOATIME): чтение не порождает запись
+    метаданных. O_NOATIME разрешён только владельцу файла, для чужих файлов он открывается обычным образом
+    :param path: путь к файлу (при dir_fd - имя относительно каталога)
+    :param dir_fd: дескриптор каталога (None - путь как есть)
+    :return: файловый дескриптор
+    """
+    if O_NOATIME:
+        try:
+            return os.open(path, _READ_FLAGS | O_NOATIME, dir_fd=dir_fd)
+        except PermissionError:
+            pass
+    return os.open(path, _READ_FLAGS, dir_fd=dir_fd)
+
+
+def advise_sequential(fd: int) -> None:
+    """
+    Функция сообщает ядру, что файл будет прочитан последовательно (POSIX_FADV_SEQUENTIAL): ядро увеличивает
+    упреждающее чтение. Ошибки (канал, файловая система без поддержки) игнорируются - это только подсказка
+    :param fd: файловый дескриптор
+    :return: функция ничего не возвращает
+    """
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except OSError:
+        pass
+
+
+# те же команды, что и у WindowsConsoleService, но горячие пути используют возможности ядра Linux
+class LinuxConsoleService(WindowsConsoleService):
+    def _open_sequential(self, path: PathLike[str] | str, dir_fd: int | None = None) -> BinaryIO:
+        """
+        Функция открывает файл для последовательного чтения с O_NOATIME и POSIX_FADV_SEQUENTIAL
+        :param path: путь к файлу (при dir_fd - имя относительно каталога)
+        :param dir_fd: дескриптор каталога (None - путь как есть)
+        :return: двоичный файловый объект
+        """
+        fd = open_noatime(path, dir_fd)
+        try:
+            advise_sequential(fd)
+            return os.fdopen(fd, "rb")
+        except BaseException:
+            os.close(fd)
+            raise
+
+
+    def _copy_file(self, src: PathLike[str] | str, dst: PathLike[str] | str) -> str:
+        """
+        Функция копирует один файл вместе с метаданными через copy_file_range: данные не проходят через память
+        процесса, а на btrfs/XFS и NFS копия может быть создана без чтения данных (reflink, копирование на сервере).
+        Прогресс и ограничитель учитываются по блокам; если ядро или файловая система не поддерживают
+        copy_file_range, используется обычное копирование
+        :param src: путь к исходному файлу
+        :param dst: путь к файлу или каталогу назначения
+        :return: путь к созданному файлу
+        """
+        if os.path.islink(src) or not hasattr(os, "copy_file_range"):
+            return super()._copy_file(src, dst)
+
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+        src_fd = open_noatime(src)
+        try:
+            src_stat = os.fstat(src_fd)
+            if not stat_module.S_ISREG(src_stat.st_mode):
+                return super()._copy_file(src, dst)
+            advise_sequential(src_fd)
+            dst_fd = os.open(dst, _WRITE_FLAGS, 0o666)
+            try:
+                copied = self._copy_range(src_fd, dst_fd)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+
+        if copied is None:
+            return super()._copy_file(src, dst)
+        shutil.copystat(src, dst)
+        self._advance(0, 1, str(src))
+        return str(dst)
+
+
+    def _copy_range(self, src_fd: int, dst_fd: int) -> int | None:
+        """
+        Функция копирует содержимое файла внутри ядра блоками (с ограничителем - блоками буфера копирования)
+        :param src_fd: дескриптор источника
+        :param dst_fd: дескриптор назначения
+        :return: количество скопированных байт или None, если copy_file_range не поддерживается и ничего не скопировано
+        """
+        chunk = COPY_RANGE_CHUNK if self._limiter is None else self._buffer_size(self.COPY_BUFSIZE)
+        total = 0
+        while True:
+            try:
+                n = os.copy_file_range(src_fd, dst_fd, chunk)
+            except OSError as e:
+                if total == 0 and e.errno in _COPY_RANGE_FALLBACK:
+                    self._logger.debug("cp: copy_file_range недоступен (%s), обычное копирование", e)
+                    return None
+                raise
+            if n == 0:
+                return total
+            if self._limiter is not None:
+                self._limiter.io(n)
+            total += n
+            self._advance(n)
+
+
+    def _ls_lines(self, path: Path, mode: FileDisplayMode) -> Iterator[str]:
+        """
+        Функция формирует строки ls по одной, читая каталог через os.scandir по его дескриптору: для ls -l
+        stat выполняется относительно каталога (fstatat), а тип элемента берётся из stat без отдельного вызова
+        :param path: директория
+        :param mode: режим отображения
+        :return: итератор по строкам
+        """
+        fd = os.open(path, _DIR_FLAGS)
+        try:
+            with os.scandir(fd) as it:
+                for count, entry in enumerate(it, 1):
+                    if count % CHECK_EVERY == 0:
+                        self._check_memory("ls")
+                    if mode == FileDisplayMode.simple:
+                        yield entry.name + "\n"
+                        continue
+                    try:
+                        stat_info = entry.stat()
+                    except OSError:
+                        yield self.format_long(path / entry.name)
+                        continue
+                    yield self._format_stat(entry.name, stat_info, stat_module.S_ISDIR(stat_info.st_mode))
+        finally:
+            os.close(fd)
+
+
+    def _grep_files(self, base: Path, r: bool) -> Iterator[tuple[Path, int | None]]:
+        """
+        Функция перечисляет файлы для grep через os.scandir по дескрипторам каталогов: тип элемента берётся
+        из записи каталога (d_type) без stat, подкаталоги открываются относительно родителя, а файл затем
+        открывается относительно дескриптора своего каталога. Символические ссылки на каталоги не обходятся.
+        Недоступные каталоги пропускаются с предупреждением в логе, а нехватка дескрипторов (EMFILE/ENFILE) - ошибка
+        :param base: файл или каталог
+        :param r: True/False (рекурсивный обход подкаталогов/нет)
+        :return: итератор по парам (путь к файлу, дескриптор его каталога)
+        :raises OSError: если у процесса или системы закончились файловые дескрипторы
+        """
+        if base.is_file():
+            yield base, None
+            return
+        try:
+            fd = os.open(base, _DIR_FLAGS)
+        except OSError as e:
+            self._skip_grep_dir(base, e)
+            return
+        stack = [(base, fd, os.scandir(fd))]
+        try:
+            while stack:
+                dir_path, dir_fd, it = stack[-1]
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not r:
+                            continue
+                        try:
+                            child_fd = os.open(entry.name, _DIR_FLAGS | getattr(os, "O_NOFOLLOW", 0), dir_fd=dir_fd)
+                        except OSError as e:
+                            self._skip_grep_dir(dir_path / entry.name, e)
+                            continue
+                        stack.append((dir_path / entry.name, child_fd, os.scandir(child_fd)))
+                        break
+                    if entry.is_file():
+                        yield dir_path / entry.name, dir_fd
+                else:
+                    stack.pop()
+                    it.close()
+                    os.close(dir_fd)
+        finally:
+            for _, dir_fd, it in stack:
+                it.close()
+                os.close(dir_fd)
+
+
+    def _skip_grep_dir(self, path: Path, error: OSError) -> None:
+        """
+        Функция записывает в лог каталог, который grep не смог открыть. Нехватка файловых дескрипторов не означает,
+        что каталог недоступен, поэтому такая ошибка пробрасывается дальше
+        :param path: путь к каталогу
+        :param error: ошибка открытия
+        :return: функция ничего не возвращает
+        :raises OSError: при EMFILE/ENFILE
+        """
+        if error.errno in (errno.EMFILE, errno.ENFILE):
+            self._logger.error("grep: Не хватает файловых дескрипторов для каталога %s: %s", path, error)
+            raise error
+        self._logger.warning("grep: Пропущен каталог %s: %s", path, error)
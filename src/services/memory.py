@@ -0,0 +1,107 @@
+import os
+import sys
+from typing import TextIO
+
+from src.services.progress import format_size
+
+MIN_BUFFER_SIZE = 64 * 1024
+BUFFER_SHARE = 16
+CHECK_EVERY = 4096
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+def current_rss() -> int | None:
+    """
+    Функция возвращает текущий объём резидентной памяти процесса из /proc/self/statm (Linux)
+    :return: RSS в байтах или None, если /proc недоступен
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> int | None:
+    """
+    Функция возвращает пиковый объём резидентной памяти процесса с момента запуска
+    :return: пиковый RSS в байтах или None, если модуль resource недоступен (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    def __init__(self, limit: int) -> None:
+        """
+        Функция инициализирует бюджет памяти процесса. Потоковые операции берут буфер не больше 1/BUFFER_SHARE
+        бюджета, а операции, которым нужно держать данные целиком, отказываются заранее, если они не поместятся
+        :param limit: предельный RSS процесса в байтах
+        :return: функция ничего не возвращает
+        """
+        self.limit = limit
+
+    def buffer_size(self, default: int) -> int:
+        """
+        Функция уменьшает размер буфера под бюджет
+        :param default: размер буфера без ограничения
+        :return: размер буфера (не меньше MIN_BUFFER_SIZE)
+        """
+        return max(MIN_BUFFER_SIZE, min(default, self.limit // BUFFER_SHARE))
+
+    def check(self, operation: str) -> None:
+        """
+        Функция проверяет, что текущий RSS процесса не превышает бюджет
+        :param operation: название операции для сообщения об ошибке
+        :return: функция ничего не возвращает
+        :raises MemoryBudgetExceeded: если бюджет превышен
+        """
+        rss = current_rss()
+        if rss is not None and rss > self.limit:
+            raise MemoryBudgetExceeded(f"{operation}: Превышен бюджет памяти {format_size(self.limit)} (RSS {format_size(rss)})")
+
+    def reserve(self, operation: str, nbytes: int) -> None:
+        """
+        Функция проверяет до начала операции, поместятся ли nbytes в оставшийся бюджет
+        :param operation: название операции для сообщения об ошибке
+        :param nbytes: сколько памяти понадобится операции
+        :return: функция ничего не возвращает
+        :raises MemoryBudgetExceeded: если данные не помещаются в бюджет
+        """
+        available = self.limit - (current_rss() or 0)
+        if nbytes > available:
+            raise MemoryBudgetExceeded(f"{operation}: Нужно {format_size(nbytes)}, а в бюджете {format_size(self.limit)} "
+                                       f"свободно {format_size(max(available, 0))}; используйте потоковый режим")
+
+
+class MemoryReport:
+    def __init__(self) -> None:
+        """
+        Функция запускает tracemalloc (замедляет выделение памяти, поэтому включается только по --mem-report)
+        :return: функция ничего не возвращает
+        """
+        import tracemalloc
+
+        tracemalloc.start()
+
+    def report(self, stream: TextIO | None = None) -> None:
+        """
+        Функция выводит в stderr пик памяти, выделенной Python (tracemalloc), и пиковый RSS процесса
+        :param stream: поток вывода (по умолчанию sys.stderr)
+        :return: функция ничего не возвращает
+        """
+        import tracemalloc
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss = peak_rss()
+        stream = stream or sys.stderr
+        stream.write(f"mem: пик tracemalloc {format_size(peak)}, пик RSS {format_size(rss) if rss is not None else '-'}\n")
+        stream.flush()
@@ -0,0 +1,145 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+
+_MAX_SPLIT_DEPTH = 8
+
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0)
+
+
+def fd_ops_supported() -> bool:
+    """
+    Функция проверяет, поддерживает ли платформа операции относительно дескриптора каталога (dir_fd)
+    :return: True/False (можно использовать параллельное удаление/нет)
+    """
+    return (
+        os.unlink in os.supports_dir_fd
+        and os.rmdir in os.supports_dir_fd
+        and os.open in os.supports_dir_fd
+        and os.scandir in os.supports_fd
+    )
+
+
+def _open_dir(name: str, dir_fd: int) -> int:
+    """
+    Функция открывает подкаталог относительно дескриптора родителя, не следуя по символическим ссылкам
+    :param name: имя подкаталога
+    :param dir_fd: дескриптор родительского каталога
+    :return: дескриптор открытого подкаталога
+    """
+    return os.open(name, _DIR_FLAGS, dir_fd=dir_fd)
+
+
+def _clear_files(dir_fd: int, on_remove: Callable[[], None] | None = None) -> tuple[list[str], int]:
+    """
+    Функция удаляет файлы каталога и возвращает имена его подкаталогов. Содержимое читается целиком до первого
+    unlink (как shutil.rmtree), чтобы не менять каталог, пока по нему идёт итератор os.scandir
+    :param dir_fd: дескриптор каталога
+    :param on_remove: функция, вызываемая перед каждым unlink (например, ограничитель ввода-вывода)
+    :return: имена подкаталогов и количество удалённых файлов
+    """
+    with os.scandir(dir_fd) as it:
+        entries = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+    subdirs = []
+    removed = 0
+    for name, is_dir in entries:
+        if is_dir:
+            subdirs.append(name)
+            continue
+        if on_remove is not None:
+            on_remove()
+        os.unlink(name, dir_fd=dir_fd)
+        removed += 1
+    return subdirs, removed
+
+
+def _rmtree_at(parent_fd: int, name: str, on_remove: Callable[[], None] | None = None) -> int:
+    """
+    Функция последовательно удаляет поддерево name внутри каталога parent_fd, используя только относительные имена
+    (явный стек вместо рекурсии). На каждый уровень вложенности открыт один дескриптор каталога, поэтому, как
+    и у shutil.rmtree, глубина дерева ограничена лимитом открытых файлов (RLIMIT_NOFILE, при превышении - EMFILE)
+    :param parent_fd: дескриптор родительского каталога
+    :param name: имя удаляемого каталога
+    :param on_remove: функция, вызываемая перед каждым unlink/rmdir (например, ограничитель ввода-вывода)
+    :return: количество удалённых элементов
+    """
+    removed = 0
+    stack: list[tuple[str, int, list[str]]] = []
+
+    def enter(d_name: str, p_fd: int) -> None:
+        nonlocal removed
+        d_fd = _open_dir(d_name, p_fd)
+        pending: list[str] = []
+        stack.append((d_name, d_fd, pending))
+        subdirs, count = _clear_files(d_fd, on_remove)
+        pending.extend(subdirs)
+        removed += count
+
+    try:
+        enter(name, parent_fd)
+        while stack:
+            d_name, d_fd, pending = stack[-1]
+            if pending:
+                enter(pending.pop(), d_fd)
+                continue
+            stack.pop()
+            os.close(d_fd)
+            if on_remove is not None:
+                on_remove()
+            os.rmdir(d_name, dir_fd=stack[-1][1] if stack else parent_fd)
+            removed += 1
+    finally:
+        for _, d_fd, _ in stack:
+            os.close(d_fd)
+    return removed
+
+
+def parallel_rmtree(path: PathLike[str] | str, workers: int | None = None, on_remove: Callable[[], None] | None = None) -> int:
+    """
+    Функция удаляет дерево каталогов параллельно: верхние уровни раскрываются в текущем потоке, пока не наберётся
+    достаточно независимых поддеревьев, затем поддеревья-соседи удаляются в пуле потоков.
+    Все операции выполняются через os.scandir и dir_fd, полные пути к файлам не строятся
+    :param path: путь к удаляемому каталогу
+    :param workers: количество потоков (по умолчанию os.cpu_count())
+    :param on_remove: функция, вызываемая перед каждым unlink/rmdir (например, ограничитель ввода-вывода)
+    :return: количество удалённых элементов
+    """
+    path = Path(path)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    root_parent_fd = os.open(path.parent, _DIR_FLAGS & ~getattr(os, "O_NOFOLLOW", 0))
+    opened: list[tuple[int, str, int]] = []
+    removed = 0
+    try:
+        frontier: list[tuple[int, str]] = [(root_parent_fd, path.name)]
+        depth = 0
+        while frontier and (depth == 0 or len(frontier) < workers * 4) and depth < _MAX_SPLIT_DEPTH:
+            depth += 1
+            next_frontier: list[tuple[int, str]] = []
+            for parent_fd, name in frontier:
+                fd = _open_dir(name, parent_fd)
+                opened.append((parent_fd, name, fd))
+                subdirs, count = _clear_files(fd, on_remove)
+                next_frontier.extend((fd, subdir) for subdir in subdirs)
+                removed += count
+            frontier = next_frontier
+
+        if frontier:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for count in pool.map(lambda task: _rmtree_at(task[0], task[1], on_remove), frontier):
+                    removed += count
+
+        while opened:
+            parent_fd, name, fd = opened.pop()
+            os.close(fd)
+            if on_remove is not None:
+                on_remove()
+            os.rmdir(name, dir_fd=parent_fd)
+            removed += 1
+    finally:
+        for _, _, fd in opened:
+            os.close(fd)
+        os.close(root_parent_fd)
+    return removed
@@ -0,0 +1,185 @@
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any, TextIO
+
+
+@dataclass
+class ProgressEvent:
+    operation: str
+    bytes_done: int
+    files_done: int
+    current_file: str | None
+    rate: float
+    elapsed: float
+    bytes_total: int | None = None
+    files_total: int | None = None
+    finished: bool = False
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Функция оценивает оставшееся время по средней скорости
+        :return: оставшееся время в секундах или None, если общий объём неизвестен
+        """
+        if self.bytes_total is None or self.rate <= 0:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_done) / self.rate)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Функция представляет событие в виде словаря для машинно-читаемой статистики
+        :return: словарь с полями события и оценкой оставшегося времени
+        """
+        result = asdict(self)
+        result["eta"] = self.eta
+        return result
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressTracker:
+    def __init__(self, operation: str, callback: ProgressCallback | None, bytes_total: int | None = None, files_total: int | None = None, min_interval: float = 0.1) -> None:
+        """
+        Функция инициализирует счётчик прогресса одной операции. События отправляются в callback не чаще,
+        чем раз в min_interval секунд, чтобы не замедлять горячие циклы
+        :param operation: название операции (cp, mv, zip, ...)
+        :param callback: получатель событий (None - только подсчёт)
+        :param bytes_total: общий объём данных в байтах, если известен
+        :param files_total: общее количество файлов, если известно
+        :param min_interval: минимальный интервал между событиями в секундах
+        :return: функция ничего не возвращает
+        """
+        self.operation = operation
+        self.bytes_total = bytes_total
+        self.files_total = files_total
+        self.bytes_done = 0
+        self.files_done = 0
+        self.current_file: str | None = None
+        self._callback = callback
+        self._min_interval = min_interval
+        self._start = time.perf_counter()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def event(self, finished: bool = False) -> ProgressEvent:
+        """
+        Функция формирует снимок текущего состояния
+        :param finished: True/False (операция завершена/нет)
+        :return: событие прогресса
+        """
+        elapsed = time.perf_counter() - self._start
+        rate = self.bytes_done / elapsed if elapsed > 0 else 0.0
+        return ProgressEvent(self.operation, self.bytes_done, self.files_done, self.current_file, rate, elapsed, self.bytes_total, self.files_total, finished)
+
+    def advance(self, nbytes: int = 0, files: int = 0, current: str | None = None) -> None:
+        """
+        Функция учитывает обработанные данные и при необходимости отправляет событие
+        :param nbytes: количество обработанных байт
+        :param files: количество обработанных файлов
+        :param current: текущий файл
+        :return: функция ничего не возвращает
+        """
+        with self._lock:
+            self.bytes_done += nbytes
+            self.files_done += files
+            if current is not None:
+                self.current_file = current
+            if self._callback is None:
+                return
+            now = time.perf_counter()
+            if now - self._last_emit < self._min_interval:
+                return
+            self._last_emit = now
+            event = self.event()
+        self._callback(event)
+
+    def finish(self) -> ProgressEvent:
+        """
+        Функция завершает операцию и отправляет итоговое событие
+        :return: итоговое событие
+        """
+        event = self.event(finished=True)
+        if self._callback is not None:
+            self._callback(event)
+        return event
+
+
+def format_size(value: float) -> str:
+    """
+    Функция форматирует количество байт в удобочитаемый вид
+    :param value: количество байт
+    :return: строка вида '12.3 MB'
+    """
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(value) < 1024 or unit == "TB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def format_duration(seconds: float | None) -> str:
+    """
+    Функция форматирует длительность в виде ЧЧ:ММ:СС
+    :param seconds: длительность в секундах или None
+    :return: строка с длительностью или '--:--'
+    """
+    if seconds is None:
+        return "--:--"
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours:d}:{minutes:02d}:{sec:02d}"
+    return f"{minutes:02d}:{sec:02d}"
+
+
+class ProgressPrinter:
+    def __init__(self, stream: TextIO | None = None) -> None:
+        """
+        Функция инициализирует вывод прогресса одной строкой (перерисовывается через '\\r') в stderr
+        :param stream: поток вывода (по умолчанию sys.stderr)
+        :return: функция ничего не возвращает
+        """
+        self._stream = stream or sys.stderr
+
+    def __call__(self, event: ProgressEvent) -> None:
+        """
+        Функция отображает событие прогресса: объём, процент, скорость, ETA и текущий файл
+        :param event: событие прогресса
+        :return: функция ничего не возвращает
+        """
+        done = format_size(event.bytes_done)
+        if event.bytes_total:
+            percent = min(100.0, event.bytes_done * 100 / event.bytes_total)
+            done = f"{done} / {format_size(event.bytes_total)} ({percent:5.1f}%)"
+        files = f"{event.files_done}" if event.files_total is None else f"{event.files_done}/{event.files_total}"
+        line = f"{event.operation}: {done} {format_size(event.rate)}/s ETA {format_duration(event.eta)} файлов: {files}"
+        if event.current_file and not event.finished:
+            line = f"{line} {event.current_file}"
+        self._stream.write(f"\r\033[K{line}")
+        if event.finished:
+            self._stream.write("\n")
+        self._stream.flush()
+
+
+class ProgressStats:
+    def __init__(self) -> None:
+        """
+        Функция инициализирует сборщик итоговой статистики по завершённым операциям (для --stats-json)
+        :return: функция ничего не возвращает
+        """
+        self.operations: list[dict[str, Any]] = []
+
+    def __call__(self, event: ProgressEvent) -> None:
+        """
+        Функция запоминает итоговые события операций
+        :param event: событие прогресса
+        :return: функция ничего не возвращает
+        """
+        if event.finished:
+            summary = event.to_dict()
+            del summary["current_file"], summary["finished"], summary["eta"]
+            self.operations.append(summary)
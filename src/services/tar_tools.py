@@ -0,0 +1,554 @@
+import bisect
+import bz2
+import contextlib
+import gzip
+import io
+import json
+import lzma
+import os
+import stat
+import tarfile
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from os import PathLike
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO, Self, cast
+
+from src.enums import TarCodec
+
+BLOCK_SIZE = 1024 * 1024
+READ_SIZE = 1024 * 1024
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+SNAPSHOT_VERSION = 1
+INCREMENTAL_MANIFEST = ".tar-incremental.json"
+
+CODEC_SUFFIXES = {
+    TarCodec.gz: (".tar.gz", ".tgz"),
+    TarCodec.bz2: (".tar.bz2", ".tbz2", ".tbz"),
+    TarCodec.xz: (".tar.xz", ".txz"),
+    TarCodec.none: (".tar",),
+}
+
+
+def codec_from_name(path: PathLike[str] | str) -> TarCodec:
+    """
+    Функция определяет способ сжатия tar-архива по расширению имени файла
+    :param path: путь к архиву
+    :return: способ сжатия (gz, если расширение не распознано)
+    """
+    name = os.fspath(path).lower()
+    for codec, suffixes in CODEC_SUFFIXES.items():
+        if name.endswith(suffixes):
+            return codec
+    return TarCodec.gz
+
+
+def open_kwargs(codec: TarCodec, level: int | None) -> dict[str, Any]:
+    """
+    Функция формирует параметры уровня сжатия для tarfile.open
+    :param codec: способ сжатия (кроме gz, который пишет BlockGzipWriter)
+    :param level: уровень сжатия 0-9 (None - по умолчанию)
+    :return: именованные параметры для tarfile.open
+    """
+    if level is None or codec == TarCodec.none:
+        return {}
+    if codec == TarCodec.bz2:
+        return {"compresslevel": max(level, 1)}
+    if codec == TarCodec.xz:
+        return {"preset": level}
+    return {"compresslevel": level}
+
+
+def open_compressed_stream(fileobj: BinaryIO, codec: TarCodec, level: int | None) -> contextlib.AbstractContextManager[BinaryIO]:
+    """
+    Функция оборачивает поток (например, stdout) в сжимающий файловый объект для записи tar-архива в режиме 'w|'.
+    Закрытие обёртки дописывает хвост сжатого потока, но сам поток не закрывает
+    :param fileobj: поток для записи
+    :param codec: способ сжатия (кроме gz, который пишет BlockGzipWriter)
+    :param level: уровень сжатия 0-9 (None - по умолчанию)
+    :return: контекстный менеджер со сжимающим файловым объектом
+    """
+    kwargs = open_kwargs(codec, level)
+    if codec == TarCodec.bz2:
+        return cast(contextlib.AbstractContextManager[BinaryIO], bz2.BZ2File(fileobj, "wb", **kwargs))
+    if codec == TarCodec.xz:
+        return cast(contextlib.AbstractContextManager[BinaryIO], lzma.LZMAFile(fileobj, "wb", **kwargs))
+    return contextlib.nullcontext(fileobj)
+
+
+def open_decompressed_stream(fileobj: BinaryIO, codec: TarCodec) -> contextlib.AbstractContextManager[BinaryIO]:
+    """
+    Функция оборачивает поток в распаковывающий файловый объект для чтения tar-архива в режиме 'r|'.
+    Закрытие обёртки сам поток не закрывает
+    :param fileobj: поток для чтения
+    :param codec: способ сжатия
+    :return: контекстный менеджер с распаковывающим файловым объектом
+    """
+    if codec == TarCodec.gz:
+        return cast(contextlib.AbstractContextManager[BinaryIO], gzip.GzipFile(fileobj=fileobj, mode="rb"))
+    if codec == TarCodec.bz2:
+        return cast(contextlib.AbstractContextManager[BinaryIO], bz2.BZ2File(fileobj, "rb"))
+    if codec == TarCodec.xz:
+        return cast(contextlib.AbstractContextManager[BinaryIO], lzma.LZMAFile(fileobj, "rb"))
+    return contextlib.nullcontext(fileobj)
+
+
+class _PrefixedReader:
+    def __init__(self, head: bytes, fileobj: BinaryIO) -> None:
+        """
+        Функция инициализирует чтение потока, из которого уже прочитано начало (для определения сжатия)
+        :param head: уже прочитанные байты
+        :param fileobj: поток
+        :return: функция ничего не возвращает
+        """
+        self._head = head
+        self._fileobj = fileobj
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Функция читает сначала сохранённое начало, затем сам поток
+        :param size: количество байт (-1 - до конца)
+        :return: прочитанные байты
+        """
+        if not self._head:
+            return self._fileobj.read(size)
+        if size < 0:
+            data, self._head = self._head + self._fileobj.read(), b""
+            return data
+        data, self._head = self._head[:size], self._head[size:]
+        return data
+
+
+STREAM_MAGIC = (
+    (b"\x1f\x8b", TarCodec.gz),
+    (b"BZh", TarCodec.bz2),
+    (b"\xfd7zXZ\x00", TarCodec.xz),
+)
+
+
+@contextlib.contextmanager
+def open_stream(fileobj: BinaryIO) -> Iterator[tarfile.TarFile]:
+    """
+    Функция открывает tar-архив из потока без перемотки (как 'r|*'), определяя сжатие по первым байтам.
+    В отличие от 'r|gz', gzip распаковывается через GzipFile: читаются все gzip-члены блочного архива
+    и проверяется их CRC-32 (bz2 и xz из нескольких потоков тоже читаются целиком). После работы с архивом
+    поток дочитывается до конца: так проверяется и хвост сжатых данных после конца tar, а пишущий в конвейер
+    процесс не получает SIGPIPE
+    :param fileobj: поток архива
+    :return: контекстный менеджер с tar-архивом, открытым в режиме 'r|'
+    """
+    head = b""
+    while len(head) < 6:
+        data = fileobj.read(6 - len(head))
+        if not data:
+            break
+        head += data
+    reader = _PrefixedReader(head, fileobj)
+    for magic, codec in STREAM_MAGIC:
+        if head.startswith(magic):
+            with open_decompressed_stream(cast(BinaryIO, reader), codec) as raw:
+                with tarfile.open(fileobj=raw, mode="r|") as tf:
+                    yield tf
+                while raw.read(READ_SIZE):
+                    pass
+            return
+    with tarfile.open(fileobj=cast(BinaryIO, reader), mode="r|") as tf:
+        yield tf
+    while reader.read(READ_SIZE):
+        pass
+
+
+@dataclass
+class TarIndex:
+    checkpoints: list[tuple[int, int]]
+    members: list[tuple[str, int, bool]]
+    archive_size: int
+    archive_mtime_ns: int
+
+    def checkpoint_for(self, offset: int) -> tuple[int, int]:
+        """
+        Функция находит ближайшую контрольную точку не дальше заданной позиции распакованного потока
+        :param offset: позиция в распакованном tar-потоке
+        :return: пара (позиция в распакованном потоке, позиция в сжатом файле)
+        """
+        i = bisect.bisect_right([u for u, _ in self.checkpoints], offset) - 1
+        return self.checkpoints[max(i, 0)]
+
+
+def compress_block(block: bytes, level: int) -> bytes:
+    """
+    Функция сжимает блок в отдельный gzip-член (выполняется в процессе пула). Время в заголовке не записывается,
+    чтобы одинаковые данные давали одинаковый архив
+    :param block: несжатые данные
+    :param level: уровень сжатия 0-9
+    :return: gzip-член
+    """
+    return gzip.compress(block, level, mtime=0)
+
+
+class BlockGzipWriter:
+    def __init__(self, fileobj: BinaryIO, level: int = 9, block_size: int | None = None, name: str | None = None, workers: int = 1) -> None:
+        """
+        Функция инициализирует запись потока в формате «блочного» gzip: данные делятся на блоки по block_size байт,
+        и каждый блок сжимается в отдельный gzip-член. Такой файл читают gunzip и tarfile, а начало каждого члена -
+        место, с которого можно начать распаковку без чтения предыдущих данных (контрольная точка индекса).
+        Блоки независимы, поэтому при workers != 1 они сжимаются в пуле процессов (как pigz) и записываются по порядку;
+        одновременно в работе не больше workers * 2 блоков
+        :param fileobj: файл, открытый на запись в двоичном режиме
+        :param level: уровень сжатия 0-9
+        :param block_size: размер несжатого блока в байтах (по умолчанию BLOCK_SIZE)
+        :param name: имя файла (tarfile использует его, чтобы не добавить архив в самого себя)
+        :param workers: количество процессов для сжатия (1 - в текущем процессе, 0 - по числу ядер)
+        :return: функция ничего не возвращает
+        """
+        self.name = name
+        self.checkpoints: list[tuple[int, int]] = []
+        self._fileobj = fileobj
+        self._level = level
+        self._block_size = block_size or BLOCK_SIZE
+        self._buffer = bytearray()
+        self._pos = 0
+        self._compressed_pos = 0
+        self._closed = False
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: deque[tuple[int, Future[bytes]]] = deque()
+        self._max_pending = 0
+        if workers != 1:
+            workers = workers or os.cpu_count() or 1
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            self._max_pending = workers * 2
+
+    def write(self, data: Any) -> int:
+        self._buffer += data
+        self._pos += len(data)
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[: self._block_size])
+            del self._buffer[: self._block_size]
+            self._write_block(self._pos - len(self._buffer) - len(block), block)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def _write_block(self, start: int, block: bytes) -> None:
+        """
+        Функция сжимает блок в отдельный gzip-член и записывает его
+        :param start: позиция начала блока в несжатом потоке
+        :param block: несжатые данные блока
+        :return: функция ничего не возвращает
+        """
+        if self._pool is None:
+            self._emit(start, compress_block(block, self._level))
+            return
+        self._pending.append((start, self._pool.submit(compress_block, block, self._level)))
+        while len(self._pending) >= self._max_pending:
+            self._emit_next()
+
+    def _emit_next(self) -> None:
+        """
+        Функция дожидается сжатия самого старого блока из пула и записывает его
+        :return: функция ничего не возвращает
+        """
+        start, future = self._pending.popleft()
+        self._emit(start, future.result())
+
+    def _emit(self, start: int, member: bytes) -> None:
+        """
+        Функция записывает сжатый gzip-член в файл и запоминает контрольную точку
+        :param start: позиция начала блока в несжатом потоке
+        :param member: сжатые данные
+        :return: функция ничего не возвращает
+        """
+        self.checkpoints.append((start, self._compressed_pos))
+        self._fileobj.write(member)
+        self._compressed_pos += len(member)
+
+    def close(self) -> None:
+        """
+        Функция сжимает и записывает остаток данных (файл, переданный в конструктор, не закрывается)
+        :return: функция ничего не возвращает
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._buffer or (not self.checkpoints and not self._pending):
+                block = bytes(self._buffer)
+                self._buffer.clear()
+                self._write_block(self._pos - len(block), block)
+            while self._pending:
+                self._emit_next()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self.close()
+
+
+class GzipMemberReader:
+    def __init__(self, fileobj: BinaryIO, span: int | None = None) -> None:
+        """
+        Функция инициализирует последовательное чтение gzip-файла из нескольких членов с запоминанием их границ.
+        Граница члена становится контрольной точкой, если от предыдущей точки распаковано не меньше span байт.
+        Чтение начинается с текущей позиции fileobj, которая должна быть началом gzip-члена
+        :param fileobj: сжатый файл, открытый на чтение
+        :param span: минимальное расстояние между контрольными точками в распакованном потоке (по умолчанию BLOCK_SIZE)
+        :return: функция ничего не возвращает
+        """
+        self.checkpoints: list[tuple[int, int]] = [(0, 0)]
+        self._fileobj = fileobj
+        self._span = span or BLOCK_SIZE
+        self._decompressor = zlib.decompressobj(31)
+        self._member_started = False
+        self._input = b""
+        self._output = b""
+        self._compressed_pos = 0
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        """
+        Функция распаковывает следующую порцию данных (не больше READ_SIZE байт), переходя через границы gzip-членов
+        :return: функция ничего не возвращает
+        """
+        while not self._output and not self._eof:
+            if not self._input:
+                self._input = self._fileobj.read(READ_SIZE)
+                if not self._input:
+                    self._eof = True
+                    if self._member_started:
+                        raise EOFError("Неожиданный конец gzip-файла")
+                    return
+            if not self._member_started:
+                stripped = self._input.lstrip(b"\x00")
+                self._compressed_pos += len(self._input) - len(stripped)
+                self._input = stripped
+                if not stripped:
+                    continue
+                self._member_started = True
+
+            self._output = self._decompressor.decompress(self._input, READ_SIZE)
+            self._pos += len(self._output)
+            if self._decompressor.eof:
+                rest = self._decompressor.unused_data
+                self._compressed_pos += len(self._input) - len(rest)
+                self._input = rest
+                self._decompressor = zlib.decompressobj(31)
+                self._member_started = False
+                if self._pos - self.checkpoints[-1][0] >= self._span:
+                    self.checkpoints.append((self._pos, self._compressed_pos))
+            else:
+                rest = self._decompressor.unconsumed_tail
+                self._compressed_pos += len(self._input) - len(rest)
+                self._input = rest
+
+    def read(self, size: int = -1) -> bytes:
+        parts: list[bytes] = []
+        while size != 0:
+            if not self._output:
+                self._fill()
+                if not self._output:
+                    break
+            take = self._output if size < 0 else self._output[:size]
+            self._output = self._output[len(take):]
+            parts.append(take)
+            if size > 0:
+                size -= len(take)
+        return b"".join(parts)
+
+    def skip(self, size: int) -> None:
+        """
+        Функция пропускает size байт распакованного потока
+        :param size: количество байт
+        :return: функция ничего не возвращает
+        """
+        while size > 0:
+            data = self.read(min(size, READ_SIZE))
+            if not data:
+                raise EOFError("Неожиданный конец gzip-файла")
+            size -= len(data)
+
+
+def index_path(archive: PathLike[str] | str) -> Path:
+    """
+    Функция возвращает путь к файлу индекса архива (archive.tar.gz.idx)
+    :param archive: путь к архиву
+    :return: путь к файлу индекса
+    """
+    return Path(f"{os.fspath(archive)}{INDEX_SUFFIX}")
+
+
+def save_index(archive: PathLike[str] | str, checkpoints: list[tuple[int, int]], members: Iterable[tarfile.TarInfo]) -> Path:
+    """
+    Функция записывает индекс рядом с архивом: контрольные точки распаковки и позиции заголовков элементов
+    в распакованном потоке. Размер и время изменения архива сохраняются, чтобы распознать устаревший индекс
+    :param archive: путь к архиву
+    :param checkpoints: пары (позиция в распакованном потоке, позиция в сжатом файле)
+    :param members: элементы архива (с заполненным offset)
+    :return: путь к файлу индекса
+    """
+    st = os.stat(archive)
+    data = {
+        "version": INDEX_VERSION,
+        "archive_size": st.st_size,
+        "archive_mtime_ns": st.st_mtime_ns,
+        "checkpoints": checkpoints,
+        "members": [(m.name, m.offset, m.isdir()) for m in members],
+    }
+    path = index_path(archive)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def load_index(archive: PathLike[str] | str) -> TarIndex | None:
+    """
+    Функция читает индекс архива
+    :param archive: путь к архиву
+    :return: индекс или None, если его нет, он повреждён или архив изменился после его построения
+    """
+    try:
+        data = json.loads(index_path(archive).read_text(encoding="utf-8"))
+        st = os.stat(archive)
+        if data["version"] != INDEX_VERSION or data["archive_size"] != st.st_size or data["archive_mtime_ns"] != st.st_mtime_ns:
+            return None
+        return TarIndex(
+            [(int(u), int(c)) for u, c in data["checkpoints"]],
+            [(str(name), int(offset), bool(is_dir)) for name, offset, is_dir in data["members"]],
+            st.st_size,
+            st.st_mtime_ns,
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def build_index(fileobj: BinaryIO) -> tuple[list[tuple[int, int]], list[tarfile.TarInfo]]:
+    """
+    Функция строит индекс существующего tar.gz архива за один последовательный проход.
+    Контрольные точки возможны только на границах gzip-членов: у архива из одного gzip-потока (например, созданного
+    обычным tar czf) будет одна точка в начале, и индекс ускорит только поиск нужного элемента
+    :param fileobj: архив, открытый на чтение с начала
+    :return: контрольные точки и элементы архива
+    """
+    reader = GzipMemberReader(fileobj)
+    try:
+        with tarfile.open(fileobj=cast(BinaryIO, reader), mode="r|") as tf:
+            members = list(tf)
+    except zlib.error as e:
+        raise tarfile.ReadError(f"Индекс строится только для tar.gz: {e}") from None
+    return reader.checkpoints, members
+
+
+def open_at(fileobj: BinaryIO, index: TarIndex, offset: int) -> GzipMemberReader:
+    """
+    Функция открывает распакованный tar-поток с заданной позиции, начиная распаковку с ближайшей контрольной точки
+    :param fileobj: архив, открытый на чтение с произвольным доступом
+    :param index: индекс архива
+    :param offset: позиция заголовка элемента в распакованном потоке
+    :return: поток, читающий tar с позиции offset
+    """
+    start, compressed = index.checkpoint_for(offset)
+    fileobj.seek(compressed)
+    reader = GzipMemberReader(fileobj)
+    reader.skip(offset - start)
+    return reader
+
+
+def snapshot_entry(st: os.stat_result) -> list[int]:
+    """
+    Функция формирует запись снимка для инкрементального архива: по ней определяется, изменился ли файл
+    :param st: результат lstat файла
+    :return: [inode, время изменения в нс, размер, признак каталога]
+    """
+    return [st.st_ino, st.st_mtime_ns, st.st_size, int(stat.S_ISDIR(st.st_mode))]
+
+
+def load_snapshot(path: PathLike[str] | str) -> dict[str, list[int]] | None:
+    """
+    Функция читает снимок предыдущего инкрементального архива
+    :param path: путь к файлу снимка
+    :return: записи снимка по именам элементов или None, если снимка ещё нет (нужен полный архив)
+    """
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    try:
+        data = json.loads(text)
+        if data["version"] != SNAPSHOT_VERSION:
+            raise ValueError(data["version"])
+        return {str(name): [int(v) for v in entry] for name, entry in data["entries"].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError(f"Неподдерживаемый или повреждённый файл снимка: '{path}'") from None
+
+
+def save_snapshot(path: PathLike[str] | str, entries: dict[str, list[int]]) -> None:
+    """
+    Функция записывает снимок атомарно (через временный файл и os.replace), чтобы прерванный запуск
+    не испортил снимок предыдущего
+    :param path: путь к файлу снимка
+    :param entries: записи снимка по именам элементов
+    :return: функция ничего не возвращает
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": SNAPSHOT_VERSION, "entries": entries}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def deleted_entries(previous: dict[str, list[int]], current: dict[str, list[int]]) -> list[str]:
+    """
+    Функция определяет элементы, которые при восстановлении нужно удалить: исчезнувшие с прошлого запуска
+    и сменившие тип (файл стал каталогом или наоборот)
+    :param previous: снимок прошлого запуска
+    :param current: снимок текущего запуска
+    :return: отсортированный список имён (каталог идёт раньше своего содержимого)
+    """
+    return sorted(name for name, entry in previous.items() if name not in current or current[name][3] != entry[3])
+
+
+def add_bytes(tf: tarfile.TarFile, name: str, data: bytes) -> None:
+    """
+    Функция добавляет в tar-архив служебный элемент из памяти
+    :param tf: открытый на запись tar-архив
+    :param name: имя элемента
+    :param data: содержимое элемента
+    :return: функция ничего не возвращает
+    """
+    tarinfo = tarfile.TarInfo(name)
+    tarinfo.size = len(data)
+    tarinfo.mtime = int(time.time())
+    tarinfo.offset = tf.offset
+    tf.addfile(tarinfo, io.BytesIO(data))
+
+
+def add_manifest(tf: tarfile.TarFile, deleted: list[str]) -> None:
+    """
+    Функция добавляет в инкрементальный архив список удалённых элементов. Он пишется первым элементом,
+    чтобы при распаковке удаления применялись до извлечения новых файлов
+    :param tf: открытый на запись tar-архив
+    :param deleted: имена удалённых элементов
+    :return: функция ничего не возвращает
+    """
+    add_bytes(tf, INCREMENTAL_MANIFEST, json.dumps({"version": SNAPSHOT_VERSION, "deleted": deleted}, ensure_ascii=False).encode("utf-8"))
+
+
+def read_manifest(data: bytes) -> list[str]:
+    """
+    Функция читает список удалённых элементов инкрементального архива
+    :param data: содержимое элемента INCREMENTAL_MANIFEST
+    :return: имена удалённых элементов
+    """
+    manifest = json.loads(data.decode("utf-8"))
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise tarfile.ReadError("Неподдерживаемая версия списка удалённых элементов")
+    return [str(name) for name in manifest["deleted"]]
@@ -0,0 +1,167 @@
+import io
+import platform
+import sys
+import threading
+import time
+from types import TracebackType
+from typing import Any, BinaryIO, Self, cast
+
+from src.services.lazy import lazy_import
+
+ctypes = lazy_import("ctypes")  # нужен только для --ionice
+
+_SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+_IOPRIO_SYSCALLS = {"x86_64": 251, "amd64": 251, "aarch64": 30, "arm64": 30, "i386": 289, "i686": 289}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+
+
+def parse_size(value: str) -> float:
+    """
+    Функция разбирает размер с необязательным суффиксом (K, M, G, T - степени 1024), например '50M' или '1.5G'
+    :param value: строка с размером
+    :return: размер в байтах
+    """
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    suffix = text[-1:] if text[-1:] in _SIZE_SUFFIXES else ""
+    number = text[: len(text) - len(suffix)]
+    try:
+        result = float(number) * _SIZE_SUFFIXES[suffix]
+    except ValueError:
+        raise ValueError(f"Некорректный размер: '{value}'") from None
+    if result <= 0:
+        raise ValueError(f"Размер должен быть положительным: '{value}'")
+    return result
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """
+        Функция инициализирует ведро токенов: токены пополняются со скоростью rate в секунду, но не больше burst.
+        Потребитель, которому не хватило токенов, уходит в долг и спит ровно столько, сколько нужно на его погашение,
+        поэтому одно ведро можно безопасно разделять между потоками
+        :param rate: скорость пополнения (токенов в секунду)
+        :param burst: ёмкость ведра (по умолчанию - запас на одну секунду)
+        :return: функция ничего не возвращает
+        """
+        self._rate = float(rate)
+        self._burst = float(burst if burst is not None else rate)
+        self._tokens = self._burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float) -> None:
+        """
+        Функция забирает amount токенов, при необходимости блокируя вызывающий поток
+        :param amount: количество токенов
+        :return: функция ничего не возвращает
+        """
+        if amount <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class IOLimiter:
+    def __init__(self, bwlimit: float | None = None, iops_limit: float | None = None) -> None:
+        """
+        Функция инициализирует общий ограничитель ввода-вывода для копирования, удаления и архивации
+        :param bwlimit: ограничение пропускной способности в байтах в секунду (None - без ограничения)
+        :param iops_limit: ограничение количества операций ввода-вывода в секунду (None - без ограничения)
+        :return: функция ничего не возвращает
+        """
+        self.bwlimit = bwlimit
+        self.iops_limit = iops_limit
+        self._bytes = TokenBucket(bwlimit) if bwlimit else None
+        self._ops = TokenBucket(iops_limit) if iops_limit else None
+
+    def io(self, nbytes: int = 0) -> None:
+        """
+        Функция учитывает одну операцию ввода-вывода размером nbytes байт
+        :param nbytes: количество переданных байт (0 - операция с метаданными, например unlink)
+        :return: функция ничего не возвращает
+        """
+        if self._ops is not None:
+            self._ops.consume(1)
+        if self._bytes is not None and nbytes:
+            self._bytes.consume(nbytes)
+
+
+class ThrottledFile:
+    def __init__(self, fh: BinaryIO, limiter: IOLimiter) -> None:
+        """
+        Функция оборачивает файловый объект так, что каждое чтение и запись проходят через ограничитель.
+        Остальные методы (seek, tell, close, ...) передаются исходному объекту без изменений
+        :param fh: исходный двоичный файловый объект
+        :param limiter: ограничитель ввода-вывода
+        :return: функция ничего не возвращает
+        """
+        self._fh = fh
+        self._limiter = limiter
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Функция читает данные и учитывает прочитанные байты в ограничителе
+        :param size: количество байт (-1 - до конца)
+        :return: прочитанные данные
+        """
+        data = self._fh.read(size)
+        self._limiter.io(len(data))
+        return data
+
+    def readinto(self, buffer: Any) -> int | None:
+        """
+        Функция читает данные в готовый буфер и учитывает прочитанные байты в ограничителе
+        :param buffer: буфер (bytearray, memoryview)
+        :return: количество прочитанных байт или None, если неблокирующий файл пока пуст
+        """
+        n = cast(io.RawIOBase, self._fh).readinto(buffer)
+        self._limiter.io(n or 0)
+        return n
+
+    def write(self, data: Any) -> int:
+        """
+        Функция учитывает записываемые байты в ограничителе (при необходимости ждёт) и записывает данные
+        :param data: данные (bytes, bytearray, memoryview)
+        :return: количество записанных байт
+        """
+        self._limiter.io(len(data))
+        return self._fh.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fh, name)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        self._fh.close()
+
+
+def lower_io_priority() -> bool:
+    """
+    Функция переводит текущий процесс в класс ввода-вывода idle (аналог ionice -c3) на Linux.
+    Приоритет процессора не меняется
+    :return: True/False (приоритет ввода-вывода понижен/нет)
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+
+    syscall_nr = _IOPRIO_SYSCALLS.get(platform.machine().lower())
+    if syscall_nr is None:
+        return False
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        ioprio = _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+        return libc.syscall(syscall_nr, _IOPRIO_WHO_PROCESS, 0, ioprio) == 0
+    except (OSError, AttributeError):
+        return False
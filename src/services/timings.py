@@ -0,0 +1,212 @@
+import functools
+import os
+import sys
+import threading
+import time
+import types
+from collections.abc import Callable, Generator
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+from src.services.progress import format_size
+
+PROC_IO = "/proc/self/io"
+
+
+def read_proc_io() -> dict[str, int] | None:
+    """
+    Функция читает счётчики ввода-вывода процесса из /proc/self/io (Linux): rchar/wchar - байты, прочитанные
+    и записанные системными вызовами (включая кеш страниц), syscr/syscw - количество этих вызовов
+    :return: счётчики по именам или None, если /proc/self/io недоступен
+    """
+    try:
+        with open(PROC_IO, encoding="ascii") as fh:
+            return {name: int(value) for name, value in (line.split(":") for line in fh)}
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class CallTiming:
+    name: str
+    wall: float
+    user: float
+    system: float
+    read_bytes: int | None
+    written_bytes: int | None
+    syscalls: int | None
+    failed: bool
+
+    @property
+    def syscall_heavy(self) -> bool:
+        """
+        Функция сообщает, ушла ли большая часть процессорного времени вызова в ядро (системные вызовы)
+        :return: True/False (системное время больше пользовательского/нет)
+        """
+        return self.system > self.user
+
+
+class CallTimings:
+    def __init__(self) -> None:
+        """
+        Функция инициализирует журнал замеров вызовов методов сервиса: время выполнения, процессорное время
+        (пользовательское и системное, вместе с завершёнными дочерними процессами), байты и количество системных
+        вызовов чтения/записи. Вложенные вызовы (cp из cp, format_long из ls) учитываются во внешнем
+        :return: функция ничего не возвращает
+        """
+        self.calls: list[CallTiming] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Функция оборачивает метод сервиса замером вызова. Если метод возвращает генератор (ls_iter, cat_stream,
+        grep_iter), работа выполняется при его обходе, поэтому замер продолжается до исчерпания или закрытия генератора
+        :param name: имя метода в отчёте
+        :param method: связанный метод сервиса
+        :return: обёрнутый метод
+        """
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            if getattr(self._local, "depth", 0):
+                return method(*args, **kwargs)
+            io_before = read_proc_io()
+            times_before = os.times()
+            start = time.perf_counter()
+            try:
+                result = self._call_outer(method, *args, **kwargs)
+            except BaseException:
+                self._record(name, time.perf_counter() - start, times_before, io_before, True)
+                raise
+            if isinstance(result, types.GeneratorType):
+                return self._timed_generator(name, result, start, times_before, io_before)
+            self._record(name, time.perf_counter() - start, times_before, io_before, False)
+            return result
+
+        return timed
+
+    def _call_outer(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Функция выполняет вызов как внешний: вложенные вызовы обёрнутых методов внутри него не замеряются отдельно
+        :param func: вызываемая функция
+        :return: результат функции
+        """
+        self._local.depth = 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._local.depth = 0
+
+    def _timed_generator(self, name: str, gen: Generator[Any, None, Any], start: float, times_before: os.times_result, io_before: dict[str, int] | None) -> Generator[Any, None, Any]:
+        """
+        Функция обходит генератор метода сервиса и сохраняет замер, когда он исчерпан, закрыт или завершился ошибкой.
+        Время между элементами (их обработка вызывающим) тоже входит в замер
+        :param name: имя метода
+        :param gen: генератор, возвращённый методом
+        :param start: time.perf_counter() до вызова метода
+        :param times_before: os.times() до вызова
+        :param io_before: счётчики /proc/self/io до вызова
+        :return: генератор тех же элементов
+        """
+        failed = True
+        try:
+            while True:
+                try:
+                    item = self._call_outer(next, gen)
+                except StopIteration as stop:
+                    failed = False
+                    return stop.value
+                yield item
+        except GeneratorExit:
+            failed = False
+            raise
+        finally:
+            self._call_outer(gen.close)
+            self._record(name, time.perf_counter() - start, times_before, io_before, failed)
+
+    def _record(self, name: str, wall: float, times_before: os.times_result, io_before: dict[str, int] | None, failed: bool) -> None:
+        """
+        Функция сохраняет замер завершившегося вызова
+        :param name: имя метода
+        :param wall: время выполнения в секундах
+        :param times_before: os.times() до вызова
+        :param io_before: счётчики /proc/self/io до вызова
+        :param failed: True/False (вызов завершился исключением/нет)
+        :return: функция ничего не возвращает
+        """
+        times_after = os.times()
+        io_after = read_proc_io()
+        user = (times_after.user - times_before.user) + (times_after.children_user - times_before.children_user)
+        system = (times_after.system - times_before.system) + (times_after.children_system - times_before.children_system)
+        read_bytes = written_bytes = syscalls = None
+        if io_before is not None and io_after is not None:
+            read_bytes = io_after["rchar"] - io_before["rchar"]
+            written_bytes = io_after["wchar"] - io_before["wchar"]
+            syscalls = io_after["syscr"] + io_after["syscw"] - io_before["syscr"] - io_before["syscw"]
+        with self._lock:
+            self.calls.append(CallTiming(name, wall, user, system, read_bytes, written_bytes, syscalls, failed))
+
+    def instrument(self, service: Any, names: set[str]) -> None:
+        """
+        Функция подменяет методы экземпляра сервиса обёрнутыми (класс и остальные экземпляры не меняются)
+        :param service: сервис консоли
+        :param names: имена методов
+        :return: функция ничего не возвращает
+        """
+        for name in sorted(names):
+            setattr(service, name, self.wrap(name, getattr(service, name)))
+
+    def report(self, stream: TextIO | None = None) -> None:
+        """
+        Функция выводит таблицу замеров в stderr: по строке на вызов, '!' отмечает вызовы, в которых системное
+        время больше пользовательского. Счётчики /proc/self/io общие для процесса, поэтому у параллельных
+        вызовов (run с '&') байты и системные вызовы пересекаются
+        :param stream: поток вывода (по умолчанию sys.stderr)
+        :return: функция ничего не возвращает
+        """
+        stream = stream or sys.stderr
+
+        def fmt(value: int | None, size: bool = False) -> str:
+            if value is None:
+                return "-"
+            return format_size(value) if size else str(value)
+
+        stream.write(f"{'метод':<12} {'время, мс':>10} {'user, мс':>10} {'sys, мс':>10} {'прочитано':>10} {'записано':>10} {'вызовов':>8}\n")
+        for call in self.calls:
+            mark = "!" if call.syscall_heavy else " "
+            status = " (ошибка)" if call.failed else ""
+            stream.write(f"{call.name:<12} {call.wall * 1000:>10.1f} {call.user * 1000:>10.1f} {call.system * 1000:>10.1f} "
+                         f"{fmt(call.read_bytes, True):>10} {fmt(call.written_bytes, True):>10} {fmt(call.syscalls):>8}{mark}{status}\n")
+        stream.flush()
+
+
+def start_profile() -> Any:
+    """
+    Функция запускает cProfile для текущего потока (пулы потоков и процессов в профиль не попадают)
+    :return: запущенный профилировщик
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def report_profile(profiler: Any, out: str | None = None, top: int = 25, stream: TextIO | None = None) -> None:
+    """
+    Функция останавливает профилировщик и сохраняет результат в файл pstats (его можно открыть
+    'python -m pstats FILE' или snakeviz) либо выводит top самых дорогих функций по суммарному времени
+    :param profiler: профилировщик из start_profile
+    :param out: путь к файлу pstats (None - вывести сводку)
+    :param top: количество строк сводки
+    :param stream: поток вывода сводки (по умолчанию sys.stderr)
+    :return: функция ничего не возвращает
+    """
+    import pstats
+
+    profiler.disable()
+    if out is not None:
+        profiler.dump_stats(out)
+        return
+    stats = pstats.Stats(profiler, stream=stream or sys.stderr)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
@@ -0,0 +1,208 @@
+import json
+import os
+import secrets
+import shutil
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.services.parallel_rm import fd_ops_supported, parallel_rmtree
+
+INFO_NAME = "info.json"
+PAYLOAD_NAME = "payload"
+REGISTRY_PATH = Path.home() / ".console_trash_dirs"
+TRASH_ROOT: Path | None = None
+
+
+@dataclass
+class TrashEntry:
+    entry_id: str
+    original: Path
+    deleted_at: float
+    path: Path
+
+
+def _trash_dir_name() -> str:
+    """
+    Функция возвращает имя каталога корзины для текущего пользователя (по аналогии с .Trash-<uid>)
+    :return: имя каталога корзины
+    """
+    uid = getattr(os, "getuid", None)
+    if uid is None:
+        return ".console_trash"
+    return f".console_trash-{uid()}"
+
+
+def _read_registry() -> list[Path]:
+    """
+    Функция читает список известных каталогов корзины (по одному на файловую систему)
+    :return: список путей к каталогам корзины
+    """
+    try:
+        lines = REGISTRY_PATH.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    return [Path(i) for i in lines if i.strip()]
+
+
+def _register(trash: Path) -> None:
+    """
+    Функция добавляет каталог корзины в реестр, если его там ещё нет
+    :param trash: путь к каталогу корзины
+    :return: функция ничего не возвращает
+    """
+    if trash in _read_registry():
+        return
+    with REGISTRY_PATH.open("a", encoding="utf-8") as fh:
+        fh.write(f"{trash}\n")
+
+
+def find_trash_dir(target: Path) -> Path:
+    """
+    Функция находит (или создаёт) каталог корзины на той же файловой системе, что и target, чтобы перенос в корзину
+    был атомарным os.rename. Предпочтение отдаётся корню файловой системы, затем каталогам ниже вплоть до родителя target.
+    Если задан TRASH_ROOT, используется он
+    :param target: абсолютный путь к удаляемому объекту
+    :return: путь к каталогу корзины
+    """
+    dev = target.lstat().st_dev
+    if TRASH_ROOT is not None:
+        TRASH_ROOT.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if TRASH_ROOT.stat().st_dev != dev:
+            raise OSError(f"Корзина '{TRASH_ROOT}' находится на другой файловой системе, чем '{target}'")
+        _register(TRASH_ROOT)
+        return TRASH_ROOT
+
+    chain: list[Path] = []
+    cur = target.parent
+    while True:
+        chain.append(cur)
+        parent = cur.parent
+        if parent == cur or parent.stat().st_dev != dev:
+            break
+        cur = parent
+
+    for d in reversed(chain):
+        trash = d / _trash_dir_name()
+        try:
+            trash.mkdir(mode=0o700, exist_ok=True)
+        except OSError:
+            continue
+        if trash.stat().st_dev == dev and os.access(trash, os.W_OK | os.X_OK):
+            _register(trash)
+            return trash
+
+    raise PermissionError(f"Не удалось создать корзину на файловой системе '{target}'")
+
+
+def move_to_trash(target: Path) -> TrashEntry:
+    """
+    Функция переносит target в корзину его файловой системы одним вызовом os.rename (O(1) независимо от размера)
+    :param target: абсолютный путь к удаляемому объекту
+    :return: запись корзины
+    """
+    trash = find_trash_dir(target)
+    if target == trash or trash in target.parents:
+        raise PermissionError(f"Нельзя отложенно удалить саму корзину: '{target}'")
+
+    entry_id = f"{time.time_ns()}-{secrets.token_hex(4)}"
+    entry_dir = trash / entry_id
+    entry_dir.mkdir()
+    deleted_at = time.time()
+    try:
+        (entry_dir / INFO_NAME).write_text(
+            json.dumps({"original": str(target), "deleted_at": deleted_at}, ensure_ascii=False), encoding="utf-8"
+        )
+        os.rename(target, entry_dir / PAYLOAD_NAME)
+    except OSError:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        raise
+    return TrashEntry(entry_id, target, deleted_at, entry_dir)
+
+
+def list_entries() -> list[TrashEntry]:
+    """
+    Функция перечисляет все записи во всех известных корзинах
+    :return: список записей, отсортированный по времени удаления
+    """
+    entries: list[TrashEntry] = []
+    for trash in _read_registry():
+        if not trash.is_dir():
+            continue
+        for entry_dir in trash.iterdir():
+            try:
+                info = json.loads((entry_dir / INFO_NAME).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            entries.append(TrashEntry(entry_dir.name, Path(info["original"]), float(info["deleted_at"]), entry_dir))
+    entries.sort(key=lambda e: e.deleted_at)
+    return entries
+
+
+def restore_entry(entry_id: str) -> Path:
+    """
+    Функция возвращает объект из корзины на исходное место
+    :param entry_id: идентификатор записи корзины
+    :return: путь, по которому объект восстановлен
+    """
+    for entry in list_entries():
+        if entry.entry_id == entry_id:
+            break
+    else:
+        raise FileNotFoundError(f"Запись корзины не найдена: '{entry_id}'")
+
+    if os.path.lexists(entry.original):
+        raise FileExistsError(f"Исходный путь уже занят: '{entry.original}'")
+
+    entry.original.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(entry.path / PAYLOAD_NAME, entry.original)
+    (entry.path / INFO_NAME).unlink()
+    entry.path.rmdir()
+    return entry.original
+
+
+def _remove(path: Path, workers: int | None, on_remove: Callable[[], None] | None = None) -> None:
+    """
+    Функция безвозвратно удаляет файл или каталог
+    :param path: путь к удаляемому объекту
+    :param workers: количество потоков для удаления каталога
+    :param on_remove: функция, вызываемая перед каждым unlink/rmdir (например, ограничитель ввода-вывода)
+    :return: функция ничего не возвращает
+    """
+    if not os.path.lexists(path):
+        return
+    if path.is_dir() and not path.is_symlink():
+        if fd_ops_supported():
+            parallel_rmtree(path, workers, on_remove)
+        else:
+            shutil.rmtree(path)
+    else:
+        if on_remove is not None:
+            on_remove()
+        path.unlink()
+
+
+def purge_entries(older_than: float = 0.0, pause: float = 0.0, workers: int | None = 1, on_remove: Callable[[], None] | None = None) -> int:
+    """
+    Функция окончательно удаляет записи корзины. Файл info.json удаляется первым, поэтому частично очищенная запись
+    уже не может быть восстановлена
+    :param older_than: удалять только записи старше указанного количества секунд
+    :param pause: пауза в секундах между записями (ограничение нагрузки на диск)
+    :param workers: количество потоков для удаления одной записи
+    :param on_remove: функция, вызываемая перед каждым unlink/rmdir (например, ограничитель ввода-вывода)
+    :return: количество очищенных записей
+    """
+    deadline = time.time() - older_than
+    purged = 0
+    for entry in list_entries():
+        if entry.deleted_at > deadline:
+            continue
+        (entry.path / INFO_NAME).unlink()
+        _remove(entry.path / PAYLOAD_NAME, workers, on_remove)
+        entry.path.rmdir()
+        purged += 1
+        if pause:
+            time.sleep(pause)
+    return purged
+
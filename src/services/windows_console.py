@@ -1,24 +1,249 @@
-from logging import Logger
+from __future__ import annotations
+
+from logging import DEBUG, Logger
+from collections.abc import Callable, Iterable, Iterator
+import contextlib
+from contextlib import contextmanager
+import io
+from typing import IO, TYPE_CHECKING, BinaryIO, TypeVar, cast
 from os import PathLike
 from pathlib import Path
 import shutil
 import stat as stat_module
 from datetime import datetime
-import zipfile
-import tarfile
 import re
-from src.enums import FileReadMode, FileDisplayMode
+import glob
+import zlib
+from src.enums import FileReadMode, FileDisplayMode, TarCodec, ZipMethod
+from src.services.archive import CHECKSUMS_NAME, ArchiveMember, HashingReader, VerifyReport, file_sha256, format_checksums, is_stdio, member_matches, parse_checksums, select_members
 from src.services.base import OSConsoleServiceBase
+from src.services.lazy import lazy_import
+from src.services.memory import CHECK_EVERY, MemoryBudgetExceeded
+from src.services.progress import ProgressTracker
+from src.services.throttle import IOLimiter, ThrottledFile
 import os
+import sys
+import threading
+import time
+
+if TYPE_CHECKING:
+    from tarfile import TarFile, TarInfo
+    from zipfile import ZipFile, ZipInfo
+
+    from src.services.tar_tools import TarIndex
+    from src.services.trash import TrashEntry
+
+# модули архивов и корзины загружаются при первом обращении: ls, cd, cat и другие простые команды их не используют
+zipfile = lazy_import("zipfile")
+tarfile = lazy_import("tarfile")
+hashlib = lazy_import("hashlib")
+lzma = lazy_import("lzma")  # нужен только для LZMAError при проверке tar.xz
+parallel_rm = lazy_import("src.services.parallel_rm")
+tar_tools = lazy_import("src.services.tar_tools")
+zip_tools = lazy_import("src.services.zip_tools")
+zip_compat = lazy_import("src.services.zip_compat")
+trash = lazy_import("src.services.trash")
+
+T = TypeVar("T")
 
 class WindowsConsoleService(OSConsoleServiceBase):
-    def __init__(self, logger: Logger) -> None:
+    COPY_BUFSIZE = 1024 * 1024
+
+    def __init__(self, logger: Logger, limiter: IOLimiter | None = None) -> None:
         """
         Функция инициализирует сервис консоли
         :param logger: логгер для записи информации о работе сервиса
+        :param limiter: общий ограничитель ввода-вывода для копирования, удаления и архивации (None - без ограничений)
         :return: функция ничего не возвращает
         """
         self._logger = logger
+        self._limiter = limiter
+        self._local = threading.local()
+
+
+    @staticmethod
+    def _tree_size(path: Path) -> tuple[int | None, int | None]:
+        """
+        Функция подсчитывает суммарный размер и количество файлов в дереве (для оценки оставшегося времени)
+        :param path: путь к файлу или каталогу
+        :return: размер в байтах и количество файлов; (None, None), если путь недоступен
+        """
+        try:
+            if not path.is_dir():
+                return path.stat().st_size, 1
+            total, files = 0, 0
+            for root, _, names in os.walk(path):
+                for name in names:
+                    try:
+                        total += os.lstat(os.path.join(root, name)).st_size
+                        files += 1
+                    except OSError:
+                        pass
+            return total, files
+        except OSError:
+            return None, None
+
+
+    @contextmanager
+    def _track(self, operation: str, source: Path | None = None) -> Iterator[ProgressTracker]:
+        """
+        Функция открывает учёт прогресса операции для текущего потока; итоговое событие отправляется
+        только при успешном завершении. Общий объём считается, только если кто-то подписан на события
+        :param operation: название операции
+        :param source: источник данных для подсчёта общего объёма (None - объём заранее неизвестен)
+        :return: счётчик прогресса
+        """
+        bytes_total, files_total = None, None
+        if source is not None and self._progress_callback is not None:
+            bytes_total, files_total = self._tree_size(source)
+        tracker = self._start_progress(operation, bytes_total, files_total)
+        previous = getattr(self._local, "tracker", None)
+        self._local.tracker = tracker
+        try:
+            yield tracker
+        finally:
+            self._local.tracker = previous
+        tracker.finish()
+
+
+    def _advance(self, nbytes: int = 0, files: int = 0, current: str | None = None) -> None:
+        """
+        Функция сообщает о прогрессе текущей операции потока (если она отслеживается)
+        :param nbytes: количество обработанных байт
+        :param files: количество обработанных файлов
+        :param current: текущий файл
+        :return: функция ничего не возвращает
+        """
+        tracker = getattr(self._local, "tracker", None)
+        if tracker is not None:
+            tracker.advance(nbytes, files, current)
+
+
+    def _open_read(self, path: PathLike[str] | str) -> BinaryIO:
+        """
+        Функция открывает файл на чтение в двоичном режиме, с учётом ограничителя ввода-вывода
+        :param path: путь к файлу
+        :return: файловый объект
+        """
+        fh = self._open_sequential(path)
+        if self._limiter is None:
+            return fh
+        return cast(BinaryIO, ThrottledFile(fh, self._limiter))
+
+
+    def _open_sequential(self, path: PathLike[str] | str, dir_fd: int | None = None) -> BinaryIO:
+        """
+        Функция открывает файл, который будет прочитан последовательно от начала до конца (cat, grep, cp, zip, tar)
+        :param path: путь к файлу (при dir_fd - имя относительно каталога)
+        :param dir_fd: дескриптор каталога, относительно которого открывается файл (None - путь как есть)
+        :return: двоичный файловый объект
+        """
+        if dir_fd is None:
+            return open(path, "rb")
+        return open(path, "rb", opener=lambda name, flags: os.open(name, flags, dir_fd=dir_fd))
+
+
+    def _stdin(self) -> BinaryIO:
+        """
+        Функция возвращает стандартный ввод в двоичном режиме с учётом ограничителя ввода-вывода (архив из конвейера)
+        :return: файловый объект (закрывать его не нужно)
+        """
+        if self._limiter is None:
+            return sys.stdin.buffer
+        return cast(BinaryIO, ThrottledFile(sys.stdin.buffer, self._limiter))
+
+
+    def _copy_stream(self, src: BinaryIO | HashingReader, dst: IO[bytes]) -> int:
+        """
+        Функция копирует данные из одного файлового объекта в другой блоками по COPY_BUFSIZE (при бюджете памяти - меньше)
+        :param src: источник
+        :param dst: назначение
+        :return: количество скопированных байт
+        """
+        total = 0
+        size = self._buffer_size(self.COPY_BUFSIZE)
+        while True:
+            chunk = src.read(size)
+            if not chunk:
+                return total
+            dst.write(chunk)
+            total += len(chunk)
+            self._advance(len(chunk))
+
+
+    def _buffer_size(self, default: int) -> int:
+        """
+        Функция возвращает размер буфера потоковой операции с учётом бюджета памяти
+        :param default: размер буфера без бюджета
+        :return: размер буфера
+        """
+        if self._memory_budget is None:
+            return default
+        return self._memory_budget.buffer_size(default)
+
+
+    def _check_memory(self, operation: str) -> None:
+        """
+        Функция проверяет бюджет памяти (если он задан) и логирует превышение
+        :param operation: название операции
+        :return: функция ничего не возвращает
+        :raises MemoryBudgetExceeded: если бюджет превышен
+        """
+        if self._memory_budget is None:
+            return
+        try:
+            self._memory_budget.check(operation)
+        except MemoryBudgetExceeded as e:
+            self._logger.error(str(e))
+            raise
+
+
+    def _reserve_memory(self, operation: str, nbytes: int) -> None:
+        """
+        Функция проверяет до начала операции, что nbytes помещаются в бюджет памяти, и логирует отказ
+        :param operation: название операции
+        :param nbytes: сколько памяти понадобится операции
+        :return: функция ничего не возвращает
+        :raises MemoryBudgetExceeded: если данные не помещаются в бюджет
+        """
+        if self._memory_budget is None:
+            return
+        try:
+            self._memory_budget.reserve(operation, nbytes)
+        except MemoryBudgetExceeded as e:
+            self._logger.error(str(e))
+            raise
+
+
+    def _copy_file(self, src: PathLike[str] | str, dst: PathLike[str] | str) -> str:
+        """
+        Функция копирует один файл вместе с метаданными (аналог shutil.copy2); используется как copy_function
+        для shutil.copytree и shutil.move. Без ограничителя используется сам shutil.copy2 (с его быстрыми путями ОС)
+        :param src: путь к исходному файлу
+        :param dst: путь к файлу или каталогу назначения
+        :return: путь к созданному файлу
+        """
+        if self._limiter is None or os.path.islink(src):
+            result = shutil.copy2(src, dst)
+            self._advance(os.lstat(src).st_size, 1, str(src))
+            return str(result)
+
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        with self._open_read(src) as fsrc, open(dst, "wb") as fdst:
+            self._copy_stream(fsrc, fdst)
+        shutil.copystat(src, dst)
+        self._advance(0, 1, str(src))
+        return str(dst)
+
+
+    def _on_remove(self) -> None:
+        """
+        Функция учитывает одну операцию удаления в ограничителе ввода-вывода
+        :return: функция ничего не возвращает
+        """
+        if self._limiter is not None:
+            self._limiter.io()
 
 
     def format_long(self, entry: PathLike[str] | str) -> str:
@@ -31,28 +256,28 @@ class WindowsConsoleService(OSConsoleServiceBase):
         try:
             stat_info = entry_path.stat()
 
-            mode = oct(stat_module.S_IMODE(stat_info.st_mode))[2:]
-            permissions = mode
-
-            size = stat_info.st_size
-
-            mtime = datetime.fromtimestamp(stat_info.st_mtime)
-            mtime_pretty = mtime.strftime("%Y-%m-%d %H:%M:%S")
-
-            if entry_path.is_dir():
-                entry_type = "d"
-            else:
-                entry_type = "-"
-
-            form_l = f"{entry_type}{permissions} {size:>10} {mtime_pretty} {entry_path.name}\n"
-
-            return form_l
+            return self._format_stat(entry_path.name, stat_info, entry_path.is_dir())
 
         except OSError as e:
-            self._logger.warning(f"Невозможно получить подробную информацию о {entry_path}: {e}")
+            self._logger.warning("Невозможно получить подробную информацию о %s: %s", entry_path, e)
             return f"- --------- {0:>10} 1970-01-01 00:00:00 {entry_path.name}\n"
 
 
+    @staticmethod
+    def _format_stat(name: str, stat_info: os.stat_result, is_dir: bool) -> str:
+        """
+        Функция форматирует строку ls -l по уже полученному stat
+        :param name: имя файла или директории
+        :param stat_info: результат stat
+        :param is_dir: True/False (директория/нет)
+        :return: отформатированная строка с подробной информацией
+        """
+        permissions = oct(stat_module.S_IMODE(stat_info.st_mode))[2:]
+        mtime_pretty = datetime.fromtimestamp(stat_info.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        entry_type = "d" if is_dir else "-"
+        return f"{entry_type}{permissions} {stat_info.st_size:>10} {mtime_pretty} {name}\n"
+
+
     def ls(self, path: PathLike[str] | str, mode: FileDisplayMode = FileDisplayMode.simple) -> list[str]:
         """
         Функция отображает содержимое директории и обрабатывает возможные ошибки
@@ -60,6 +285,17 @@ class WindowsConsoleService(OSConsoleServiceBase):
         :param mode: режим отображения (простой или подробный)
         :return: список строк с информацией о файлах и директориях
         """
+        return list(self.ls_iter(path, mode))
+
+
+    def ls_iter(self, path: PathLike[str] | str, mode: FileDisplayMode = FileDisplayMode.simple) -> Iterator[str]:
+        """
+        Функция проверяет директорию и возвращает её содержимое построчно: строки формируются по мере вывода,
+        поэтому память не растёт с количеством элементов
+        :param path: путь к директории для отображения
+        :param mode: режим отображения (простой или подробный)
+        :return: итератор по строкам с информацией о файлах и директориях
+        """
         if hasattr(path, 'value'):
             path = path.value
         path = Path(path)
@@ -73,20 +309,25 @@ class WindowsConsoleService(OSConsoleServiceBase):
             raise NotADirectoryError(path)
 
         self._logger.info(f"ls: Отображение {path} в режиме {mode}")
+        return self._ls_lines(path, mode)
 
-        a = list(path.iterdir())
 
-        result: list[str] = []
-        if mode == FileDisplayMode.simple:
-            for i in a:
-                result.append(i.name + "\n")
-        else:
-            for i in a:
+    def _ls_lines(self, path: Path, mode: FileDisplayMode) -> Iterator[str]:
+        """
+        Функция формирует строки ls по одной; при бюджете памяти каждые CHECK_EVERY элементов проверяется RSS
+        :param path: директория
+        :param mode: режим отображения
+        :return: итератор по строкам
+        """
+        for count, i in enumerate(path.iterdir(), 1):
+            if count % CHECK_EVERY == 0:
+                self._check_memory("ls")
+            if mode == FileDisplayMode.simple:
+                yield i.name + "\n"
+            else:
                 formatted = self.format_long(i)
                 if formatted:
-                    result.append(formatted)
-        return result
-
+                    yield formatted
 
     def cat(self, path_file: PathLike[str] | str, mode: FileReadMode = FileReadMode.string)->str | bytes:
         """
@@ -94,21 +335,16 @@ class WindowsConsoleService(OSConsoleServiceBase):
         :param path_file: путь к файлу
         :param mode: режим чтения файла (FileReadMode.string или FileReadMode.bytes)
         :return: содержимое файла в виде строки или байтов
+        :raises MemoryBudgetExceeded: если файл целиком не помещается в бюджет памяти (тогда нужен cat_stream)
         """
-        path = Path(path_file)
-        self._logger.info(f"cat: Запуск чтения файла '{path_file}' в режиме {mode}")
-
-        if not path.exists():
-            err = f"cat: Файл не найден: '{path_file}' (path does not exist)"
-            self._logger.error(err)
-            raise FileNotFoundError(err)
-
-        if path.is_dir():
-            err = f"cat: Путь - это директория, а не файл: '{path_file}'"
-            self._logger.error(err)
-            raise IsADirectoryError(err)
+        path = self._cat_path(path_file, mode)
 
         try:
+            if self._memory_budget is not None:
+                # текст держится в памяти дважды: прочитанные байты и декодированная строка
+                size = path.stat().st_size
+                self._reserve_memory("cat", size * 2 if mode == FileReadMode.string else size)
+
             if mode == FileReadMode.string:
                 self._logger.debug(f"cat: Чтение файла '{path_file}' в виде текста")
                 file_content = path.read_text(encoding="utf-8")
@@ -126,6 +362,61 @@ class WindowsConsoleService(OSConsoleServiceBase):
             raise
 
 
+    def cat_stream(self, path_file: PathLike[str] | str, mode: FileReadMode = FileReadMode.string) -> Iterator[str | bytes]:
+        """
+        Функция проверяет файл и возвращает его содержимое блоками по COPY_BUFSIZE (при бюджете памяти - меньше),
+        поэтому память не зависит от размера файла
+        :param path_file: путь к файлу
+        :param mode: режим чтения файла (FileReadMode.string или FileReadMode.bytes)
+        :return: итератор по блокам текста или байтов
+        """
+        path = self._cat_path(path_file, mode)
+        return self._cat_chunks(path, mode)
+
+
+    def _cat_path(self, path_file: PathLike[str] | str, mode: FileReadMode) -> Path:
+        """
+        Функция проверяет, что файл для cat существует и не является каталогом
+        :param path_file: путь к файлу
+        :param mode: режим чтения файла
+        :return: путь к файлу
+        """
+        path = Path(path_file)
+        self._logger.info(f"cat: Запуск чтения файла '{path_file}' в режиме {mode}")
+
+        if not path.exists():
+            err = f"cat: Файл не найден: '{path_file}' (path does not exist)"
+            self._logger.error(err)
+            raise FileNotFoundError(err)
+
+        if path.is_dir():
+            err = f"cat: Путь - это директория, а не файл: '{path_file}'"
+            self._logger.error(err)
+            raise IsADirectoryError(err)
+        return path
+
+
+    def _cat_chunks(self, path: Path, mode: FileReadMode) -> Iterator[str | bytes]:
+        """
+        Функция читает файл блоками, проверяя бюджет памяти перед каждым блоком
+        :param path: путь к файлу
+        :param mode: режим чтения файла
+        :return: итератор по блокам
+        """
+        size = self._buffer_size(self.COPY_BUFSIZE)
+        try:
+            raw = self._open_sequential(path)
+            with raw if mode == FileReadMode.bytes else io.TextIOWrapper(raw, encoding="utf-8") as fh:
+                while True:
+                    self._check_memory("cat")
+                    chunk = fh.read(size)
+                    if not chunk:
+                        return
+                    yield chunk
+        except OSError as e:
+            self._logger.exception(f"cat: Ошибка чтения файла '{path}': {e}")
+            raise
+
     def cd(self, path: PathLike[str] | str) -> str:
         """
         Функция меняет рабочую директорию и обрабатывает возможные ошибки
@@ -182,55 +473,56 @@ class WindowsConsoleService(OSConsoleServiceBase):
             self._logger.error(err)
             raise FileNotFoundError(err)
 
-        try:
-            if src_path.is_dir():
-                if not recursive:
-                    err = f"cp: '{src_path}' это директория; используйте -r для рекурсивного копирования"
-                    self._logger.error(err)
-                    raise IsADirectoryError(err)
-
-                if dst_path.exists() and dst_path.is_dir():
-                    final_dst = dst_path / src_path.name
+        with self._track("cp", src_path):
+            try:
+                if src_path.is_dir():
+                    if not recursive:
+                        err = f"cp: '{src_path}' это директория; используйте -r для рекурсивного копирования"
+                        self._logger.error(err)
+                        raise IsADirectoryError(err)
 
-                else:
-                    final_dst = dst_path
+                    if dst_path.exists() and dst_path.is_dir():
+                        final_dst = dst_path / src_path.name
 
-                self._logger.debug(f"cp: Копируем из '{src_path}' в '{final_dst}'")
-                if final_dst.exists():
-                    if final_dst.is_dir():
-                        for i in src_path.iterdir():
-                            target = final_dst /i.name
-                            if i.is_dir():
-                                shutil.copytree(i, target)
-                            else:
-                                shutil.copy2(i, target)
                     else:
-                        raise FileExistsError(f"cp: Пункт назначения существует и не является каталогом: '{final_dst}'")
+                        final_dst = dst_path
+
+                    self._logger.debug(f"cp: Копируем из '{src_path}' в '{final_dst}'")
+                    if final_dst.exists():
+                        if final_dst.is_dir():
+                            for i in src_path.iterdir():
+                                target = final_dst /i.name
+                                if i.is_dir():
+                                    shutil.copytree(i, target, copy_function=self._copy_file)
+                                else:
+                                    self._copy_file(i, target)
+                        else:
+                            raise FileExistsError(f"cp: Пункт назначения существует и не является каталогом: '{final_dst}'")
+                    else:
+                        shutil.copytree(src_path, final_dst, copy_function=self._copy_file)
                 else:
-                    shutil.copytree(src_path, final_dst)
-            else:
 
-                if dst_path.exists() and dst_path.is_dir():
-                    final_dst = dst_path / src_path.name
-                else:
-                    final_dst = dst_path
+                    if dst_path.exists() and dst_path.is_dir():
+                        final_dst = dst_path / src_path.name
+                    else:
+                        final_dst = dst_path
 
-                self._logger.debug(f"cp: copy2 из '{src_path}' в '{final_dst}'")
-                final_dst_parent = final_dst.parent
+                    self._logger.debug(f"cp: copy2 из '{src_path}' в '{final_dst}'")
+                    final_dst_parent = final_dst.parent
 
-                if not final_dst_parent.exists():
-                    final_dst_parent.mkdir(parents=True, exist_ok=True)
+                    if not final_dst_parent.exists():
+                        final_dst_parent.mkdir(parents=True, exist_ok=True)
 
-                shutil.copy2(src_path, final_dst)
+                    self._copy_file(src_path, final_dst)
 
-            self._logger.info(f"cp: Успешная копия '{dst_path}'")
+                self._logger.info(f"cp: Успешная копия '{dst_path}'")
 
-        except PermissionError as e:
-            self._logger.exception(f"cp: Отказано в разрешении на копирование '{src_path}' -> '{dst_path}': {e}")
-            raise
-        except OSError as e:
-            self._logger.exception(f"cp: Ошибка операционной системы при копировании '{src_path}' -> '{dst_path}': {e}")
-            raise
+            except PermissionError as e:
+                self._logger.exception(f"cp: Отказано в разрешении на копирование '{src_path}' -> '{dst_path}': {e}")
+                raise
+            except OSError as e:
+                self._logger.exception(f"cp: Ошибка операционной системы при копировании '{src_path}' -> '{dst_path}': {e}")
+                raise
 
     def mv(self, path1: PathLike[str] | str, path2: PathLike[str] | str) -> None:
         """
@@ -249,36 +541,176 @@ class WindowsConsoleService(OSConsoleServiceBase):
             self._logger.error(err)
             raise FileNotFoundError(err)
 
-        try:
-            final_dst: Path
-            if dst_path.exists() and dst_path.is_dir():
-                final_dst = dst_path / src_path.name
+        with self._track("mv", src_path) as tracker:
+            try:
+                final_dst: Path
+                if dst_path.exists() and dst_path.is_dir():
+                    final_dst = dst_path / src_path.name
+                else:
+                    final_dst = dst_path
+
+                self._logger.debug(f"mv: Перемещение из '{src_path}' в '{final_dst}'")
+
+                final_dst.parent.mkdir(parents=True, exist_ok=True)
+                self._on_remove()
+                shutil.move(str(src_path), str(final_dst), copy_function=self._copy_file)
+                if tracker.files_done == 0:
+                    self._advance(0, 1, str(src_path))
+                self._logger.info(f"mv: Успешное перемещение в '{final_dst}'")
+
+            except PermissionError as e:
+                self._logger.exception(f"mv: Запрещено перемещение '{src_path}' -> '{dst_path}': {e}")
+                raise
+
+            except OSError as e:
+                self._logger.exception(f"mv: Ошибка операционной системы во время перемещения '{src_path}' -> '{dst_path}': {e}")
+                raise
+
+    @staticmethod
+    def _parse_substitution(expression: str) -> tuple[re.Pattern[str], str, int]:
+        """
+        Функция разбирает выражение замены в стиле sed/perl: s/шаблон/замена/флаги
+        :param expression: выражение вида 's/\\.log$/.old/' (разделитель - любой символ после 's')
+        :return: скомпилированное регулярное выражение, строка замены и количество замен (0 - все)
+        """
+        if len(expression) < 4 or expression[0] != "s":
+            raise ValueError(f"rename: Некорректное выражение '{expression}', ожидается s/шаблон/замена/")
+
+        sep = expression[1]
+        parts = re.split(rf"(?<!\\){re.escape(sep)}", expression[2:])
+        if len(parts) != 3:
+            raise ValueError(f"rename: Некорректное выражение '{expression}', ожидается s/шаблон/замена/")
+
+        pattern, replacement, flags_str = parts
+        replacement = replacement.replace(f"\\{sep}", sep)
+        pattern = pattern.replace(f"\\{sep}", sep)
+
+        flags = re.RegexFlag(0)
+        count = 1
+        for f in flags_str:
+            if f == "g":
+                count = 0
+            elif f == "i":
+                flags |= re.IGNORECASE
             else:
-                final_dst = dst_path
+                raise ValueError(f"rename: Неизвестный флаг '{f}' в выражении '{expression}'")
 
-            self._logger.debug(f"mv: Перемещение из '{src_path}' в '{final_dst}'")
+        try:
+            return re.compile(pattern, flags), replacement, count
+        except re.error as e:
+            raise ValueError(f"rename: Ошибка компиляции regex '{pattern}': {e}") from e
+
+    @staticmethod
+    def _expand_paths(paths: list[PathLike[str] | str]) -> list[Path]:
+        """
+        Функция раскрывает glob-шаблоны в списке путей (если оболочка этого не сделала)
+        :param paths: список путей и/или glob-шаблонов
+        :return: список существующих путей без повторов в исходном порядке
+        """
+        result: list[Path] = []
+        seen: set[Path] = set()
+        for p in paths:
+            p_str = str(p)
+            if any(c in p_str for c in "*?[") and not os.path.lexists(p_str):
+                found = [Path(i) for i in sorted(glob.glob(p_str))]
+            else:
+                found = [Path(p_str)]
+            for i in found:
+                if i not in seen:
+                    seen.add(i)
+                    result.append(i)
+        return result
 
-            final_dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(src_path), str(final_dst))
-            self._logger.info(f"mv: Успешное перемещение в '{final_dst}'")
+    def rename(self, expression: str, paths: list[PathLike[str] | str], dry_run: bool = False) -> list[tuple[Path, Path]]:
+        """
+        Функция массово переименовывает файлы по выражению s/шаблон/замена/ в одном процессе и обрабатывает возможные ошибки.
+        Сначала строится полный план операций и проверяются коллизии, затем выполняются вызовы os.rename
+        :param expression: выражение замены для имени файла, например 's/\\.log$/.old/'
+        :param paths: список файлов и/или glob-шаблонов
+        :param dry_run: True/False (только построить и вернуть план, ничего не переименовывая/нет)
+        :return: список пар (источник, назначение) запланированных операций
+        """
+        self._logger.info(f"rename: expression='{expression}', paths={len(paths)}, dry_run={dry_run}")
 
-        except PermissionError as e:
-            self._logger.exception(f"mv: Запрещено перемещение '{src_path}' -> '{dst_path}': {e}")
+        try:
+            rgx, replacement, count = self._parse_substitution(expression)
+        except ValueError as e:
+            self._logger.error(f"rename: Ошибка разбора выражения: {e}")
             raise
 
+        plan: dict[Path, Path] = {}
+        targets: dict[Path, Path] = {}
+        for src in self._expand_paths(paths):
+            if not os.path.lexists(src):
+                err = f"rename: Источник не найден: '{src}'"
+                self._logger.error(err)
+                raise FileNotFoundError(err)
+
+            new_name = rgx.sub(replacement, src.name, count=count)
+            if new_name == src.name:
+                continue
+            if not new_name or "/" in new_name or "\\" in new_name:
+                err = f"rename: Недопустимое новое имя '{new_name}' для '{src}'"
+                self._logger.error(err)
+                raise ValueError(err)
+
+            dst = src.with_name(new_name)
+            if dst in targets:
+                err = f"rename: Коллизия: '{targets[dst]}' и '{src}' переименовываются в '{dst}'"
+                self._logger.error(err)
+                raise FileExistsError(err)
+            targets[dst] = src
+            plan[src] = dst
+
+        for src, dst in plan.items():
+            if os.path.lexists(dst) and dst not in plan:
+                err = f"rename: Коллизия: '{dst}' уже существует (источник '{src}')"
+                self._logger.error(err)
+                raise FileExistsError(err)
+
+        operations = list(plan.items())
+        if dry_run:
+            self._logger.info(f"rename: Пробный запуск, запланировано операций: {len(operations)}")
+            return operations
+
+        pending = dict(plan)
+        try:
+            while pending:
+                progressed = False
+                for src, dst in list(pending.items()):
+                    if dst in pending:
+                        continue
+                    self._logger.debug("rename: '%s' -> '%s'", src, dst)
+                    os.rename(src, dst)
+                    del pending[src]
+                    progressed = True
+
+                if not progressed:
+                    src, dst = next(iter(pending.items()))
+                    tmp = src.with_name(f".{src.name}.rename-{os.getpid()}")
+                    self._logger.debug("rename: Разрыв цикла через временное имя '%s'", tmp)
+                    os.rename(src, tmp)
+                    del pending[src]
+                    pending[tmp] = dst
+
+            self._logger.info(f"rename: Успешно переименовано файлов: {len(operations)}")
         except OSError as e:
-            self._logger.exception(f"mv: Ошибка операционной системы во время перемещения '{src_path}' -> '{dst_path}': {e}")
+            self._logger.exception(f"rename: Ошибка операционной системы во время переименования: {e}")
             raise
 
-    def rm(self, target: PathLike[str] | str, recursive: bool = False) -> None:
+        return operations
+
+    def rm(self, target: PathLike[str] | str, recursive: bool = False, workers: int | None = None, defer: bool = False) -> None:
         """
         Функция удаляет файл или каталог и обрабатывает возможные ошибки
         :param target: путь к удаляемому файлу или каталогу
         :param recursive: True/False (рекурсивное удаление каталога/нет)
+        :param workers: количество потоков для параллельного удаления каталога (по умолчанию - число ядер)
+        :param defer: True/False (мгновенно перенести в корзину файловой системы, место освободит purge/удалить сразу)
         :return: функция ничего не возвращает
         """
         path = Path(target)
-        self._logger.info(f"rm: target='{path}', recursive={recursive}")
+        self._logger.info(f"rm: target='{path}', recursive={recursive}, defer={defer}")
 
         path_str = str(target).strip()
         if path_str in {"..", "/"}:
@@ -299,16 +731,28 @@ class WindowsConsoleService(OSConsoleServiceBase):
             raise FileNotFoundError(err)
 
         try:
+            if res.is_dir() and not recursive:
+                err = f"rm: '{path}' является директорией, используйте -r для рекурсивного удаления"
+                self._logger.error(err)
+                raise IsADirectoryError(err)
+
+            if defer:
+                entry = trash.move_to_trash(res)
+                self._logger.info(f"rm: '{res}' перенесено в корзину, id={entry.entry_id}")
+                return
+
             if res.is_dir():
-                if not recursive:
-                    err = f"rm: '{path}' является директорией, используйте -r для рекурсивного удаления"
-                    self._logger.error(err)
-                    raise IsADirectoryError(err)
-                self._logger.debug(f"rm: rmtree '{res}'")
-                shutil.rmtree(res)
+                if parallel_rm.fd_ops_supported():
+                    self._logger.debug(f"rm: Параллельное удаление '{res}', workers={workers}")
+                    removed = parallel_rm.parallel_rmtree(res, workers, on_remove=self._on_remove if self._limiter else None)
+                    self._logger.debug(f"rm: Удалено элементов: {removed}")
+                else:
+                    self._logger.debug(f"rm: rmtree '{res}'")
+                    shutil.rmtree(res)
 
             else:
                 self._logger.debug(f"rm: unlink '{res}'")
+                self._on_remove()
                 res.unlink()
 
             self._logger.info(f"rm: Удалено '{res}'")
@@ -320,47 +764,209 @@ class WindowsConsoleService(OSConsoleServiceBase):
             raise
 
 
-    def zip(self, path: PathLike[str] | str, path_arch: PathLike[str] | str) -> None:
+    def trash_list(self) -> list[TrashEntry]:
+        """
+        Функция возвращает содержимое корзин, заполненных командой rm --defer
+        :return: список записей корзины
+        """
+        entries = trash.list_entries()
+        self._logger.info(f"trash: Записей в корзине: {len(entries)}")
+        return entries
+
+
+    def restore(self, entry_id: str) -> Path:
+        """
+        Функция восстанавливает объект из корзины на исходное место и обрабатывает возможные ошибки
+        :param entry_id: идентификатор записи корзины
+        :return: путь, по которому объект восстановлен
+        """
+        self._logger.info(f"restore: id='{entry_id}'")
+        try:
+            restored = trash.restore_entry(entry_id)
+            self._logger.info(f"restore: Восстановлено '{restored}'")
+            return restored
+        except OSError as e:
+            self._logger.exception(f"restore: Ошибка восстановления '{entry_id}': {e}")
+            raise
+
+
+    def purge(self, older_than: float = 0.0, pause: float = 0.0, workers: int | None = 1) -> int:
+        """
+        Функция окончательно очищает корзины и обрабатывает возможные ошибки
+        :param older_than: очищать только записи старше указанного количества секунд
+        :param pause: пауза в секундах между записями, чтобы не перегружать диск
+        :param workers: количество потоков для удаления одной записи
+        :return: количество очищенных записей
+        """
+        self._logger.info(f"purge: older_than={older_than}, pause={pause}, workers={workers}")
+        try:
+            purged = trash.purge_entries(older_than, pause, workers, on_remove=self._on_remove if self._limiter else None)
+            self._logger.info(f"purge: Очищено записей: {purged}")
+            return purged
+        except OSError as e:
+            self._logger.exception(f"purge: Ошибка очистки корзины: {e}")
+            raise
+
+
+    @staticmethod
+    def _zip_sources(src_dir: Path, *skip: Path) -> Iterator[tuple[Path, str]]:
+        """
+        Функция перечисляет файлы каталога для упаковки вместе с их именами в архиве (сам архив пропускается)
+        :param src_dir: каталог-источник
+        :param skip: пути, которые не нужно добавлять (создаваемый архив и его временный файл)
+        :return: итератор пар (путь к файлу, имя в архиве)
+        """
+        skipped = {i.resolve() for i in skip}
+        for path in src_dir.rglob("*"):
+            if path.is_dir() or path.resolve() in skipped:
+                continue
+            yield path, path.relative_to(src_dir).as_posix()
+
+
+    def _on_zip_member(self, zinfo: ZipInfo) -> None:
+        """
+        Функция учитывает записанный параллельным писателем элемент в ограничителе и прогрессе
+        :param zinfo: описание записанного элемента
+        :return: функция ничего не возвращает
+        """
+        if self._limiter is not None:
+            self._limiter.io(zinfo.file_size)
+        self._advance(zinfo.file_size, 1, zinfo.filename)
+
+
+    def _zip_write(self, zf: ZipFile, sources: Iterable[tuple[Path, str]], workers: int, method: ZipMethod, level: int | None, digests: dict[str, str] | None = None) -> None:
+        """
+        Функция сжимает и записывает файлы в открытый архив последовательно или в пуле процессов
+        :param zf: архив, открытый в режиме 'w'
+        :param sources: пары (путь к файлу, имя в архиве)
+        :param workers: количество процессов (1 - последовательно, 0 - по числу ядер)
+        :param method: способ сжатия
+        :param level: уровень сжатия
+        :param digests: словарь для SHA-256 записанных файлов по именам в архиве (None - не считать)
+        :return: функция ничего не возвращает
+        """
+        if workers != 1:
+            self._logger.debug(f"zip: Параллельное сжатие, workers={workers or os.cpu_count()}")
+            zip_tools.write_parallel(zf, sources, level=level, workers=workers or None, on_member=self._on_zip_member, method=method, digests=digests)
+            return
+        debug = self._logger.isEnabledFor(DEBUG)
+        for path, arcname in sources:
+            zinfo = zip_tools.member_zinfo(path, arcname, method, level, streaming=not zip_compat.is_seekable(zf))
+            if debug:
+                self._logger.debug("zip: Добавляем '%s' как '%s' (compress_type=%s)", path, arcname, zinfo.compress_type)
+            with self._open_read(path) as fsrc, zf.open(zinfo, mode="w") as fdst:
+                reader = HashingReader(fsrc) if digests is not None else fsrc
+                self._copy_stream(reader, fdst)
+            if digests is not None and isinstance(reader, HashingReader):
+                digests[arcname] = reader.digest.hexdigest()
+            self._advance(0, 1, arcname)
+
+
+    def _zip_update(self, src_dir: Path, dst_zip: Path, workers: int, method: ZipMethod, level: int | None, checksums: bool = False) -> None:
+        """
+        Функция обновляет существующий архив: сжатые данные неизменившихся элементов копируются из старого архива
+        как есть, сжимаются только новые и изменённые файлы, элементы удалённых файлов не переносятся.
+        Новый архив пишется во временный файл рядом и атомарно заменяет старый через os.replace
+        :param src_dir: каталог-источник
+        :param dst_zip: путь к существующему архиву
+        :param workers: количество процессов для сжатия изменённых файлов
+        :param method: способ сжатия изменённых файлов
+        :param level: уровень сжатия
+        :param checksums: True/False (записать список SHA-256 файлов/нет); хеши неизменившихся элементов берутся
+            из старого списка, если он есть
+        :return: функция ничего не возвращает
+        """
+        tmp_zip = dst_zip.with_name(f".{dst_zip.name}.{os.getpid()}.tmp")
+        changed: list[tuple[Path, str]] = []
+        digests: dict[str, str] | None = {} if checksums else None
+        reused = 0
+        try:
+            with self._open_read(dst_zip) as fh, zipfile.ZipFile(fh, mode="r") as old_zf, \
+                    zipfile.ZipFile(tmp_zip, mode="w", compression=zip_tools.COMPRESS_TYPES.get(method, zipfile.ZIP_DEFLATED), compresslevel=level) as zf:
+                old_members = {i.filename: i for i in old_zf.infolist() if not i.is_dir()}
+                old_checksums = old_members.pop(CHECKSUMS_NAME, None)
+                old_digests = parse_checksums(old_zf.read(old_checksums)) if checksums and old_checksums is not None else {}
+                debug = self._logger.isEnabledFor(DEBUG)
+                for path, arcname in self._zip_sources(src_dir, dst_zip, tmp_zip):
+                    old = old_members.pop(arcname, None)
+                    zinfo = zip_tools.new_zinfo(path, arcname, zipfile.ZIP_STORED)
+                    if old is None or not zip_tools.member_unchanged(old, zinfo, path):
+                        changed.append((path, arcname))
+                        continue
+                    if debug:
+                        self._logger.debug("zip: Без изменений '%s'", arcname)
+                    zip_tools.reuse_member(zf, old, zinfo, fh)
+                    if digests is not None:
+                        digests[arcname] = old_digests.get(arcname) or file_sha256(path)
+                    reused += 1
+                    self._advance(zinfo.file_size, 1, arcname)
+
+                self._zip_write(zf, changed, workers, method, level, digests)
+                if digests is not None:
+                    zf.writestr(CHECKSUMS_NAME, format_checksums(digests), compress_type=zipfile.ZIP_DEFLATED)
+            os.replace(tmp_zip, dst_zip)
+        except BaseException:
+            tmp_zip.unlink(missing_ok=True)
+            raise
+        self._logger.info(f"zip: Обновление: без изменений {reused}, сжато заново {len(changed)}, удалено {len(old_members)}")
+
+
+    def zip(self, path: PathLike[str] | str, path_arch: PathLike[str] | str, workers: int = 1, method: ZipMethod = ZipMethod.deflate, level: int | None = None, update: bool = False, checksums: bool = False) -> None:
         """
         Функция создаёт zip-архив из указанного каталога средствами стандартной библиотеки и обрабатывает возможные ошибки
         :param path: путь к каталогу (источнику) для упаковки
-        :param path_arch: путь к итоговому zip-файлу
+        :param path_arch: путь к итоговому zip-файлу ('-' - stdout, элементы пишутся с дескрипторами данных)
+        :param workers: количество процессов для параллельного сжатия (1 - последовательно, 0 - по числу ядер)
+        :param method: способ сжатия (auto - несжимаемые файлы хранятся без сжатия, остальные сжимаются deflate)
+        :param level: уровень сжатия 0-9 (None - по умолчанию для выбранного способа)
+        :param update: True/False (обновить существующий архив, сжимая только изменившиеся файлы/создать заново)
+        :param checksums: True/False (записать в архив список SHA-256 файлов .sha256sums для verify/нет)
         :return: функция ничего не возвращает
         """
         src_dir = Path(path)
         dst_zip = Path(path_arch)
         self._logger.info(f"zip: Изначальная папка: '{src_dir.resolve()}', архивированная: '{dst_zip.resolve()}'")
-        try:
-            if not src_dir.exists():
-                err = f"zip: Источник не найден: '{src_dir}'"
-                self._logger.error(err)
-                raise FileNotFoundError(err)
-
-            if not src_dir.is_dir():
-                err = f"zip: Источник не каталог: '{src_dir}'"
-                self._logger.error(err)
-                raise NotADirectoryError(err)
-
-            dst_zip.parent.mkdir(parents=True, exist_ok=True)
+        with self._track("zip", src_dir):
+            try:
+                if not src_dir.exists():
+                    err = f"zip: Источник не найден: '{src_dir}'"
+                    self._logger.error(err)
+                    raise FileNotFoundError(err)
 
-            with zipfile.ZipFile(dst_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for path in src_dir.rglob("*"):
-                    arcname = path.relative_to(src_dir)
-                    if path.is_dir():
-                        continue
-                    self._logger.debug(f"zip: Добавляем '{path}' как '{arcname}'")
-                    zf.write(path, arcname)
-            self._logger.info(f"zip: Готово -> '{dst_zip.resolve()}'")
-        except Exception:
-            self._logger.exception("zip: Ошибка при создании архива")
-            raise
+                if not src_dir.is_dir():
+                    err = f"zip: Источник не каталог: '{src_dir}'"
+                    self._logger.error(err)
+                    raise NotADirectoryError(err)
 
+                to_stdout = is_stdio(path_arch)
+                if to_stdout and update:
+                    err = "zip: Обновление архива невозможно при записи в stdout"
+                    self._logger.error(err)
+                    raise ValueError(err)
+                if not to_stdout:
+                    dst_zip.parent.mkdir(parents=True, exist_ok=True)
 
-    def unzip(self, path_arch: PathLike[str] | str, res: PathLike[str] | str | None = None) -> None:
+                if update and dst_zip.is_file():
+                    self._zip_update(src_dir, dst_zip, workers, method, level, checksums)
+                else:
+                    digests: dict[str, str] | None = {} if checksums else None
+                    with zipfile.ZipFile(sys.stdout.buffer if to_stdout else dst_zip, mode="w", compression=zip_tools.COMPRESS_TYPES.get(method, zipfile.ZIP_DEFLATED), compresslevel=level) as zf:
+                        self._zip_write(zf, self._zip_sources(src_dir, dst_zip), workers, method, level, digests)
+                        if digests is not None:
+                            zf.writestr(CHECKSUMS_NAME, format_checksums(digests), compress_type=zipfile.ZIP_DEFLATED)
+                self._logger.info(f"zip: Готово -> '{dst_zip.resolve()}'")
+            except Exception:
+                self._logger.exception("zip: Ошибка при создании архива")
+                raise
+
+
+    def unzip(self, path_arch: PathLike[str] | str, res: PathLike[str] | str | None = None, workers: int = 1, members: list[str] | None = None) -> None:
         """
         Функция распаковывает zip-архив в указанную директорию и обрабатывает возможные ошибки
-        :param path_arch: путь к zip-архиву
+        :param path_arch: путь к zip-архиву ('-' - stdin, архив читается последовательно по локальным заголовкам)
         :param res: папка назначения; если None — используется текущая рабочая директория
+        :param workers: количество потоков для параллельной распаковки (1 - последовательно, 0 - по числу ядер)
+        :param members: имена и glob-шаблоны элементов для распаковки (None - весь архив)
         :return: функция ничего не возвращает
         """
         src_zip = Path(path_arch)
@@ -372,58 +978,340 @@ class WindowsConsoleService(OSConsoleServiceBase):
 
         self._logger.info(f"unzip: Изначальный архив: '{src_zip.resolve()}', папка назначения: '{dst_dir.resolve()}'")
 
-        try:
-            if not src_zip.exists():
-                err = f"unzip: Архив не найден: '{src_zip}'"
-                self._logger.error(err)
-                raise FileNotFoundError(err)
-
-            dst_dir.mkdir(parents=True, exist_ok=True)
-
-            with zipfile.ZipFile(src_zip, mode="r") as zf:
-                zf.extractall(dst_dir)
-            self._logger.info(f"unzip: Готово -> '{dst_dir.resolve()}'")
-        except Exception:
-            self._logger.exception("unzip: Ошибка при распаковке архива")
-            raise
-
-
-    def tar_dir(self, path_file: PathLike[str] | str, path_arch: PathLike[str] | str) -> None:
+        with self._track("unzip") as tracker:
+            try:
+                from_stdin = is_stdio(path_arch)
+                if not from_stdin and not src_zip.exists():
+                    err = f"unzip: Архив не найден: '{src_zip}'"
+                    self._logger.error(err)
+                    raise FileNotFoundError(err)
+
+                dst_dir.mkdir(parents=True, exist_ok=True)
+
+                if from_stdin:
+                    if workers != 1:
+                        self._logger.warning("unzip: Архив из stdin распаковывается последовательно")
+                    zip_tools.extract_stream(self._stdin(), dst_dir, members, on_member=lambda name, size: self._advance(size, 1, name))
+                    self._logger.info(f"unzip: Готово -> '{dst_dir.resolve()}'")
+                    return
+
+                with self._open_read(src_zip) as fh, zipfile.ZipFile(fh, mode="r") as zf:
+                    selected = zf.infolist()
+                    if members:
+                        selected = list(select_members(selected, members, lambda m: (m.filename, m.is_dir())))
+                        self._logger.debug(f"unzip: Выбрано элементов: {len(selected)}")
+                    tracker.bytes_total = sum(m.file_size for m in selected)
+                    tracker.files_total = sum(1 for m in selected if not m.is_dir())
+                    if workers == 1:
+                        zf.extractall(dst_dir, members=self._tracked_members(selected, lambda m: (m.file_size, int(not m.is_dir()), m.filename)))
+                if workers != 1:
+                    self._logger.debug(f"unzip: Параллельная распаковка, workers={workers or os.cpu_count()}")
+                    zip_tools.extract_parallel(lambda: self._open_read(src_zip), selected, dst_dir, workers=workers or None, on_member=lambda m: tracker.advance(m.file_size, 1, m.filename))
+                self._logger.info(f"unzip: Готово -> '{dst_dir.resolve()}'")
+            except Exception:
+                self._logger.exception("unzip: Ошибка при распаковке архива")
+                raise
+
+
+    def tar_dir(self, path_file: PathLike[str] | str, path_arch: PathLike[str] | str, index: bool = False, workers: int = 1, codec: TarCodec | None = None, level: int | None = None, incremental: PathLike[str] | str | None = None, checksums: bool = False) -> None:
         """
-        Функция создаёт tar.gz архив из указанного каталога с помощью tarfile и обрабатывает возможные ошибки
+        Функция создаёт tar-архив из указанного каталога с помощью tarfile и обрабатывает возможные ошибки.
+        gz сжимается блоками (каждый блок - отдельный gzip-член), поэтому по индексу можно распаковать
+        отдельный элемент, не распаковывая архив с начала
         :param path_file: путь к каталогу‑источнику для упаковки
-        :param path_arch: путь к результирующему tar.gz архиву (может быть относительным или абсолютным)
+        :param path_arch: путь к результирующему архиву (может быть относительным или абсолютным; '-' - stdout)
+        :param index: True/False (записать рядом индекс archive.tar.gz.idx/нет; только для gz)
+        :param workers: количество процессов для сжатия блоков (1 - последовательно, 0 - по числу ядер; только для gz)
+        :param codec: способ сжатия (None - по расширению path_arch)
+        :param level: уровень сжатия 0-9 (None - по умолчанию для выбранного способа)
+        :param incremental: путь к файлу снимка; если он есть, в архив попадают только изменения с прошлого запуска
+            и список удалённых элементов, после успешной записи снимок обновляется (None - обычный архив)
+        :param checksums: True/False (записать последним элементом список SHA-256 файлов .sha256sums для verify/нет)
         :return: функция ничего не возвращает
         """
 
         src_dir = Path(path_file)
         dst_tar = Path(path_arch)
-        self._logger.info(f"tar: Начальная папка: '{src_dir.resolve()}', архив: '{dst_tar.resolve()}'")
+        to_stdout = is_stdio(path_arch)
+        codec = codec or tar_tools.codec_from_name(path_arch)
+        self._logger.info(f"tar: Начальная папка: '{src_dir.resolve()}', архив: '{dst_tar.resolve()}', сжатие: {codec.value}")
+
+        with self._track("tar", src_dir):
+            try:
+                if not src_dir.exists():
+                    err = f"tar: Источник не найден: '{src_dir}'"
+                    self._logger.error(err)
+                    raise FileNotFoundError(err)
+                if not src_dir.is_dir():
+                    err = f"tar: Источник не каталог: '{src_dir}'"
+                    self._logger.error(err)
+                    raise NotADirectoryError(err)
+                if index and (codec != TarCodec.gz or to_stdout):
+                    err = "tar: Индекс поддерживается только для gz-архива в файле"
+                    self._logger.error(err)
+                    raise ValueError(err)
+
+                previous = None
+                if incremental is not None:
+                    previous = tar_tools.load_snapshot(incremental)
+                    if previous is None:
+                        self._logger.info(f"tar: Снимок '{incremental}' не найден, создаётся полный архив")
+                        previous = {}
+
+                digests: dict[str, str] | None = {} if checksums else None
+
+                def add_tree(tf: TarFile) -> dict[str, list[int]] | None:
+                    snapshot = self._tar_add_tree(tf, src_dir, src_dir.name, previous, digests)
+                    if digests is not None:
+                        tar_tools.add_bytes(tf, CHECKSUMS_NAME, format_checksums(digests))
+                    return snapshot
+
+                if not to_stdout:
+                    dst_tar.parent.mkdir(parents=True, exist_ok=True)
+                if codec == TarCodec.gz:
+                    if workers != 1:
+                        self._logger.debug(f"tar: Параллельное сжатие, workers={workers or os.cpu_count()}")
+                    gz_level = 9 if level is None else level
+                    with contextlib.nullcontext(sys.stdout.buffer) if to_stdout else open(dst_tar, "wb") as raw, \
+                            tar_tools.BlockGzipWriter(raw, gz_level, name=None if to_stdout else os.path.abspath(dst_tar), workers=workers) as gz, \
+                            tarfile.open(fileobj=gz, mode="w") as tf:
+                        current = add_tree(tf)
+                        members = tf.getmembers()
+                    if index:
+                        idx = tar_tools.save_index(dst_tar, gz.checkpoints, members)
+                        self._logger.info(f"tar: Индекс -> '{idx.resolve()}'")
+                else:
+                    if workers != 1:
+                        self._logger.warning(f"tar: Параллельное сжатие поддерживается только для gz, '{codec.value}' сжимается в одном процессе")
+                    if to_stdout:
+                        with tar_tools.open_compressed_stream(sys.stdout.buffer, codec, level) as stream, tarfile.open(fileobj=stream, mode="w|") as tf:
+                            current = add_tree(tf)
+                    else:
+                        mode = "w:" if codec == TarCodec.none else f"w:{codec.value}"
+                        with tarfile.open(dst_tar, mode=mode, **tar_tools.open_kwargs(codec, level)) as tf:
+                            current = add_tree(tf)
+                if current is not None and incremental is not None:
+                    tar_tools.save_snapshot(incremental, current)
+                    self._logger.info(f"tar: Снимок -> '{Path(incremental).resolve()}'")
+                self._logger.info(f"tar: Готово -> '{dst_tar.resolve()}'")
+            except Exception:
+                self._logger.exception("tar: Ошибка при создании архива")
+                raise
+
 
+    def tar_index(self, path_arch: PathLike[str] | str) -> Path:
+        """
+        Функция строит индекс для существующего tar.gz архива за один последовательный проход
+        :param path_arch: путь к tar.gz архиву
+        :return: путь к файлу индекса
+        """
+        src_tar = Path(path_arch)
+        self._logger.info(f"tar-index: '{src_tar.resolve()}'")
         try:
-            if not src_dir.exists():
-                err = f"tar: Источник не найден: '{src_dir}'"
+            if not src_tar.exists():
+                err = f"tar-index: Архив не найден: '{src_tar}'"
                 self._logger.error(err)
                 raise FileNotFoundError(err)
-            if not src_dir.is_dir():
-                err = f"tar: Источник не каталог: '{src_dir}'"
-                self._logger.error(err)
-                raise NotADirectoryError(err)
-
-            dst_tar.parent.mkdir(parents=True, exist_ok=True)
-            with tarfile.open(dst_tar, mode="w:gz") as tf:
-                tf.add(src_dir, arcname=src_dir.name)
-                self._logger.info(f"tar: Готово -> '{dst_tar.resolve()}'")
+            with self._open_read(src_tar) as fh:
+                checkpoints, members = tar_tools.build_index(fh)
+            if len(checkpoints) == 1:
+                self._logger.warning(f"tar-index: Архив '{src_tar}' сжат одним gzip-потоком, индекс не сократит распаковку")
+            idx = tar_tools.save_index(src_tar, checkpoints, members)
+            self._logger.info(f"tar-index: Готово -> '{idx.resolve()}', контрольных точек: {len(checkpoints)}")
+            return idx
         except Exception:
-            self._logger.exception("tar: Ошибка при создании архива")
+            self._logger.exception("tar-index: Ошибка при построении индекса")
             raise
 
 
-    def untar(self, path_archive_tar_gz: PathLike[str] | str, res: PathLike[str] | str | None = None) -> None:
+    def _untar_indexed(self, src_tar: Path, dst_dir: Path, index: TarIndex, members: list[str]) -> None:
+        """
+        Функция распаковывает выбранные элементы по индексу: для каждого элемента распаковка начинается
+        с ближайшей контрольной точки перед его заголовком
+        :param src_tar: путь к архиву
+        :param dst_dir: папка назначения
+        :param index: индекс архива
+        :param members: имена и glob-шаблоны элементов
+        :return: функция ничего не возвращает
+        """
+        manifests = [m for m in index.members if m[0] == tar_tools.INCREMENTAL_MANIFEST]
+        entries = [m for m in index.members if m[0] != tar_tools.INCREMENTAL_MANIFEST]
+        selected = sorted(select_members(entries, members, lambda m: (m[0], m[2])), key=lambda m: m[1])
+        self._logger.debug(f"untar: Распаковка по индексу, элементов: {len(selected)}")
+        with self._open_read(src_tar) as fh:
+            # список удалённых элементов инкрементального архива применяется до извлечения, как в потоковой распаковке
+            for name, offset, _ in manifests + selected:
+                with tarfile.open(fileobj=tar_tools.open_at(fh, index, offset), mode="r|") as tf:
+                    member = tf.next()
+                    if member is None or member.name != name:
+                        raise tarfile.ReadError(f"Индекс не соответствует архиву '{src_tar}'")
+                    if name == tar_tools.INCREMENTAL_MANIFEST:
+                        self._apply_manifest(tf, member, dst_dir, members)
+                        continue
+                    tf.extract(member, dst_dir, filter="data")
+                self._advance(member.size, int(member.isreg()), member.name)
+
+
+    def _tar_walk(self, src_dir: Path, arcname: str, skip: str | None = None) -> Iterator[tuple[Path, str]]:
+        """
+        Функция обходит каталог в глубину в порядке имён (каталог идёт раньше своего содержимого). Тип элемента
+        берётся из os.scandir без дополнительных stat; ссылки на каталоги не раскрываются
+        :param src_dir: путь к каталогу
+        :param arcname: имя каталога внутри архива
+        :param skip: абсолютный путь, который нужно пропустить (сам архив, если он пишется внутрь каталога)
+        :return: итератор по парам (путь, имя в архиве)
+        """
+        stack = [(src_dir, arcname, not src_dir.is_symlink())]
+        while stack:
+            path, name, is_dir = stack.pop()
+            if skip is not None and os.path.abspath(path) == skip:
+                continue
+            yield path, name
+            if is_dir:
+                with os.scandir(path) as it:
+                    children = sorted(it, key=lambda e: e.name, reverse=True)
+                stack.extend((path / e.name, f"{name}/{e.name}", e.is_dir(follow_symlinks=False)) for e in children)
+
+
+    def _tar_add(self, tf: TarFile, path: Path, name: str, digests: dict[str, str] | None = None) -> None:
+        """
+        Функция добавляет один элемент в tar-архив (без содержимого каталога), читая файл через _open_read,
+        чтобы на данные распространялся ограничитель ввода-вывода
+        :param tf: открытый на запись tar-архив
+        :param path: путь к элементу
+        :param name: имя элемента в архиве
+        :param digests: словарь для SHA-256 записанных файлов по именам в архиве (None - не считать)
+        :return: функция ничего не возвращает
+        """
+        tarinfo = tf.gettarinfo(path, name)
+        if tarinfo is None:
+            self._logger.warning("tar: Пропущен файл неподдерживаемого типа '%s'", path)
+            return
+        tarinfo.offset = tf.offset  # при записи tarfile не заполняет offset, а он нужен для индекса
+        if tarinfo.isreg():
+            with self._open_read(path) as fh:
+                reader = HashingReader(fh) if digests is not None else fh
+                tf.addfile(tarinfo, reader)
+            if digests is not None and isinstance(reader, HashingReader):
+                digests[name] = reader.digest.hexdigest()
+            self._advance(tarinfo.size, 1, name)
+        else:
+            tf.addfile(tarinfo)
+
+
+    def _tar_add_tree(self, tf: TarFile, src_dir: Path, arcname: str, previous: dict[str, list[int]] | None = None, digests: dict[str, str] | None = None) -> dict[str, list[int]] | None:
+        """
+        Функция добавляет каталог в tar-архив рекурсивно (как tf.add). Если передан снимок прошлого запуска,
+        архив инкрементальный: первым пишется список удалённых элементов, затем все каталоги и только новые
+        или изменившиеся (по inode, времени изменения и размеру) файлы
+        :param tf: открытый на запись tar-архив
+        :param src_dir: путь к каталогу
+        :param arcname: имя каталога внутри архива
+        :param previous: снимок прошлого запуска (None - обычный архив, пустой словарь - полный инкрементальный)
+        :param digests: словарь для SHA-256 записанных файлов по именам в архиве (None - не считать)
+        :return: снимок текущего запуска (None для обычного архива)
+        """
+        skip = os.fsdecode(tf.name) if tf.name is not None else None
+        if previous is None:
+            for path, name in self._tar_walk(src_dir, arcname, skip):
+                self._tar_add(tf, path, name, digests)
+            return None
+
+        current: dict[str, list[int]] = {}
+        changed: list[tuple[Path, str]] = []
+        for path, name in self._tar_walk(src_dir, arcname, skip):
+            st = os.lstat(path)
+            current[name] = tar_tools.snapshot_entry(st)
+            if not stat_module.S_ISREG(st.st_mode) or previous.get(name) != current[name]:
+                changed.append((path, name))
+        deleted = tar_tools.deleted_entries(previous, current)
+        tar_tools.add_manifest(tf, deleted)
+        for path, name in changed:
+            self._tar_add(tf, path, name, digests)
+        self._logger.info(f"tar: Инкрементальный архив: добавлено {len(changed)} из {len(current)}, удалено {len(deleted)}")
+        return current
+
+
+    def _remove_deleted(self, dst_dir: Path, name: str) -> None:
+        """
+        Функция удаляет из папки назначения элемент, удалённый с прошлого инкрементального архива
+        :param dst_dir: папка назначения
+        :param name: имя элемента в архиве
+        :return: функция ничего не возвращает
+        """
+        root = os.path.abspath(dst_dir)
+        target = os.path.abspath(os.path.join(root, name))
+        if os.path.commonpath([root, target]) != root or target == root:
+            self._logger.warning(f"untar: Пропущено удаление вне папки назначения: '{name}'")
+            return
+        if os.path.isdir(target) and not os.path.islink(target):
+            shutil.rmtree(target)
+        elif os.path.lexists(target):
+            os.unlink(target)
+        else:
+            return
+        self._logger.debug("untar: Удалён '%s'", name)
+
+
+    def _replay_deletions(self, tf: TarFile, dst_dir: Path, members: list[str] | None) -> Iterator[TarInfo]:
+        """
+        Функция пропускает через себя элементы архива и, встретив список удалённых элементов инкрементального
+        архива, удаляет их из папки назначения (при выборочной распаковке - только подходящие под шаблоны)
+        :param tf: открытый на чтение tar-архив
+        :param dst_dir: папка назначения
+        :param members: имена и glob-шаблоны выбранных элементов (None - весь архив)
+        :return: итератор по остальным элементам
+        """
+        for member in tf:
+            if member.name != tar_tools.INCREMENTAL_MANIFEST:
+                yield member
+                continue
+            self._apply_manifest(tf, member, dst_dir, members)
+
+
+    def _apply_manifest(self, tf: TarFile, member: TarInfo, dst_dir: Path, members: list[str] | None) -> None:
+        """
+        Функция читает список удалённых элементов инкрементального архива и удаляет их из папки назначения
+        (при выборочной распаковке - только подходящие под шаблоны)
+        :param tf: открытый на чтение tar-архив
+        :param member: элемент INCREMENTAL_MANIFEST
+        :param dst_dir: папка назначения
+        :param members: имена и glob-шаблоны выбранных элементов (None - весь архив)
+        :return: функция ничего не возвращает
         """
-        Функция распаковывает tar.gz архив в указанную директорию и обрабатывает ошибки
-        :param path_archive_tar_gz: путь к tar.gz архиву
+        extracted = tf.extractfile(member)
+        if extracted is None:
+            raise tarfile.ReadError("Повреждён список удалённых элементов")
+        for name in tar_tools.read_manifest(extracted.read()):
+            if members is None or any(member_matches(name, p) for p in members):
+                self._remove_deleted(dst_dir, name)
+
+
+    def _tracked_members(self, members: Iterable[T], describe: Callable[[T], tuple[int, int, str]]) -> Iterator[T]:
+        """
+        Функция передаёт элементы архива в extractall и сообщает о прогрессе, когда extractall запрашивает следующий
+        элемент (то есть после распаковки предыдущего)
+        :param members: элементы архива (ZipInfo или TarInfo)
+        :param describe: функция, возвращающая размер, количество файлов (0 для каталогов) и имя элемента
+        :return: итератор по тем же элементам
+        """
+        previous: T | None = None
+        for member in members:
+            if previous is not None:
+                self._advance(*describe(previous))
+            yield member
+            previous = member
+        if previous is not None:
+            self._advance(*describe(previous))
+
+
+    def untar(self, path_archive_tar_gz: PathLike[str] | str, res: PathLike[str] | str | None = None, members: list[str] | None = None) -> None:
+        """
+        Функция распаковывает tar-архив в указанную директорию и обрабатывает ошибки.
+        Способ сжатия (без сжатия, gz, bz2, xz) определяется по содержимому архива
+        :param path_archive_tar_gz: путь к tar-архиву ('-' - stdin, архив читается как поток)
         :param res: папка назначения; если None — используется текущая рабочая директория
+        :param members: имена и glob-шаблоны элементов для распаковки (None - весь архив)
         :return: функция ничего не возвращает
         """
         src_tar = Path(path_archive_tar_gz)
@@ -432,20 +1320,184 @@ class WindowsConsoleService(OSConsoleServiceBase):
         else:
             dst_dir = Path.cwd()
         self._logger.info(f"untar: Изначальный архив: '{src_tar.resolve()}', dest='{dst_dir.resolve()}'")
+        with self._track("untar"):
+            try:
+                from_stdin = is_stdio(path_archive_tar_gz)
+                if not from_stdin and not src_tar.exists():
+                    err = f"untar: Архив не найден: '{src_tar}'"
+                    self._logger.error(err)
+                    raise FileNotFoundError(err)
+                dst_dir.mkdir(parents=True, exist_ok=True)
+                index = tar_tools.load_index(src_tar) if members and not from_stdin else None
+                if members and index is not None:
+                    self._untar_indexed(src_tar, dst_dir, index, members)
+                else:
+                    with contextlib.nullcontext(self._stdin()) if from_stdin else self._open_read(src_tar) as fh, \
+                            tar_tools.open_stream(fh) if from_stdin else tarfile.open(fileobj=fh, mode="r:*") as tf:
+                        selected: Iterable[TarInfo] = self._replay_deletions(tf, dst_dir, members)
+                        if members:
+                            selected = select_members(selected, members, lambda m: (m.name, m.isdir()))
+                        tf.extractall(dst_dir, members=self._tracked_members(selected, lambda m: (m.size, int(m.isreg()), m.name)), filter="data")
+                self._logger.info(f"untar: Готово -> '{dst_dir.resolve()}'")
+            except Exception:
+                self._logger.exception("untar: Ошибка при распаковке архива")
+                raise
+
+
+    def untar_chain(self, paths: list[PathLike[str] | str], res: PathLike[str] | str | None = None) -> None:
+        """
+        Функция восстанавливает каталог из цепочки инкрементальных архивов: полный архив и за ним все
+        инкрементальные по порядку создания; удаления из каждого архива применяются до извлечения его файлов
+        :param paths: пути к архивам цепочки (от полного к последнему)
+        :param res: папка назначения; если None — используется текущая рабочая директория
+        :return: функция ничего не возвращает
+        """
+        if not paths:
+            err = "untar: Не указаны архивы цепочки"
+            self._logger.error(err)
+            raise ValueError(err)
+        for number, path in enumerate(paths, 1):
+            self._logger.info(f"untar: Архив цепочки {number}/{len(paths)}: '{path}'")
+            self.untar(path, res)
+
+
+    def zip_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        """
+        Функция выводит содержимое zip-архива. Читается только центральный каталог, данные элементов не затрагиваются
+        :param path_arch: путь к zip-архиву
+        :return: список элементов архива
+        """
+        src_zip = Path(path_arch)
+        self._logger.info(f"zip --list: '{src_zip.resolve()}'")
         try:
-            if not src_tar.exists():
-                err = f"untar: Архив не найден: '{src_tar}'"
+            if not src_zip.exists():
+                err = f"zip: Архив не найден: '{src_zip}'"
+                self._logger.error(err)
+                raise FileNotFoundError(err)
+            with zipfile.ZipFile(src_zip, mode="r") as zf:
+                return [
+                    ArchiveMember(m.filename, m.file_size, m.compress_size, time.mktime(m.date_time + (0, 0, -1)), m.is_dir())
+                    for m in zf.infolist()
+                ]
+        except Exception:
+            self._logger.exception("zip: Ошибка при чтении оглавления архива")
+            raise
+
+
+    def tar_list(self, path_arch: PathLike[str] | str) -> list[ArchiveMember]:
+        """
+        Функция выводит содержимое tar-архива (любого поддерживаемого сжатия), последовательно читая заголовки
+        элементов и пропуская их данные
+        :param path_arch: путь к tar-архиву ('-' - stdin)
+        :return: список элементов архива
+        """
+        src_tar = Path(path_arch)
+        self._logger.info(f"tar --list: '{src_tar.resolve()}'")
+        try:
+            from_stdin = is_stdio(path_arch)
+            if not from_stdin and not src_tar.exists():
+                err = f"tar: Архив не найден: '{src_tar}'"
                 self._logger.error(err)
                 raise FileNotFoundError(err)
-            dst_dir.mkdir(parents=True, exist_ok=True)
-            with tarfile.open(src_tar, mode="r:gz") as tf:
-                tf.extractall(dst_dir)
-            self._logger.info(f"untar: Готово -> '{dst_dir.resolve()}'")
+            with contextlib.nullcontext(self._stdin()) if from_stdin else self._open_read(src_tar) as fh, tar_tools.open_stream(fh) as tf:
+                return [ArchiveMember(m.name, m.size, None, m.mtime, m.isdir()) for m in tf]
         except Exception:
-            self._logger.exception("untar: Ошибка при распаковке архива")
+            self._logger.exception("tar: Ошибка при чтении оглавления архива")
             raise
 
 
+    def _verify_zip(self, src_zip: Path, workers: int, tracker: ProgressTracker) -> VerifyReport:
+        """
+        Функция проверяет zip-архив: CRC-32 всех элементов и, если в архиве есть список .sha256sums, их SHA-256
+        :param src_zip: путь к архиву
+        :param workers: количество потоков (0 - по числу ядер)
+        :param tracker: счётчик прогресса операции (общий для рабочих потоков)
+        :return: результат проверки
+        """
+        corrupt: list[tuple[str, str]] = []
+        expected: dict[str, str] | None = None
+        with self._open_read(src_zip) as fh, zipfile.ZipFile(fh, mode="r") as zf:
+            members = [m for m in zf.infolist() if not m.is_dir() and m.filename != CHECKSUMS_NAME]
+            if CHECKSUMS_NAME in zf.NameToInfo:
+                try:
+                    expected = parse_checksums(zf.read(CHECKSUMS_NAME))
+                except (zipfile.BadZipFile, zlib.error, ValueError) as e:
+                    corrupt.append((CHECKSUMS_NAME, str(e)))
+        self._logger.debug(f"verify: Элементов: {len(members)}, список SHA-256: {'есть' if expected is not None else 'нет'}")
+        corrupt.extend(zip_tools.verify_parallel(lambda: self._open_read(src_zip), members, workers or None, expected,
+                                       on_member=lambda zinfo: tracker.advance(zinfo.file_size, 1, zinfo.filename)))
+        if expected is not None:
+            names = {m.filename for m in members}
+            corrupt.extend((name, "отсутствует в архиве") for name in sorted(expected) if name not in names)
+        return VerifyReport(len(members), corrupt, expected is not None)
+
+
+    def _verify_tar(self, src_tar: Path, tracker: ProgressTracker) -> VerifyReport:
+        """
+        Функция проверяет tar-архив за один последовательный проход: контрольные суммы заголовков проверяет tarfile,
+        CRC-32 gzip-членов и целостность bz2/xz - распаковщик; если в архиве есть список .sha256sums
+        (он пишется последним), с ним сверяются SHA-256 файлов. После повреждения сжатого потока
+        дальнейшее чтение невозможно, проверка прекращается
+        :param src_tar: путь к архиву
+        :param tracker: счётчик прогресса операции
+        :return: результат проверки
+        """
+        corrupt: list[tuple[str, str]] = []
+        expected: dict[str, str] | None = None
+        digests: dict[str, str] = {}
+        current = src_tar.name
+        try:
+            with self._open_read(src_tar) as fh, tar_tools.open_stream(fh) as tf:
+                for member in tf:
+                    current = member.name
+                    extracted = tf.extractfile(member) if member.isreg() else None
+                    if extracted is None:
+                        continue
+                    if member.name == CHECKSUMS_NAME:
+                        expected = parse_checksums(extracted.read())
+                        continue
+                    digest = hashlib.sha256()
+                    while chunk := extracted.read(tar_tools.READ_SIZE):
+                        digest.update(chunk)
+                    digests[member.name] = digest.hexdigest()
+                    tracker.advance(member.size, 1, member.name)
+        except (tarfile.TarError, zlib.error, lzma.LZMAError, EOFError, OSError, ValueError) as e:
+            corrupt.append((current, f"архив повреждён, проверка прервана: {e}"))
+        if expected is not None:
+            corrupt.extend((name, "SHA-256 не совпадает") for name, digest in digests.items() if name in expected and expected[name] != digest)
+            corrupt.extend((name, "нет в списке SHA-256") for name in digests if name not in expected)
+            corrupt.extend((name, "отсутствует в архиве") for name in sorted(expected) if name not in digests)
+        return VerifyReport(len(digests), corrupt, expected is not None)
+
+
+    def verify(self, path_arch: PathLike[str] | str, workers: int = 0) -> VerifyReport:
+        """
+        Функция проверяет целостность zip- или tar-архива без записи на диск: элементы распаковываются в память
+        блоками и сверяются с CRC-32 (и с SHA-256, если архив создан с --checksums). Формат определяется по содержимому
+        :param path_arch: путь к архиву
+        :param workers: количество потоков для zip (1 - последовательно, 0 - по числу ядер); tar проверяется в одном потоке
+        :return: результат проверки с перечнем повреждённых элементов
+        """
+        src = Path(path_arch)
+        self._logger.info(f"verify: '{src.resolve()}'")
+        with self._track("verify") as tracker:
+            try:
+                if not src.is_file():
+                    err = f"verify: Архив не найден: '{src}'"
+                    self._logger.error(err)
+                    raise FileNotFoundError(err)
+                with self._open_read(src) as fh:
+                    is_zip = zipfile.is_zipfile(fh)
+                report = self._verify_zip(src, workers, tracker) if is_zip else self._verify_tar(src, tracker)
+                for name, error in report.corrupt:
+                    self._logger.error("verify: '%s': %s", name, error)
+                self._logger.info(f"verify: Проверено {report.checked}, повреждено {len(report.corrupt)}")
+                return report
+            except Exception:
+                self._logger.exception("verify: Ошибка при проверке архива")
+                raise
+
+
     def grep(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> list[str]:
         """
         Функция совершает поиск строк по регулярному выражению в файлах и обрабатывает возможные ошибки
@@ -455,6 +1507,19 @@ class WindowsConsoleService(OSConsoleServiceBase):
         :param ignore_case: True/False (поиск без учёта регистра/нет)
         :return: список строк с найденными совпадениями
         """
+        return list(self.grep_iter(pattern, path, r, ignore_case))
+
+
+    def grep_iter(self, pattern: str, path: PathLike[str] | str, r: bool, ignore_case: bool) -> Iterator[str]:
+        """
+        Функция компилирует регулярное выражение и возвращает совпадения по мере чтения файлов: ни список файлов,
+        ни список совпадений не накапливаются в памяти
+        :param pattern: регулярное выражение для поиска
+        :param path: файл или каталог, в котором будет производиться поиск
+        :param r: True/False (рекурсивный обход подкаталогов, если указан каталог/нет)
+        :param ignore_case: True/False (поиск без учёта регистра/нет)
+        :return: итератор по строкам с найденными совпадениями
+        """
         logger = self._logger
         flags: re.RegexFlag
         if ignore_case:
@@ -466,29 +1531,54 @@ class WindowsConsoleService(OSConsoleServiceBase):
         except re.error as e:
             logger.error(f"grep: Ошибка компиляции regex: {e}")
             raise
+        return self._grep_matches(rgx, Path(path), r, ignore_case)
 
-        base = Path(path)
-        files: list[Path] = []
-        if base.is_file():
-            files = [base]
-        else:
-            if r:
-                for p in base.rglob('*'):
-                    if p.is_file():
-                        files.append(p)
-            else:
-                for p in base.glob('*'):
-                    if p.is_file():
-                        files.append(p)
 
-        results: list[str] = []
-        for file_path in files:
+    def _grep_matches(self, rgx: re.Pattern[str], base: Path, r: bool, ignore_case: bool) -> Iterator[str]:
+        """
+        Функция ищет совпадения в файлах по одному. При бюджете памяти строки читаются кусками не длиннее
+        буфера (совпадение, разрезанное границей куска, не будет найдено; номер строки считается по концам строк,
+        а не по кускам), а RSS проверяется каждые CHECK_EVERY кусков
+        :param rgx: скомпилированное регулярное выражение
+        :param base: файл или каталог
+        :param r: True/False (рекурсивный обход подкаталогов/нет)
+        :param ignore_case: True/False (поиск без учёта регистра/нет)
+        :return: итератор по строкам с найденными совпадениями
+        """
+        logger = self._logger
+        limit = self._buffer_size(self.COPY_BUFSIZE) if self._memory_budget is not None else -1
+        found = 0
+        for file_path, dir_fd in self._grep_files(base, r):
             try:
-                with file_path.open(encoding='utf-8', errors='ignore') as fh:
-                    for ln, line in enumerate(fh, 1):
+                raw = self._open_sequential(file_path if dir_fd is None else file_path.name, dir_fd)
+                with io.TextIOWrapper(raw, encoding='utf-8', errors='ignore') as fh:
+                    lines = iter(lambda: fh.readline(limit), "") if limit > 0 else fh
+                    ln = 1
+                    for count, line in enumerate(lines, 1):
+                        if count % CHECK_EVERY == 0:
+                            self._check_memory("grep")
                         if rgx.search(line):
-                            results.append(f"{file_path}:{ln}:{line.strip()}")
+                            found += 1
+                            yield f"{file_path}:{ln}:{line.strip()}"
+                        if line.endswith("\n"):
+                            ln += 1
+            except MemoryError:
+                raise
             except Exception as e:
-                logger.error(f"grep: Ошибка чтения файла {file_path}: {e}")
-        logger.info(f"grep: pattern={pattern}, path={base}, recursive={r}, ignore_case={ignore_case}, results={len(results)}")
-        return results
+                logger.error("grep: Ошибка чтения файла %s: %s", file_path, e)
+        logger.info(f"grep: pattern={rgx.pattern}, path={base}, recursive={r}, ignore_case={ignore_case}, results={found}")
+
+
+    def _grep_files(self, base: Path, r: bool) -> Iterator[tuple[Path, int | None]]:
+        """
+        Функция перечисляет файлы для grep
+        :param base: файл или каталог
+        :param r: True/False (рекурсивный обход подкаталогов/нет)
+        :return: итератор по парам (путь к файлу, дескриптор его каталога или None)
+        """
+        if base.is_file():
+            yield base, None
+            return
+        for p in base.rglob('*') if r else base.glob('*'):
+            if p.is_file():
+                yield p, None
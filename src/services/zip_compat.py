@@ -0,0 +1,159 @@
+import struct
+import sys
+import zipfile
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Protocol, cast
+
+# внутренние функции и атрибуты zipfile, на которые опираются zip_tools и windows_console. Они не входят в публичный
+# API, поэтому собраны здесь и проверяются при импорте: на версии, где их нет, модуль не загрузится с понятной ошибкой,
+# а не упадёт посреди записи архива
+_REQUIRED = ("_get_compressor", "_get_decompressor")
+_missing = [name for name in _REQUIRED if not hasattr(zipfile, name)]
+if not hasattr(zipfile.ZipFile, "_sanitize_windows_name"):
+    _missing.append("ZipFile._sanitize_windows_name")
+if _missing:
+    raise ImportError(f"zipfile Python {sys.version.split()[0]} не содержит {', '.join(_missing)}: zip_compat нужно обновить")
+
+# с Python 3.13 уровень сжатия элемента - публичный атрибут ZipInfo.compress_level, раньше - _compresslevel
+_LEVEL_ATTR = "compress_level" if sys.version_info >= (3, 13) else "_compresslevel"
+
+# локальный заголовок элемента по спецификации ZIP (APPNOTE 4.3.7) - те же значения, что structFileHeader в zipfile
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+LOCAL_HEADER_STRUCT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_STRUCT)
+CENTRAL_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06")
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes, /) -> bytes: ...
+
+    def flush(self, mode: int = ..., /) -> bytes: ...
+
+
+class Decompressor(Protocol):
+    @property
+    def eof(self) -> bool: ...
+
+    def decompress(self, data: bytes, /) -> bytes: ...
+
+
+@dataclass
+class LocalHeader:
+    flag_bits: int
+    compress_type: int
+    crc: int
+    compress_size: int
+    file_size: int
+    filename_length: int
+    extra_length: int
+
+
+def unpack_local_header(data: bytes) -> LocalHeader:
+    """
+    Функция разбирает локальный заголовок элемента архива (без имени и дополнительных полей)
+    :param data: первые LOCAL_HEADER_SIZE байт заголовка
+    :return: поля заголовка
+    :raises zipfile.BadZipFile: если данных не хватает или сигнатура не совпадает
+    """
+    if len(data) != LOCAL_HEADER_SIZE or data[:4] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile("Повреждён локальный заголовок элемента архива")
+    fields = struct.unpack(LOCAL_HEADER_STRUCT, data)
+    return LocalHeader(flag_bits=fields[3], compress_type=fields[4], crc=fields[7], compress_size=fields[8],
+                       file_size=fields[9], filename_length=fields[10], extra_length=fields[11])
+
+
+def get_compressor(compress_type: int, level: int | None = None) -> Compressor | None:
+    """
+    Функция создаёт упаковщик zipfile для способа сжатия
+    :param compress_type: константа zipfile.ZIP_*
+    :param level: уровень сжатия (None - по умолчанию)
+    :return: упаковщик или None для хранения без сжатия
+    """
+    compressor = zipfile._get_compressor(compress_type, level)  # type: ignore[attr-defined]
+    return cast(Compressor | None, compressor)
+
+
+def get_decompressor(compress_type: int) -> Decompressor | None:
+    """
+    Функция создаёт распаковщик zipfile для способа сжатия
+    :param compress_type: константа zipfile.ZIP_*
+    :return: распаковщик или None для хранения без сжатия
+    :raises NotImplementedError: если способ сжатия не поддерживается
+    """
+    decompressor = zipfile._get_decompressor(compress_type)  # type: ignore[attr-defined]
+    return cast(Decompressor | None, decompressor)
+
+
+def unused_data(decompressor: Decompressor) -> bytes:
+    """
+    Функция возвращает байты, прочитанные распаковщиком после конца потока сжатия
+    (обёртка zipfile над LZMA хранит их во вложенном распаковщике)
+    :param decompressor: распаковщик, дошедший до конца потока
+    :return: необработанный хвост
+    """
+    inner: Any = getattr(decompressor, "_decomp", decompressor)
+    return bytes(inner.unused_data)
+
+
+def get_compress_level(zinfo: zipfile.ZipInfo) -> int | None:
+    """
+    Функция возвращает уровень сжатия элемента архива
+    :param zinfo: описание элемента
+    :return: уровень сжатия (None - по умолчанию)
+    """
+    return cast(int | None, getattr(zinfo, _LEVEL_ATTR))
+
+
+def set_compress_level(zinfo: zipfile.ZipInfo, level: int | None) -> None:
+    """
+    Функция задаёт уровень сжатия элемента архива
+    :param zinfo: описание элемента
+    :param level: уровень сжатия (None - по умолчанию)
+    :return: функция ничего не возвращает
+    """
+    setattr(zinfo, _LEVEL_ATTR, level)
+
+
+def is_seekable(zf: zipfile.ZipFile) -> bool:
+    """
+    Функция сообщает, можно ли перематывать поток, в который пишется архив (у stdout нельзя)
+    :param zf: архив, открытый на запись
+    :return: True/False (поток перематывается/нет)
+    """
+    return bool(getattr(zf, "_seekable", True))
+
+
+def archive_fp(zf: zipfile.ZipFile) -> BinaryIO:
+    """
+    Функция возвращает файловый объект открытого архива для записи элементов в обход ZipFile.write
+    :param zf: открытый архив
+    :return: файловый объект архива
+    :raises ValueError: если архив закрыт
+    """
+    if zf.fp is None:
+        raise ValueError("Архив закрыт")
+    return cast(BinaryIO, zf.fp)
+
+
+def register_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> None:
+    """
+    Функция регистрирует записанный в обход ZipFile.write элемент: он попадёт в центральный каталог, который
+    zipfile запишет при закрытии архива сразу после текущей позиции
+    :param zf: архив, открытый на запись
+    :param zinfo: описание записанного элемента
+    :return: функция ничего не возвращает
+    """
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = archive_fp(zf).tell()
+
+
+def sanitize_windows_name(arcname: str, pathsep: str) -> str:
+    """
+    Функция заменяет в имени элемента символы, недопустимые в именах файлов Windows (как ZipFile.extract)
+    :param arcname: имя элемента с разделителями pathsep
+    :param pathsep: разделитель частей пути
+    :return: очищенное имя
+    """
+    name = zipfile.ZipFile._sanitize_windows_name(arcname, pathsep)  # type: ignore[attr-defined]
+    return cast(str, name)
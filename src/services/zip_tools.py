@@ -0,0 +1,675 @@
+import contextlib
+import hashlib
+import heapq
+import lzma
+import os
+import struct
+import zipfile
+import zlib
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import BinaryIO
+
+from src.enums import ZipMethod
+from src.services.archive import file_sha256, member_matches
+from src.services.zip_compat import (
+    CENTRAL_SIGNATURES,
+    LOCAL_HEADER_SIGNATURE,
+    LOCAL_HEADER_SIZE,
+    archive_fp,
+    get_compress_level,
+    get_compressor,
+    get_decompressor,
+    is_seekable,
+    register_member,
+    sanitize_windows_name,
+    set_compress_level,
+    unpack_local_header,
+    unused_data,
+)
+
+SPLIT_SIZE = 4 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+STREAM_READ_SIZE = 64 * 1024
+SAMPLE_SIZE = 16 * 1024
+STORE_RATIO = 0.95
+
+COMPRESS_TYPES = {
+    ZipMethod.deflate: zipfile.ZIP_DEFLATED,
+    ZipMethod.bzip2: zipfile.ZIP_BZIP2,
+    ZipMethod.lzma: zipfile.ZIP_LZMA,
+    ZipMethod.store: zipfile.ZIP_STORED,
+}
+_SPLITTABLE = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+_DATA_DESCRIPTOR = 0x08
+_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+_CRC32_POLY = 0xEDB88320
+
+
+def _gf2_matrix_times(mat: list[int], vec: int) -> int:
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+
+def _gf2_matrix_square(mat: list[int]) -> list[int]:
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """
+    Функция объединяет CRC-32 двух соседних блоков данных без повторного чтения (алгоритм crc32_combine из zlib)
+    :param crc1: CRC-32 первого блока
+    :param crc2: CRC-32 второго блока
+    :param len2: длина второго блока в байтах
+    :return: CRC-32 объединённых данных
+    """
+    if len2 <= 0:
+        return crc1
+
+    odd = [_CRC32_POLY] + [1 << n for n in range(31)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+    return crc1 ^ crc2
+
+
+def is_compressible(path: PathLike[str] | str) -> bool:
+    """
+    Функция оценивает, имеет ли смысл сжимать файл: первые SAMPLE_SIZE байт пробно сжимаются deflate с уровнем 1.
+    Уже сжатые данные (jpeg, gz, mp4, ...) почти не уменьшаются, и такие файлы выгоднее хранить без сжатия
+    :param path: путь к файлу
+    :return: True/False (пробное сжатие дало выигрыш больше 5%/нет)
+    """
+    with open(path, "rb") as fh:
+        sample = fh.read(SAMPLE_SIZE)
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) < len(sample) * STORE_RATIO
+
+
+def select_compress_type(path: PathLike[str] | str, method: ZipMethod) -> int:
+    """
+    Функция выбирает способ сжатия элемента архива
+    :param path: путь к файлу
+    :param method: заданный способ (auto - deflate или хранение без сжатия по результату пробного сжатия)
+    :return: константа zipfile.ZIP_*
+    """
+    if method == ZipMethod.auto:
+        return zipfile.ZIP_DEFLATED if is_compressible(path) else zipfile.ZIP_STORED
+    return COMPRESS_TYPES[method]
+
+
+def new_zinfo(path: PathLike[str] | str, arcname: str, compress_type: int, level: int | None = None) -> zipfile.ZipInfo:
+    """
+    Функция создаёт описание элемента архива для файла с заданными способом и уровнем сжатия
+    :param path: путь к файлу
+    :param arcname: имя в архиве
+    :param compress_type: константа zipfile.ZIP_*
+    :param level: уровень сжатия (None - по умолчанию для выбранного способа; у bzip2 минимальный уровень 1)
+    :return: описание элемента
+    """
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = compress_type
+    if compress_type == zipfile.ZIP_BZIP2 and level is not None:
+        level = max(level, 1)
+    set_compress_level(zinfo, level)
+    return zinfo
+
+
+def member_zinfo(path: PathLike[str] | str, arcname: str, method: ZipMethod, level: int | None, streaming: bool = False) -> zipfile.ZipInfo:
+    """
+    Функция создаёт описание элемента архива с выбранным способом сжатия. При записи в поток без перемотки
+    (stdout) хранение без сжатия заменяется на deflate с уровнем 0: у такого элемента размер известен только
+    из дескриптора данных после них, и без границы потока deflate его нельзя прочитать последовательно
+    :param path: путь к файлу
+    :param arcname: имя в архиве
+    :param method: способ сжатия
+    :param level: уровень сжатия
+    :param streaming: True/False (архив пишется в поток без перемотки/в файл)
+    :return: описание элемента
+    """
+    compress_type = select_compress_type(path, method)
+    if streaming and compress_type == zipfile.ZIP_STORED:
+        return new_zinfo(path, arcname, zipfile.ZIP_DEFLATED, 0)
+    return new_zinfo(path, arcname, compress_type, level)
+
+
+def compress_chunk(path: str, offset: int, length: int, compress_type: int, level: int | None, final: bool) -> tuple[bytes, int, int]:
+    """
+    Функция сжимает часть файла (выполняется в процессе пула). Для deflate получается «сырой» поток,
+    и не последняя часть завершается Z_SYNC_FLUSH (выравнивание по байту без признака конца потока),
+    поэтому сжатые части можно просто склеить в один корректный поток deflate.
+    bzip2 и lzma так склеивать нельзя, для них часть всегда одна - файл целиком
+    :param path: путь к файлу
+    :param offset: смещение части в файле
+    :param length: длина части
+    :param compress_type: константа zipfile.ZIP_*
+    :param level: уровень сжатия (None - по умолчанию)
+    :param final: True/False (последняя часть файла/нет)
+    :return: сжатые данные, CRC-32 и длина исходной части
+    """
+    compressor = get_compressor(compress_type, level)
+    out: list[bytes] = []
+    crc = 0
+    done = 0
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        while done < length:
+            block = fh.read(min(READ_SIZE, length - done))
+            if not block:
+                break
+            done += len(block)
+            crc = zlib.crc32(block, crc)
+            out.append(compressor.compress(block) if compressor is not None else block)
+    if compressor is not None:
+        out.append(compressor.flush() if final else compressor.flush(zlib.Z_SYNC_FLUSH))
+    return b"".join(out), crc, done
+
+
+def append_precompressed(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, chunks: Iterable[bytes]) -> None:
+    """
+    Функция дописывает в открытый на запись архив элемент с уже сжатыми данными: локальный заголовок, данные
+    и запись для центрального каталога (сам каталог zipfile запишет при закрытии архива).
+    У zinfo должны быть заполнены compress_type, CRC, file_size и compress_size
+    :param zf: архив, открытый в режиме 'w'
+    :param zinfo: описание элемента
+    :param chunks: сжатые данные элемента (по частям)
+    :return: функция ничего не возвращает
+    """
+    if zinfo.filename in zf.NameToInfo:
+        raise FileExistsError(f"Повторяющееся имя элемента архива: '{zinfo.filename}'")
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= 0x02
+    fp = archive_fp(zf)
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(None))
+    for chunk in chunks:
+        fp.write(chunk)
+    register_member(zf, zinfo)
+
+
+def member_unchanged(old: zipfile.ZipInfo, new: zipfile.ZipInfo, path: PathLike[str] | str) -> bool:
+    """
+    Функция проверяет, совпадает ли элемент существующего архива с файлом-источником. Совпадение размера и времени
+    изменения считается достаточным (как быстрая проверка rsync); при совпадении размера, но другом времени
+    сравнивается CRC-32 содержимого. Зашифрованные элементы и элементы с неподдерживаемым сжатием не переиспользуются
+    :param old: описание элемента из центрального каталога архива
+    :param new: описание элемента, построенное по файлу-источнику
+    :param path: путь к файлу-источнику
+    :return: True/False (сжатые данные элемента можно переиспользовать/нет)
+    """
+    if old.flag_bits & 0x01 or old.compress_type not in COMPRESS_TYPES.values():
+        return False
+    if old.file_size != new.file_size:
+        return False
+    if old.date_time == new.date_time:
+        return True
+    crc = 0
+    with open(path, "rb") as fh:
+        while block := fh.read(READ_SIZE):
+            crc = zlib.crc32(block, crc)
+    return crc == old.CRC
+
+
+def read_raw_member(fp: BinaryIO, zinfo: zipfile.ZipInfo) -> Iterator[bytes]:
+    """
+    Функция читает сжатые данные элемента архива без распаковки
+    :param fp: файловый объект архива с произвольным доступом
+    :param zinfo: описание элемента из центрального каталога
+    :return: итератор частей сжатых данных
+    """
+    fp.seek(zinfo.header_offset)
+    header = fp.read(LOCAL_HEADER_SIZE)
+    if len(header) != LOCAL_HEADER_SIZE or header[:4] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Повреждён локальный заголовок элемента '{zinfo.filename}'")
+    fields = unpack_local_header(header)
+    fp.seek(fields.filename_length + fields.extra_length, os.SEEK_CUR)
+    remaining = zinfo.compress_size
+    while remaining > 0:
+        block = fp.read(min(READ_SIZE, remaining))
+        if not block:
+            raise zipfile.BadZipFile(f"Неожиданный конец данных элемента '{zinfo.filename}'")
+        remaining -= len(block)
+        yield block
+
+
+def reuse_member(zf: zipfile.ZipFile, old: zipfile.ZipInfo, new: zipfile.ZipInfo, fp: BinaryIO) -> None:
+    """
+    Функция переносит сжатые данные элемента из старого архива в новый без повторного сжатия.
+    Имя, время изменения и права берутся из new (актуальное состояние файла-источника)
+    :param zf: новый архив, открытый в режиме 'w'
+    :param old: описание элемента в старом архиве
+    :param new: описание элемента, построенное по файлу-источнику
+    :param fp: файловый объект старого архива
+    :return: функция ничего не возвращает
+    """
+    new.compress_type = old.compress_type
+    new.flag_bits = old.flag_bits & 0x06
+    new.CRC = old.CRC
+    new.compress_size = old.compress_size
+    append_precompressed(zf, new, read_raw_member(fp, old))
+
+
+def _begin_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> bool:
+    """
+    Функция записывает локальный заголовок элемента с временными значениями CRC и размеров
+    :param zf: архив, открытый в режиме 'w'
+    :param zinfo: описание элемента
+    :return: True/False (заголовок записан в формате ZIP64/нет)
+    """
+    if zinfo.filename in zf.NameToInfo:
+        raise FileExistsError(f"Повторяющееся имя элемента архива: '{zinfo.filename}'")
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= 0x02
+    if not is_seekable(zf):
+        zinfo.flag_bits |= _DATA_DESCRIPTOR
+    zinfo.CRC = 0
+    zinfo.compress_size = 0
+    fp = archive_fp(zf)
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+    return zip64
+
+
+def _end_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, zip64: bool) -> None:
+    """
+    Функция переписывает локальный заголовок элемента окончательными CRC и размерами (в неперематываемый поток,
+    например stdout, вместо этого дописывается дескриптор данных) и регистрирует элемент для центрального каталога
+    :param zf: архив, открытый в режиме 'w'
+    :param zinfo: описание элемента с заполненными CRC и compress_size
+    :param zip64: формат заголовка, выбранный в _begin_member
+    :return: функция ничего не возвращает
+    """
+    fp = archive_fp(zf)
+    if zinfo.flag_bits & _DATA_DESCRIPTOR:
+        fmt = "<4sLQQ" if zip64 else "<4sLLL"
+        fp.write(struct.pack(fmt, _DESCRIPTOR_SIGNATURE, zinfo.CRC, zinfo.compress_size, zinfo.file_size))
+    else:
+        end = fp.tell()
+        fp.seek(zinfo.header_offset)
+        fp.write(zinfo.FileHeader(zip64))
+        fp.seek(end)
+    register_member(zf, zinfo)
+
+
+def write_parallel(zf: zipfile.ZipFile, files: Iterable[tuple[Path, str]], level: int | None = None, workers: int | None = None, on_member: Callable[[zipfile.ZipInfo], None] | None = None, method: ZipMethod = ZipMethod.deflate, digests: dict[str, str] | None = None) -> int:
+    """
+    Функция сжимает элементы архива в пуле процессов и записывает их по порядку в одном процессе-писателе.
+    Файлы (при deflate и хранении без сжатия) делятся на части по SPLIT_SIZE, которые обрабатываются независимо
+    и склеиваются в один поток (CRC объединяется через crc32_combine), поэтому даже один большой файл сжимается на всех ядрах.
+    Одновременно в работе не больше workers * 2 частей, так что память ограничена
+    :param zf: архив, открытый в режиме 'w' (в поток без перемотки элементы пишутся с дескриптором данных)
+    :param files: пары (путь к файлу, имя в архиве)
+    :param level: уровень сжатия 0-9 (None - по умолчанию)
+    :param workers: количество процессов (по умолчанию os.cpu_count())
+    :param on_member: функция, вызываемая после записи каждого элемента
+    :param method: способ сжатия
+    :param digests: словарь, в который записываются SHA-256 файлов по именам в архиве (None - не считать);
+        хеш файла считается отдельной задачей в том же пуле
+    :return: количество записанных элементов
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    max_pending = workers * 2
+
+    def chunks() -> Iterator[tuple[str, zipfile.ZipInfo, int, int, bool]]:
+        for path, arcname in files:
+            zinfo = member_zinfo(path, arcname, method, level, streaming=not is_seekable(zf))
+            size = zinfo.file_size
+            split = SPLIT_SIZE if zinfo.compress_type in _SPLITTABLE else max(size, 1)
+            offset = 0
+            while True:
+                length = min(split, size - offset)
+                final = offset + length >= size
+                yield str(path), zinfo, offset, length, final
+                if final:
+                    break
+                offset += length
+
+    written = 0
+    zip64 = False
+    fp = archive_fp(zf)
+    pending: deque[tuple[zipfile.ZipInfo, int, bool, Future[tuple[bytes, int, int]]]] = deque()
+    hashes: dict[str, Future[str]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = chunks()
+        while True:
+            for path, zinfo, offset, length, final in tasks:
+                if digests is not None and offset == 0:
+                    hashes[zinfo.filename] = pool.submit(file_sha256, path)
+                future = pool.submit(compress_chunk, path, offset, length, zinfo.compress_type, get_compress_level(zinfo), final)
+                pending.append((zinfo, offset, final, future))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+
+            zinfo, offset, final, future = pending.popleft()
+            data, part_crc, part_len = future.result()
+            if offset == 0:
+                zip64 = _begin_member(zf, zinfo)
+            fp.write(data)
+            zinfo.CRC = crc32_combine(zinfo.CRC, part_crc, part_len)
+            zinfo.compress_size += len(data)
+            if final:
+                _end_member(zf, zinfo, zip64)
+                written += 1
+                if on_member is not None:
+                    on_member(zinfo)
+
+    if digests is not None:
+        digests.update((name, future.result()) for name, future in hashes.items())
+    return written
+
+
+def member_path(dst_dir: Path, zinfo: zipfile.ZipInfo) -> Path:
+    """
+    Функция вычисляет путь, по которому zipfile распакует элемент (те же правила очистки имени, что в ZipFile.extract:
+    без букв дисков, '..', '.' и пустых частей)
+    :param dst_dir: папка назначения
+    :param zinfo: описание элемента
+    :return: путь к распакованному элементу
+    """
+    arcname = zinfo.filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    arcname = os.path.sep.join(x for x in arcname.split(os.path.sep) if x not in ("", os.path.curdir, os.path.pardir))
+    if os.path.sep == "\\":
+        arcname = sanitize_windows_name(arcname, os.path.sep)
+    return Path(os.path.normpath(os.path.join(dst_dir, arcname)))
+
+
+def partition_members(members: Iterable[zipfile.ZipInfo], parts: int) -> list[list[zipfile.ZipInfo]]:
+    """
+    Функция делит элементы архива на parts групп с примерно равным суммарным размером после распаковки
+    (жадно: самый большой из оставшихся элементов отдаётся наименее загруженной группе)
+    :param members: элементы архива
+    :param parts: количество групп
+    :return: список непустых групп
+    """
+    groups: list[list[zipfile.ZipInfo]] = [[] for _ in range(max(1, parts))]
+    heap = [(0, i) for i in range(len(groups))]
+    for zinfo in sorted(members, key=lambda m: m.file_size, reverse=True):
+        load, i = heapq.heappop(heap)
+        groups[i].append(zinfo)
+        heapq.heappush(heap, (load + zinfo.file_size, i))
+    return [g for g in groups if g]
+
+
+def extract_parallel(open_archive: Callable[[], BinaryIO], members: list[zipfile.ZipInfo], dst_dir: Path, workers: int | None = None, on_member: Callable[[zipfile.ZipInfo], None] | None = None) -> int:
+    """
+    Функция распаковывает элементы архива в пуле потоков (zlib, bz2 и lzma отпускают GIL при распаковке).
+    Каждый поток открывает архив своим дескриптором и распаковывает свою группу элементов, группы сбалансированы
+    по размеру после распаковки. Каталоги создаются заранее в основном потоке, поэтому потоки не создают их наперегонки.
+    CRC-32 каждого элемента проверяется zipfile при чтении (при несовпадении - zipfile.BadZipFile)
+    :param open_archive: функция, открывающая архив на чтение (вызывается в каждом потоке)
+    :param members: элементы для распаковки
+    :param dst_dir: папка назначения
+    :param workers: количество потоков (по умолчанию os.cpu_count())
+    :param on_member: функция, вызываемая после распаковки каждого файла (из рабочих потоков)
+    :return: количество распакованных файлов
+    """
+    files = [m for m in members if not m.is_dir()]
+    dirs = {member_path(dst_dir, m) for m in members if m.is_dir()}
+    dirs.update(member_path(dst_dir, m).parent for m in files)
+    for d in sorted(dirs):
+        d.mkdir(parents=True, exist_ok=True)
+
+    def extract_group(group: list[zipfile.ZipInfo]) -> int:
+        with open_archive() as fh, zipfile.ZipFile(fh, mode="r") as zf:
+            for zinfo in group:
+                zf.extract(zinfo, dst_dir)
+                if on_member is not None:
+                    on_member(zinfo)
+        return len(group)
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    groups = partition_members(files, workers)
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as pool:
+        return sum(pool.map(extract_group, groups))
+
+
+def verify_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, expected: str | None = None) -> str | None:
+    """
+    Функция проверяет элемент архива, распаковывая его в память блоками: zipfile сверяет CRC-32 в конце чтения,
+    при переданном хеше дополнительно сверяется SHA-256
+    :param zf: архив, открытый на чтение
+    :param zinfo: элемент архива
+    :param expected: ожидаемый SHA-256 (None - только CRC-32)
+    :return: описание повреждения или None, если элемент цел
+    """
+    digest = hashlib.sha256() if expected is not None else None
+    try:
+        with zf.open(zinfo) as fh:
+            while chunk := fh.read(READ_SIZE):
+                if digest is not None:
+                    digest.update(chunk)
+    except (zipfile.BadZipFile, zlib.error, lzma.LZMAError, EOFError, OSError, NotImplementedError) as e:
+        return str(e)
+    if digest is not None and digest.hexdigest() != expected:
+        return "SHA-256 не совпадает"
+    return None
+
+
+def verify_parallel(open_archive: Callable[[], BinaryIO], members: list[zipfile.ZipInfo], workers: int | None = None, expected: dict[str, str] | None = None, on_member: Callable[[zipfile.ZipInfo], None] | None = None) -> list[tuple[str, str]]:
+    """
+    Функция проверяет элементы архива в пуле потоков (zlib, bz2, lzma и hashlib отпускают GIL), ничего не записывая
+    на диск. Группы элементов сбалансированы по размеру после распаковки, как при параллельной распаковке
+    :param open_archive: функция, открывающая архив на чтение (вызывается в каждом потоке)
+    :param members: элементы для проверки (без каталогов)
+    :param workers: количество потоков (по умолчанию os.cpu_count())
+    :param expected: ожидаемые SHA-256 по именам элементов (None - только CRC-32)
+    :param on_member: функция, вызываемая после проверки каждого элемента (из рабочих потоков)
+    :return: список пар (имя элемента, описание повреждения) в порядке элементов архива
+    """
+    def verify_group(group: list[zipfile.ZipInfo]) -> list[tuple[zipfile.ZipInfo, str]]:
+        corrupt = []
+        with open_archive() as fh, zipfile.ZipFile(fh, mode="r") as zf:
+            for zinfo in group:
+                error = verify_member(zf, zinfo, None if expected is None else expected.get(zinfo.filename))
+                if error is None and expected is not None and zinfo.filename not in expected:
+                    error = "нет в списке SHA-256"
+                if error is not None:
+                    corrupt.append((zinfo, error))
+                if on_member is not None:
+                    on_member(zinfo)
+        return corrupt
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    groups = partition_members(members, workers)
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as pool:
+        found = [item for part in pool.map(verify_group, groups) for item in part]
+    found.sort(key=lambda item: item[0].header_offset)
+    return [(zinfo.filename, error) for zinfo, error in found]
+
+
+class _StreamReader:
+    def __init__(self, fp: BinaryIO) -> None:
+        """
+        Функция инициализирует последовательное чтение потока с возможностью вернуть непрочитанные данные
+        :param fp: поток (например, stdin)
+        :return: функция ничего не возвращает
+        """
+        self._fp = fp
+        self._buffer = b""
+
+    def read(self, size: int) -> bytes:
+        """
+        Функция читает до size байт (меньше - только в конце потока)
+        :param size: количество байт
+        :return: прочитанные данные
+        """
+        parts = [self._buffer[:size]]
+        self._buffer = self._buffer[size:]
+        got = len(parts[0])
+        while got < size:
+            chunk = self._fp.read(size - got)
+            if not chunk:
+                break
+            parts.append(chunk)
+            got += len(chunk)
+        return b"".join(parts)
+
+    def read_exact(self, size: int) -> bytes:
+        data = self.read(size)
+        if len(data) != size:
+            raise zipfile.BadZipFile("Неожиданный конец архива")
+        return data
+
+    def read_some(self) -> bytes:
+        if self._buffer:
+            data, self._buffer = self._buffer, b""
+            return data
+        return self._fp.read(STREAM_READ_SIZE)
+
+    def unread(self, data: bytes) -> None:
+        self._buffer = data + self._buffer
+
+
+def _zip64_sizes(extra: bytes, file_size: int, compress_size: int) -> tuple[int, int, bool]:
+    """
+    Функция извлекает размеры элемента из поля ZIP64 локального заголовка (если оно есть)
+    :param extra: дополнительные поля локального заголовка
+    :param file_size: размер из заголовка
+    :param compress_size: сжатый размер из заголовка
+    :return: размер, сжатый размер и признак наличия поля ZIP64
+    """
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, length = struct.unpack("<HH", extra[pos:pos + 4])
+        if header_id == 0x0001:
+            values = list(struct.unpack(f"<{length // 8}Q", extra[pos + 4:pos + 4 + length // 8 * 8]))
+            if file_size == 0xFFFFFFFF and values:
+                file_size = values.pop(0)
+            if compress_size == 0xFFFFFFFF and values:
+                compress_size = values.pop(0)
+            return file_size, compress_size, True
+        pos += 4 + length
+    return file_size, compress_size, False
+
+
+def _copy_member_data(reader: _StreamReader, compress_type: int, compress_size: int | None, out: BinaryIO | None) -> tuple[int, int]:
+    """
+    Функция распаковывает данные элемента из потока. Если сжатый размер неизвестен (дескриптор данных),
+    конец данных определяется по концу потока сжатия, а лишние прочитанные байты возвращаются в reader
+    :param reader: поток архива
+    :param compress_type: способ сжатия элемента
+    :param compress_size: сжатый размер или None
+    :param out: файл для записи распакованных данных (None - данные пропускаются)
+    :return: CRC-32 и размер распакованных данных
+    """
+    try:
+        decompressor = get_decompressor(compress_type)
+    except NotImplementedError as e:
+        raise zipfile.BadZipFile(str(e)) from None
+    crc = 0
+    size = 0
+    remaining = compress_size
+    while remaining is None or remaining > 0:
+        chunk = reader.read_some() if remaining is None else reader.read(min(STREAM_READ_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile("Неожиданный конец архива")
+        if remaining is not None:
+            remaining -= len(chunk)
+        data = decompressor.decompress(chunk) if decompressor is not None else chunk
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+        if out is not None:
+            out.write(data)
+        if remaining is None and decompressor is not None and decompressor.eof:
+            reader.unread(unused_data(decompressor))
+            break
+    return crc, size
+
+
+def extract_stream(fp: BinaryIO, dst_dir: Path, patterns: list[str] | None = None, on_member: Callable[[str, int], None] | None = None) -> int:
+    """
+    Функция распаковывает zip-архив из потока без перемотки (например, stdin), последовательно читая локальные
+    заголовки; центральный каталог в конце архива не нужен. Память ограничена буфером чтения.
+    CRC-32 каждого элемента проверяется (при несовпадении - zipfile.BadZipFile)
+    :param fp: поток архива
+    :param dst_dir: папка назначения
+    :param patterns: имена и glob-шаблоны элементов для распаковки (None - все)
+    :param on_member: функция, вызываемая после распаковки каждого файла (имя, размер)
+    :return: количество распакованных файлов
+    """
+    reader = _StreamReader(fp)
+    unmatched = set(patterns or ())
+    extracted = 0
+    while True:
+        signature = reader.read(4)
+        if not signature or signature in CENTRAL_SIGNATURES:
+            break
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile("Ожидался локальный заголовок элемента архива")
+        fields = unpack_local_header(signature + reader.read_exact(LOCAL_HEADER_SIZE - 4))
+        flags = fields.flag_bits
+        compress_type = fields.compress_type
+        raw_name = reader.read_exact(fields.filename_length)
+        extra = reader.read_exact(fields.extra_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        _file_size, compress_size, zip64 = _zip64_sizes(extra, fields.file_size, fields.compress_size)
+        expected_crc = fields.crc
+        if flags & 0x01:
+            raise zipfile.BadZipFile(f"Зашифрованный элемент не поддерживается: '{name}'")
+        descriptor = bool(flags & _DATA_DESCRIPTOR)
+        if descriptor and compress_type == zipfile.ZIP_STORED:
+            raise zipfile.BadZipFile(f"Элемент без сжатия с дескриптором данных нельзя прочитать из потока: '{name}'")
+
+        matched = [p for p in patterns if member_matches(name, p)] if patterns else []
+        selected = not patterns or bool(matched)
+        unmatched.difference_update(matched)
+        target = member_path(dst_dir, zipfile.ZipInfo(name)) if selected else None
+        if target is not None and name.endswith("/"):
+            target.mkdir(parents=True, exist_ok=True)
+            target = None
+        elif target is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(target, "wb") if target is not None else contextlib.nullcontext() as out:
+            crc, size = _copy_member_data(reader, compress_type, None if descriptor else compress_size, out)
+
+        if descriptor:
+            head = reader.read_exact(4)
+            if head == _DESCRIPTOR_SIGNATURE:
+                head = reader.read_exact(4)
+            expected_crc = struct.unpack("<L", head)[0]
+            reader.read_exact(16 if zip64 else 8)
+        if crc != expected_crc:
+            raise zipfile.BadZipFile(f"Неверный CRC-32 элемента '{name}'")
+        if target is not None:
+            extracted += 1
+            if on_member is not None:
+                on_member(name, size)
+
+    while reader.read_some():
+        pass
+    if unmatched:
+        raise FileNotFoundError(f"Элементы не найдены в архиве: {', '.join(sorted(unmatched))}")
+    return extracted
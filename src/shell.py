@@ -0,0 +1,255 @@
+import logging
+import os
+import shlex
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, TextIO
+
+import typer
+
+from src.container import Container
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+EXIT_COMMANDS = {"exit", "quit"}
+NESTED_COMMANDS = {"shell", "run"}
+
+logger = logging.getLogger(__name__)
+
+
+def read_lines(stream: TextIO, interactive: bool) -> Iterator[str]:
+    """
+    Функция читает команды оболочки: в интерактивном режиме - с приглашением, в котором показан текущий каталог,
+    иначе - построчно из потока (скрипт или конвейер)
+    :param stream: поток команд
+    :param interactive: True/False (терминал/поток)
+    :return: итератор по строкам команд
+    """
+    if not interactive:
+        yield from stream
+        return
+    try:
+        import readline  # noqa: F401  (история и редактирование строки, если модуль есть на платформе)
+    except ImportError:
+        pass
+    while True:
+        try:
+            yield input(f"{os.getcwd()}> ")
+        except KeyboardInterrupt:
+            typer.echo()
+        except EOFError:
+            typer.echo()
+            return
+
+
+def dispatch(command: Any, container: Container, argv: list[str]) -> int:
+    """
+    Функция выполняет одну команду в текущем процессе через уже собранную CLI-команду Typer. Контейнер передаётся
+    готовым, поэтому логирование и сервис не создаются заново, а рабочий каталог и кеши сохраняются между командами
+    :param command: корневая команда приложения (typer.main.get_command(app))
+    :param container: контейнер зависимостей оболочки
+    :param argv: аргументы команды
+    :return: код завершения команды
+    """
+    try:
+        command.main(args=argv, prog_name="", obj=container, standalone_mode=True)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else int(e.code is not None)
+    except (typer.TyperException, OSError) as e:
+        # ожидаемые ошибки команды (в том числе ClickException: в typer она наследует TyperException)
+        typer.echo(f"{argv[0]}: {e}", err=True)
+        return 1
+    except Exception as e:
+        logger.exception(f"{argv[0]}: Непредвиденная ошибка команды")
+        typer.echo(f"{argv[0]}: {e}", err=True)
+        return 1
+    return 0
+
+
+def run_shell(command: Any, container: Container, lines: Iterable[str]) -> int:
+    """
+    Функция запускает цикл оболочки: разбирает строки как аргументы командной строки (с кавычками и комментариями '#')
+    и выполняет их по очереди, пока не встретит exit/quit или конец ввода
+    :param command: корневая команда приложения (typer.main.get_command(app))
+    :param container: контейнер зависимостей оболочки
+    :param lines: строки команд
+    :return: код завершения последней команды
+    """
+    status = 0
+    for line in lines:
+        try:
+            argv = shlex.split(line, comments=True)
+        except ValueError as e:
+            typer.echo(f"shell: {e}", err=True)
+            status = 2
+            continue
+        if not argv:
+            continue
+        if argv[0] in EXIT_COMMANDS:
+            break
+        if argv[0] in NESTED_COMMANDS:
+            typer.echo(f"shell: {argv[0]} нельзя запускать внутри оболочки", err=True)
+            continue
+        status = dispatch(command, container, argv)
+        sys.stdout.flush()
+    return status
+
+
+@dataclass
+class ScriptLine:
+    number: int
+    text: str
+    argv: list[str]
+    background: bool
+
+
+@dataclass
+class LineResult:
+    line: ScriptLine
+    status: int
+    elapsed: float
+
+
+class ErrorLog(logging.Handler):
+    def __init__(self) -> None:
+        """
+        Функция инициализирует счётчик записей лога уровня ERROR по потокам. Команды CLI перехватывают OSError
+        и только логируют его, поэтому для run ошибка команды определяется по её записям в логе
+        :return: функция ничего не возвращает
+        """
+        super().__init__(logging.ERROR)
+        self._local = threading.local()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Функция учитывает запись уровня ERROR в счётчике потока, который её создал
+        :param record: запись лога
+        :return: функция ничего не возвращает
+        """
+        self._local.count = self.count + 1
+
+    @property
+    def count(self) -> int:
+        """
+        Функция возвращает количество ошибок текущего потока с последнего сброса
+        :return: количество записей уровня ERROR
+        """
+        return getattr(self._local, "count", 0)
+
+    def reset(self) -> None:
+        """
+        Функция сбрасывает счётчик ошибок текущего потока
+        :return: функция ничего не возвращает
+        """
+        self._local.count = 0
+
+
+def parse_script(lines: Iterable[str]) -> Iterator[ScriptLine]:
+    """
+    Функция разбирает скрипт: пустые строки и комментарии '#' пропускаются, строка с '&' в конце выполняется
+    в фоне вместе с соседними такими же строками, 'wait' ждёт завершения фоновых строк
+    :param lines: строки скрипта
+    :return: итератор по командам скрипта
+    :raises ValueError: если строку нельзя разобрать (например, незакрытая кавычка)
+    """
+    for number, text in enumerate(lines, 1):
+        text = text.strip()
+        background = text.endswith("&")
+        if background:
+            text = text[:-1].rstrip()
+        try:
+            argv = shlex.split(text, comments=True)
+        except ValueError as e:
+            raise ValueError(f"строка {number}: {e}") from None
+        if argv:
+            yield ScriptLine(number, text, argv, background)
+
+
+def run_script(command: Any, container: Container, lines: Iterable[str], jobs: int | None = None, fail_fast: bool = True) -> list[LineResult]:
+    """
+    Функция выполняет скрипт команд в одном процессе с одним контейнером. Строки выполняются по порядку;
+    подряд идущие фоновые строки ('&') выполняются параллельно в пуле потоков, обычная строка и 'wait'
+    дожидаются их завершения. При fail_fast после первой ошибки новые строки не запускаются
+    :param command: корневая команда приложения (typer.main.get_command(app))
+    :param container: контейнер зависимостей
+    :param lines: строки скрипта
+    :param jobs: количество одновременно выполняемых фоновых строк (по умолчанию os.cpu_count())
+    :param fail_fast: True/False (остановиться после первой ошибки/выполнить все строки)
+    :return: результаты выполненных строк в порядке строк скрипта
+    :raises ValueError: если скрипт нельзя разобрать (тогда не выполняется ни одна строка)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    script = list(parse_script(lines))
+    errors = ErrorLog()
+    root = logging.getLogger()
+    root.addHandler(errors)
+    results: list[LineResult] = []
+    pending: list[Future[LineResult]] = []
+    failed = threading.Event()
+
+    def execute(line: ScriptLine) -> LineResult:
+        errors.reset()
+        start = time.perf_counter()
+        if line.argv[0] in NESTED_COMMANDS:
+            typer.echo(f"run: строка {line.number}: {line.argv[0]} нельзя запускать из скрипта", err=True)
+            status = 2
+        elif line.background and line.argv[0] == "cd":
+            typer.echo(f"run: строка {line.number}: cd нельзя выполнять в фоне", err=True)
+            status = 2
+        else:
+            status = dispatch(command, container, line.argv)
+            if status == 0 and errors.count:
+                status = 1
+        if status:
+            failed.set()
+        return LineResult(line, status, time.perf_counter() - start)
+
+    def drain() -> None:
+        results.extend(future.result() for future in pending)
+        pending.clear()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs or os.cpu_count() or 1)) as pool:
+            for line in script:
+                if fail_fast and failed.is_set():
+                    break
+                if line.argv == ["wait"]:
+                    drain()
+                elif line.background:
+                    pending.append(pool.submit(execute, line))
+                else:
+                    drain()
+                    if not (fail_fast and failed.is_set()):
+                        results.append(execute(line))
+                sys.stdout.flush()
+            drain()
+    finally:
+        root.removeHandler(errors)
+    return results
+
+
+def format_report(results: list[LineResult], elapsed: float) -> list[str]:
+    """
+    Функция формирует отчёт о выполнении скрипта: итог, время по командам (количество, сумма, среднее, максимум)
+    и список строк с ошибками
+    :param results: результаты выполненных строк
+    :param elapsed: общее время выполнения скрипта в секундах
+    :return: строки отчёта
+    """
+    by_command: dict[str, list[float]] = {}
+    for result in results:
+        by_command.setdefault(result.line.argv[0], []).append(result.elapsed)
+    failed = [r for r in results if r.status]
+    report = [
+        f"run: строк {len(results)}, с ошибкой {len(failed)}, время {elapsed:.3f} с",
+        f"{'команда':<12} {'кол-во':>8} {'всего, с':>10} {'сред., мс':>10} {'макс., мс':>10}",
+    ]
+    for name, times in sorted(by_command.items(), key=lambda item: sum(item[1]), reverse=True):
+        report.append(f"{name:<12} {len(times):>8} {sum(times):>10.3f} {sum(times) / len(times) * 1000:>10.3f} {max(times) * 1000:>10.3f}")
+    report.extend(f"строка {r.line.number}: {r.line.text} (код {r.status})" for r in failed)
+    return report
@@ -1,16 +1,20 @@
 from pathlib import Path
 from unittest.mock import Mock
+import hashlib
+import io
 import os
+import shutil
 import zipfile
 import tarfile
 import re
+from types import SimpleNamespace
 
 import pytest
 
 from pytest_mock import MockerFixture
 
 from src.services.base import OSConsoleServiceBase
-from src.enums import FileReadMode, FileDisplayMode
+from src.enums import FileReadMode, FileDisplayMode, TarCodec, ZipMethod
 
 #тестим ls
 def test_ls_nonexisted_folder(service: OSConsoleServiceBase, fake_pathlib_path_class: Mock, mocker: MockerFixture):
@@ -342,6 +346,60 @@ def test_mv_directory(service: OSConsoleServiceBase, tmp_path: Path):
     assert (dst_dir / "file.txt").read_text() == "content"
 
 
+#тестим rename
+def test_rename_glob_success(service: OSConsoleServiceBase, tmp_path: Path):
+    for i in range(3):
+        (tmp_path / f"f{i}.log").write_text(str(i))
+    (tmp_path / "keep.txt").write_text("keep")
+    plan = service.rename(r"s/\.log$/.old/", [str(tmp_path / "*")])
+
+    assert len(plan) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["f0.old", "f1.old", "f2.old", "keep.txt"]
+    assert (tmp_path / "f1.old").read_text() == "1"
+
+
+def test_rename_dry_run(service: OSConsoleServiceBase, tmp_path: Path):
+    src = tmp_path / "a.log"
+    src.write_text("a")
+    plan = service.rename(r"s/\.log$/.old/", [str(src)], dry_run=True)
+
+    assert plan == [(src, tmp_path / "a.old")]
+    assert src.exists()
+    assert not (tmp_path / "a.old").exists()
+
+
+def test_rename_collision(service: OSConsoleServiceBase, tmp_path: Path):
+    (tmp_path / "a1.log").write_text("1")
+    (tmp_path / "a2.log").write_text("2")
+    (tmp_path / "b.txt").write_text("b")
+
+    with pytest.raises(FileExistsError):
+        service.rename(r"s/a\d/a/", [str(tmp_path / "a1.log"), str(tmp_path / "a2.log")])
+    with pytest.raises(FileExistsError):
+        service.rename(r"s/a1\.log/b.txt/", [str(tmp_path / "a1.log")])
+    assert (tmp_path / "a1.log").exists()
+    assert (tmp_path / "a2.log").exists()
+
+
+def test_rename_chain(service: OSConsoleServiceBase, tmp_path: Path):
+    (tmp_path / "a").write_text("1")
+    (tmp_path / "aa").write_text("2")
+    service.rename("s/^/a/", [str(tmp_path / "a"), str(tmp_path / "aa")])
+
+    assert (tmp_path / "aa").read_text() == "1"
+    assert (tmp_path / "aaa").read_text() == "2"
+    assert not (tmp_path / "a").exists()
+
+
+def test_rename_invalid_expression(service: OSConsoleServiceBase, tmp_path: Path):
+    (tmp_path / "a").write_text("a")
+
+    with pytest.raises(ValueError):
+        service.rename("a/b/c", [str(tmp_path / "a")])
+    with pytest.raises(ValueError):
+        service.rename("s/(/x/", [str(tmp_path / "a")])
+
+
 #тестим rm
 def test_rm_file_not_found(service: OSConsoleServiceBase, fake_pathlib_path_class: Mock, mocker: MockerFixture):
     path_obj = mocker.create_autospec(Path, instance=True, spec_set=True)
@@ -410,6 +468,125 @@ def test_rm_root_protection(service: OSConsoleServiceBase, mocker: MockerFixture
         service.rm("C:\\", recursive=True)
 
 
+def test_rm_directory_parallel_large_tree(service: OSConsoleServiceBase, tmp_path: Path):
+    test_dir = tmp_path / "cache"
+    for i in range(20):
+        sub = test_dir / f"d{i}" / "nested" / "deep"
+        sub.mkdir(parents=True)
+        for j in range(5):
+            (sub / f"f{j}.bin").write_bytes(b"x")
+        (test_dir / f"d{i}" / "top.txt").write_text("t")
+    outside = tmp_path / "outside.txt"
+    outside.write_text("keep")
+    os.symlink(outside, test_dir / "d0" / "link")
+    service.rm(str(test_dir), recursive=True, workers=4)
+
+    assert not test_dir.exists()
+    assert outside.read_text() == "keep"
+
+
+def test_parallel_rmtree_counts_entries(tmp_path: Path):
+    from src.services.parallel_rm import parallel_rmtree
+
+    test_dir = tmp_path / "tree"
+    (test_dir / "a" / "b").mkdir(parents=True)
+    (test_dir / "a" / "b" / "f.txt").write_text("f")
+    (test_dir / "g.txt").write_text("g")
+    removed = parallel_rmtree(test_dir, workers=2)
+
+    assert removed == 5
+    assert not test_dir.exists()
+
+
+def test_parallel_rmtree_deep_chain(tmp_path: Path):
+    from src.services.parallel_rm import parallel_rmtree
+
+    test_dir = tmp_path / "tree"
+    level = test_dir
+    for depth in range(60):
+        level = level / f"d{depth}"
+        level.mkdir(parents=True)
+        for i in range(3):
+            (level / f"f{i}.txt").write_text("x")
+    fds_before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    removed = parallel_rmtree(test_dir, workers=1)
+
+    assert removed == 60 * 4 + 1
+    assert not test_dir.exists()
+    if fds_before is not None:
+        assert len(os.listdir("/proc/self/fd")) == fds_before
+
+
+def test_rm_defer_restore_purge(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.services.trash.REGISTRY_PATH", tmp_path / "registry")
+    monkeypatch.setattr("src.services.trash.TRASH_ROOT", tmp_path / "trash")
+    test_dir = tmp_path / "data"
+    (test_dir / "sub").mkdir(parents=True)
+    (test_dir / "sub" / "file.txt").write_text("content")
+    service.rm(str(test_dir), recursive=True, defer=True)
+
+    assert not test_dir.exists()
+    entries = service.trash_list()
+    assert len(entries) == 1
+    assert entries[0].original == test_dir.resolve()
+
+    service.restore(entries[0].entry_id)
+    assert (test_dir / "sub" / "file.txt").read_text() == "content"
+    assert service.trash_list() == []
+
+    service.rm(str(test_dir), recursive=True, defer=True)
+    assert service.purge(older_than=3600) == 0
+    assert service.purge() == 1
+    assert service.trash_list() == []
+    assert list((tmp_path / "trash").iterdir()) == []
+
+
+def test_purge_background_forwards_io_options(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import typer
+    from src.container import Container
+    from src.main import app
+    from src.services.throttle import IOLimiter
+    from src.shell import run_shell
+
+    popen = Mock()
+    monkeypatch.setattr("src.main.subprocess.Popen", popen)
+    monkeypatch.chdir(tmp_path)
+    container = Container(console_service=service, limiter=IOLimiter(bwlimit=1048576.0, iops_limit=50.0), ionice=True)
+    assert run_shell(typer.main.get_command(app), container, ["purge --background --pause 0.5"]) == 0
+
+    args = popen.call_args.args[0]
+    assert args[3:args.index("purge")] == ["--bwlimit", "1048576.0", "--iops-limit", "50.0", "--ionice"]
+    assert args[args.index("purge"):][:5] == ["purge", "--older-than", "0.0", "--pause", "0.5"]
+    assert "cwd" not in popen.call_args.kwargs
+    assert popen.call_args.kwargs["env"]["PYTHONPATH"].split(os.pathsep)[0] == str(Path(__file__).resolve().parent.parent)
+
+
+def test_rm_defer_directory_without_recursive(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.services.trash.REGISTRY_PATH", tmp_path / "registry")
+    monkeypatch.setattr("src.services.trash.TRASH_ROOT", tmp_path / "trash")
+    test_dir = tmp_path / "data"
+    test_dir.mkdir()
+
+    with pytest.raises(IsADirectoryError):
+        service.rm(str(test_dir), defer=True)
+    assert test_dir.exists()
+
+
+def test_restore_occupied_path(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.services.trash.REGISTRY_PATH", tmp_path / "registry")
+    monkeypatch.setattr("src.services.trash.TRASH_ROOT", tmp_path / "trash")
+    test_file = tmp_path / "file.txt"
+    test_file.write_text("old")
+    service.rm(str(test_file), defer=True)
+    test_file.write_text("new")
+    entry_id = service.trash_list()[0].entry_id
+
+    with pytest.raises(FileExistsError):
+        service.restore(entry_id)
+    with pytest.raises(FileNotFoundError):
+        service.restore("missing")
+
+
 #тестим zip
 def test_zip_directory_not_found(service: OSConsoleServiceBase, fake_pathlib_path_class: Mock, mocker: MockerFixture):
     path_obj = mocker.create_autospec(Path, instance=True, spec_set=True)
@@ -446,6 +623,95 @@ def test_zip_success(service: OSConsoleServiceBase, tmp_path: Path):
         assert "subdir/file3.txt" in zf.namelist()
 
 
+def test_zip_parallel_split_members(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.services.zip_tools.SPLIT_SIZE", 1000)
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    big = os.urandom(2500) + b"abc" * 2000
+    (src_dir / "big.bin").write_bytes(big)
+    (src_dir / "sub" / "small.txt").write_text("small")
+    (src_dir / "empty").write_bytes(b"")
+    archive = tmp_path / "archive.zip"
+    service.zip(str(src_dir), str(archive), workers=2)
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ["big.bin", "empty", "sub/small.txt"]
+        assert zf.read("big.bin") == big
+        assert zf.read("sub/small.txt") == b"small"
+        assert zf.read("empty") == b""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_auto_stores_incompressible(service: OSConsoleServiceBase, tmp_path: Path, workers: int):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    noise = os.urandom(50000)
+    (src_dir / "photo.jpg").write_bytes(noise)
+    (src_dir / "notes.txt").write_text("hello " * 5000)
+    archive = tmp_path / "archive.zip"
+    service.zip(str(src_dir), str(archive), workers=workers, method=ZipMethod.auto, level=9)
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("photo.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read("photo.jpg") == noise
+
+
+@pytest.mark.parametrize("method, compress_type", [(ZipMethod.bzip2, zipfile.ZIP_BZIP2), (ZipMethod.lzma, zipfile.ZIP_LZMA), (ZipMethod.store, zipfile.ZIP_STORED)])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_method(service: OSConsoleServiceBase, tmp_path: Path, method: ZipMethod, compress_type: int, workers: int):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    data = b"abc" * 10000
+    (src_dir / "a.txt").write_bytes(data)
+    archive = tmp_path / "archive.zip"
+    service.zip(str(src_dir), str(archive), workers=workers, method=method, level=0)
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("a.txt").compress_type == compress_type
+        assert zf.read("a.txt") == data
+
+
+def test_zip_update_reuses_unchanged(service: OSConsoleServiceBase, tmp_path: Path, mocker: MockerFixture):
+    from src.services.zip_tools import reuse_member
+
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "same.txt").write_text("same " * 1000)
+    (src_dir / "sub" / "touched.txt").write_text("touched " * 1000)
+    (src_dir / "changed.txt").write_text("old")
+    (src_dir / "removed.txt").write_text("removed")
+    archive = tmp_path / "archive.zip"
+    service.zip(str(src_dir), str(archive))
+
+    (src_dir / "changed.txt").write_text("new content")
+    os.utime(src_dir / "sub" / "touched.txt", (0, 315532800 + 86400))
+    (src_dir / "removed.txt").unlink()
+    (src_dir / "added.txt").write_text("added")
+    reuse = mocker.patch("src.services.zip_tools.reuse_member", wraps=reuse_member)
+    service.zip(str(src_dir), str(archive), update=True)
+
+    assert sorted(call.args[1].filename for call in reuse.call_args_list) == ["same.txt", "sub/touched.txt"]
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == ["added.txt", "changed.txt", "same.txt", "sub/touched.txt"]
+        assert zf.read("changed.txt") == b"new content"
+        assert zf.read("sub/touched.txt") == b"touched " * 1000
+        assert zf.getinfo("sub/touched.txt").date_time[0] == 1980
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_crc32_combine():
+    import zlib
+    from src.services.zip_tools import crc32_combine
+
+    a, b = os.urandom(777), os.urandom(4096)
+    assert crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)) == zlib.crc32(a + b)
+    assert crc32_combine(zlib.crc32(a), zlib.crc32(b""), 0) == zlib.crc32(a)
+
 #тестим unzip
 def test_unzip_file_not_found(service: OSConsoleServiceBase, fake_pathlib_path_class: Mock, mocker: MockerFixture):
     path_obj = mocker.create_autospec(Path, instance=True, spec_set=True)
@@ -487,6 +753,65 @@ def test_unzip_to_none(service: OSConsoleServiceBase, tmp_path: Path):
         os.chdir(current_dir)
 
 
+def test_unzip_parallel(service: OSConsoleServiceBase, tmp_path: Path):
+    archive = tmp_path / "archive.zip"
+    contents = {f"d{i % 3}/sub/f{i}.bin": os.urandom(i * 100) for i in range(20)}
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("empty_dir/", "")
+        zf.writestr("../escape.txt", "x")
+        for name, data in contents.items():
+            zf.writestr(name, data)
+
+    service.unzip(str(archive), str(tmp_path / "out"), workers=4)
+
+    assert (tmp_path / "out" / "empty_dir").is_dir()
+    assert (tmp_path / "out" / "escape.txt").exists()
+    assert not (tmp_path / "escape.txt").exists()
+    for name, data in contents.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+
+
+def test_unzip_parallel_bad_crc(service: OSConsoleServiceBase, tmp_path: Path):
+    archive = tmp_path / "archive.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("a.txt", "hello world")
+    raw = archive.read_bytes()
+    archive.write_bytes(raw.replace(b"hello world", b"hellO world", 1))
+
+    with pytest.raises(zipfile.BadZipFile):
+        service.unzip(str(archive), str(tmp_path / "out"), workers=2)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unzip_selected_members(service: OSConsoleServiceBase, tmp_path: Path, workers: int):
+    archive = tmp_path / "archive.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("logs/1.log", "1")
+        zf.writestr("logs/2.log", "2")
+        zf.writestr("readme.txt", "r")
+
+    service.unzip(str(archive), str(tmp_path / "out"), workers=workers, members=["logs/*.log"])
+    assert sorted(p.name for p in (tmp_path / "out").rglob("*") if p.is_file()) == ["1.log", "2.log"]
+
+    with pytest.raises(FileNotFoundError):
+        service.unzip(str(archive), str(tmp_path / "out2"), workers=workers, members=["nothing*"])
+
+
+def test_partition_members_balanced():
+    from src.services.zip_tools import partition_members
+
+    members = []
+    for i, size in enumerate([100, 90, 50, 40, 30, 10, 10, 5]):
+        zinfo = zipfile.ZipInfo(f"f{i}")
+        zinfo.file_size = size
+        members.append(zinfo)
+    groups = partition_members(members, 3)
+    loads = sorted(sum(m.file_size for m in g) for g in groups)
+    assert sum(loads) == 335
+    assert loads[-1] - loads[0] <= 20
+    assert sorted(m.filename for g in groups for m in g) == sorted(m.filename for m in members)
+
+
 #тестим tar
 def test_tar_dir_directory_not_found(service: OSConsoleServiceBase, fake_pathlib_path_class: Mock, mocker: MockerFixture):
     path_obj = mocker.create_autospec(Path, instance=True, spec_set=True)
@@ -573,6 +898,335 @@ def test_untar_to_none(service: OSConsoleServiceBase, tmp_path: Path):
         os.chdir(current_dir)
 
 
+def test_untar_selected_members(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "proj"
+    (src_dir / "docs").mkdir(parents=True)
+    (src_dir / "docs" / "a.md").write_text("a")
+    (src_dir / "docs" / "b.md").write_text("b")
+    (src_dir / "main.py").write_text("print()")
+    (src_dir / "data.csv").write_text("1,2")
+    archive = tmp_path / "archive.tar.gz"
+    service.tar_dir(str(src_dir), str(archive))
+
+    service.untar(str(archive), str(tmp_path / "out"), members=["proj/docs", "*.py"])
+    assert sorted(p.relative_to(tmp_path / "out").as_posix() for p in (tmp_path / "out").rglob("*") if p.is_file()) == ["proj/docs/a.md", "proj/docs/b.md", "proj/main.py"]
+
+    with pytest.raises(FileNotFoundError):
+        service.untar(str(archive), str(tmp_path / "out2"), members=["proj/missing.txt"])
+
+
+def test_untar_member_by_index(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture):
+    from src.services import tar_tools
+
+    monkeypatch.setattr(tar_tools, "BLOCK_SIZE", 16384)
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    files = {f"f{i:02d}.bin": os.urandom(20000) for i in range(30)}
+    for name, data in files.items():
+        (src_dir / name).write_bytes(data)
+    archive = tmp_path / "archive.tar.gz"
+    service.tar_dir(str(src_dir), str(archive), index=True)
+
+    with tarfile.open(archive, "r:gz") as tf:
+        assert tf.extractfile("src/f29.bin").read() == files["f29.bin"]
+    index = tar_tools.load_index(archive)
+    assert index is not None and len(index.checkpoints) > 10
+
+    open_at = mocker.patch("src.services.tar_tools.open_at", wraps=tar_tools.open_at)
+    service.untar(str(archive), str(tmp_path / "out"), members=["src/f29.bin"])
+    assert (tmp_path / "out" / "src" / "f29.bin").read_bytes() == files["f29.bin"]
+    assert not (tmp_path / "out" / "src" / "f00.bin").exists()
+    offset = open_at.call_args.args[2]
+    assert index.checkpoint_for(offset)[1] > archive.stat().st_size // 2
+
+
+def test_tar_parallel_gzip_matches_sequential(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import gzip
+    from src.services import tar_tools
+
+    monkeypatch.setattr(tar_tools, "BLOCK_SIZE", 4096)
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    for i in range(10):
+        (src_dir / f"f{i}.txt").write_bytes(os.urandom(3000) + b"text " * 2000)
+    service.tar_dir(str(src_dir), str(tmp_path / "seq.tar.gz"))
+    service.tar_dir(str(src_dir), str(tmp_path / "par.tar.gz"), index=True, workers=3)
+
+    assert (tmp_path / "par.tar.gz").read_bytes() == (tmp_path / "seq.tar.gz").read_bytes()
+    assert len(tar_tools.load_index(tmp_path / "par.tar.gz").checkpoints) > 10
+    with tarfile.open(tmp_path / "par.tar.gz", "r:gz") as tf:
+        assert tf.extractfile("src/f7.txt").read() == (src_dir / "f7.txt").read_bytes()
+    assert len(gzip.decompress((tmp_path / "par.tar.gz").read_bytes())) % tarfile.RECORDSIZE == 0
+
+
+@pytest.mark.parametrize("name, codec, magic", [("a.tar", None, b""), ("a.tar.bz2", None, b"BZh"), ("a.txz", None, b"\xfd7zXZ"), ("a.bin", TarCodec.xz, b"\xfd7zXZ"), ("a.tgz", None, b"\x1f\x8b")])
+def test_tar_codecs_roundtrip(service: OSConsoleServiceBase, tmp_path: Path, name: str, codec: TarCodec | None, magic: bytes):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.txt").write_text("codec " * 1000)
+    archive = tmp_path / name
+    service.tar_dir(str(src_dir), str(archive), codec=codec, level=1)
+
+    assert archive.read_bytes().startswith(magic)
+    service.untar(str(archive), str(tmp_path / "out"))
+    assert (tmp_path / "out" / "src" / "a.txt").read_text() == "codec " * 1000
+    assert [m.name for m in service.tar_list(str(archive))] == ["src", "src/a.txt"]
+
+
+def test_tar_incremental_chain(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "keep.txt").write_text("keep")
+    (src_dir / "edit.txt").write_text("old")
+    (src_dir / "sub" / "gone.txt").write_text("gone")
+    (src_dir / "swap").write_text("file")
+    snapshot = tmp_path / "src.snar"
+    service.tar_dir(str(src_dir), str(tmp_path / "full.tar.gz"), incremental=str(snapshot))
+    assert snapshot.exists()
+
+    (src_dir / "edit.txt").write_text("new content")
+    shutil.rmtree(src_dir / "sub")
+    (src_dir / "swap").unlink()
+    (src_dir / "swap").mkdir()
+    (src_dir / "swap" / "inner.txt").write_text("inner")
+    (src_dir / "added.txt").write_text("added")
+    service.tar_dir(str(src_dir), str(tmp_path / "inc1.tar.xz"), incremental=str(snapshot))
+
+    with tarfile.open(tmp_path / "inc1.tar.xz") as tf:
+        names = tf.getnames()
+    assert names[0] == ".tar-incremental.json"
+    assert "src/keep.txt" not in names
+    assert {"src/edit.txt", "src/added.txt", "src/swap/inner.txt"} <= set(names)
+
+    (src_dir / "added.txt").unlink()
+    service.tar_dir(str(src_dir), str(tmp_path / "inc2.tar.gz"), incremental=str(snapshot))
+
+    out = tmp_path / "out"
+    service.untar_chain([str(tmp_path / "full.tar.gz"), str(tmp_path / "inc1.tar.xz"), str(tmp_path / "inc2.tar.gz")], str(out))
+    restored = sorted(p.relative_to(out).as_posix() for p in out.rglob("*"))
+    assert restored == ["src", "src/edit.txt", "src/keep.txt", "src/swap", "src/swap/inner.txt"]
+    assert (out / "src" / "edit.txt").read_text() == "new content"
+
+
+def test_untar_indexed_incremental_replays_deletions(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "sub" / "gone.txt").write_text("gone")
+    (src_dir / "sub" / "edit.txt").write_text("old")
+    snapshot = tmp_path / "src.snar"
+    service.tar_dir(str(src_dir), str(tmp_path / "full.tar.gz"), incremental=str(snapshot))
+    (src_dir / "sub" / "gone.txt").unlink()
+    (src_dir / "sub" / "edit.txt").write_text("new")
+    service.tar_dir(str(src_dir), str(tmp_path / "inc.tar.gz"), index=True, incremental=str(snapshot))
+
+    out = tmp_path / "out"
+    service.untar(str(tmp_path / "full.tar.gz"), str(out))
+    service.untar(str(tmp_path / "inc.tar.gz"), str(out), members=["src/sub/*"])
+    assert sorted(p.name for p in (out / "src" / "sub").iterdir()) == ["edit.txt"]
+    assert (out / "src" / "sub" / "edit.txt").read_text() == "new"
+    assert not (out / ".tar-incremental.json").exists()
+
+
+def test_tar_incremental_bad_snapshot(service: OSConsoleServiceBase, tmp_path: Path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src.snar").write_text("not json")
+    with pytest.raises(ValueError):
+        service.tar_dir(str(tmp_path / "src"), str(tmp_path / "a.tar.gz"), incremental=str(tmp_path / "src.snar"))
+
+def test_tar_index_requires_gz(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    with pytest.raises(ValueError):
+        service.tar_dir(str(src_dir), str(tmp_path / "a.tar.xz"), index=True)
+
+
+def test_tar_index_on_demand(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.txt").write_text("a" * 5000)
+    (src_dir / "b.txt").write_text("b" * 5000)
+    archive = tmp_path / "plain.tar.gz"
+    with tarfile.open(archive, "w:gz") as tf:
+        tf.add(src_dir, arcname="src")
+
+    idx = service.tar_index(str(archive))
+    assert idx == Path(f"{archive}.idx")
+    service.untar(str(archive), str(tmp_path / "out"), members=["src/b.txt"])
+    assert (tmp_path / "out" / "src" / "b.txt").read_text() == "b" * 5000
+    assert not (tmp_path / "out" / "src" / "a.txt").exists()
+
+    with tarfile.open(archive, "w:gz") as tf:
+        tf.add(src_dir / "a.txt", arcname="other.txt")
+    service.untar(str(archive), str(tmp_path / "out2"), members=["other.txt"])
+    assert (tmp_path / "out2" / "other.txt").exists()
+
+
+def test_tar_stream_reads_all_gzip_members(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("src.services.tar_tools.BLOCK_SIZE", 4096)
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.bin").write_bytes(os.urandom(20000))
+    (src_dir / "b.txt").write_text("tail")
+    archive = tmp_path / "a.tar.gz"
+    service.tar_dir(str(src_dir), str(archive))
+
+    assert [m.name for m in service.tar_list(str(archive))] == ["src", "src/a.bin", "src/b.txt"]
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=Pipe(archive.read_bytes())))
+    service.untar("-", str(tmp_path / "out"))
+    assert (tmp_path / "out" / "src" / "a.bin").read_bytes() == (src_dir / "a.bin").read_bytes()
+
+
+def test_select_members_stops_after_literal_names():
+    from src.services.archive import select_members
+
+    seen = []
+
+    def names():
+        for name in ["a/", "a/x.txt", "a/y.txt", "b.txt", "c.txt"]:
+            seen.append(name)
+            yield name
+
+    assert list(select_members(names(), ["a/x.txt", "b.txt"], lambda n: (n, n.endswith("/")))) == ["a/x.txt", "b.txt"]
+    assert seen == ["a/", "a/x.txt", "a/y.txt", "b.txt"]
+
+
+def test_zip_and_tar_list(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "sub" / "a.txt").write_text("a" * 1000)
+    service.zip(str(src_dir), str(tmp_path / "a.zip"))
+    service.tar_dir(str(src_dir), str(tmp_path / "a.tar.gz"))
+
+    [zipped] = service.zip_list(str(tmp_path / "a.zip"))
+    assert (zipped.name, zipped.size, zipped.is_dir) == ("sub/a.txt", 1000, False)
+    assert 0 < zipped.compressed_size < 1000
+    assert abs(zipped.mtime - (src_dir / "sub" / "a.txt").stat().st_mtime) <= 2
+
+    listed = service.tar_list(str(tmp_path / "a.tar.gz"))
+    assert [(m.name, m.size, m.compressed_size, m.is_dir) for m in listed] == [("src", 0, None, True), ("src/sub", 0, None, True), ("src/sub/a.txt", 1000, None, False)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_zip_checksums(service: OSConsoleServiceBase, tmp_path: Path, workers: int):
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "a.txt").write_text("a" * 5000)
+    (src_dir / "sub" / "b.txt").write_text("b" * 5000)
+    archive = tmp_path / "a.zip"
+    service.zip(str(src_dir), str(archive), workers=workers, checksums=True)
+
+    with zipfile.ZipFile(archive) as zf:
+        sums = zf.read(".sha256sums").decode()
+    assert sums == f"{hashlib.sha256(b'a' * 5000).hexdigest()}  a.txt\n{hashlib.sha256(b'b' * 5000).hexdigest()}  sub/b.txt\n"
+    report = service.verify(str(archive), workers=workers)
+    assert (report.checked, report.corrupt, report.has_checksums) == (2, [], True)
+
+    (src_dir / "c.txt").write_text("c")
+    service.zip(str(src_dir), str(archive), update=True, checksums=True)
+    assert service.verify(str(archive)).ok
+
+
+def test_verify_zip_reports_corrupt_members(service: OSConsoleServiceBase, tmp_path: Path):
+    archive = tmp_path / "a.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("good.txt", "good data")
+        zf.writestr("bad.txt", "bad data")
+        zf.writestr(".sha256sums", f"{'0' * 64}  good.txt\n")
+    archive.write_bytes(archive.read_bytes().replace(b"bad data", b"bad dat!"))
+
+    report = service.verify(str(archive), workers=2)
+    assert report.checked == 2
+    assert [name for name, _ in report.corrupt] == ["good.txt", "bad.txt"]
+    assert report.corrupt[0][1] == "SHA-256 не совпадает"
+
+
+def test_verify_tar(service: OSConsoleServiceBase, tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.txt").write_text("tar " * 1000)
+    archive = tmp_path / "a.tar.gz"
+    service.tar_dir(str(src_dir), str(archive), checksums=True)
+    assert [m.name for m in service.tar_list(str(archive))][-1] == ".sha256sums"
+    report = service.verify(str(archive))
+    assert (report.checked, report.corrupt, report.has_checksums) == (1, [], True)
+
+    data = bytearray(archive.read_bytes())
+    data[-12] ^= 0xFF
+    archive.write_bytes(bytes(data))
+    assert not service.verify(str(archive)).ok
+
+class Pipe(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("seek")
+
+    def tell(self) -> int:
+        raise io.UnsupportedOperation("tell")
+
+
+@pytest.mark.parametrize("method", [ZipMethod.deflate, ZipMethod.store, ZipMethod.bzip2, ZipMethod.lzma])
+def test_zip_stream_roundtrip(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, method: ZipMethod):
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "sub" / "a.txt").write_text("stream " * 5000)
+    (src_dir / "b.bin").write_bytes(os.urandom(3000))
+    (src_dir / "empty").write_bytes(b"")
+    stdout = Pipe()
+    monkeypatch.setattr("sys.stdout", SimpleNamespace(buffer=stdout))
+    service.zip(str(src_dir), "-", method=method)
+
+    data = stdout.getvalue()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert all(info.flag_bits & 0x08 for info in zf.infolist())
+        assert zf.testzip() is None
+
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=io.BytesIO(data)))
+    service.unzip("-", str(tmp_path / "out"))
+    assert (tmp_path / "out" / "sub" / "a.txt").read_text() == "stream " * 5000
+    assert (tmp_path / "out" / "b.bin").read_bytes() == (src_dir / "b.bin").read_bytes()
+    assert (tmp_path / "out" / "empty").read_bytes() == b""
+
+
+def test_unzip_stream_selected_and_bad_crc(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("a.txt", "aaaa")
+        zf.writestr("b.txt", "bbbb")
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=io.BytesIO(buf.getvalue())))
+    service.unzip("-", str(tmp_path / "out"), members=["b.txt"])
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["b.txt"]
+
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=io.BytesIO(buf.getvalue())))
+    with pytest.raises(FileNotFoundError):
+        service.unzip("-", str(tmp_path / "out2"), members=["c.txt"])
+
+    corrupted = buf.getvalue().replace(b"bbbb", b"bbbc")
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=io.BytesIO(corrupted)))
+    with pytest.raises(zipfile.BadZipFile):
+        service.unzip("-", str(tmp_path / "out3"))
+
+
+@pytest.mark.parametrize("codec", [TarCodec.gz, TarCodec.bz2, TarCodec.xz, TarCodec.none])
+def test_tar_stream_roundtrip(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, codec: TarCodec):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.txt").write_text("tar stream " * 1000)
+    stdout = Pipe()
+    monkeypatch.setattr("sys.stdout", SimpleNamespace(buffer=stdout))
+    service.tar_dir(str(src_dir), "-", codec=codec)
+    with pytest.raises(ValueError):
+        service.tar_dir(str(src_dir), "-", index=True)
+
+    data = stdout.getvalue()
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=Pipe(data)))
+    assert [m.name for m in service.tar_list("-")] == ["src", "src/a.txt"]
+    monkeypatch.setattr("sys.stdin", SimpleNamespace(buffer=Pipe(data)))
+    service.untar("-", str(tmp_path / "out"), members=["src/a.txt"])
+    assert (tmp_path / "out" / "src" / "a.txt").read_text() == "tar stream " * 1000
+
+
 #тестим grep
 def test_grep_invalid_regex(service: OSConsoleServiceBase, tmp_path: Path):
     test_file = tmp_path / "test.txt"
@@ -674,3 +1328,696 @@ def test_format_long_error_handling(service: OSConsoleServiceBase, fake_pathlib_
 
     assert entry.name in result
     assert isinstance(result, str)
+
+
+#тестим ограничение ввода-вывода
+def test_parse_size():
+    from src.services.throttle import parse_size
+
+    assert parse_size("512") == 512
+    assert parse_size("10K") == 10 * 1024
+    assert parse_size("1.5M") == 1.5 * 1024 ** 2
+    assert parse_size("2GiB") == 2 * 1024 ** 3
+    with pytest.raises(ValueError):
+        parse_size("abc")
+    with pytest.raises(ValueError):
+        parse_size("0")
+
+
+def test_token_bucket_limits_rate(mocker: MockerFixture):
+    from src.services.throttle import TokenBucket
+
+    sleep = mocker.patch("src.services.throttle.time.sleep")
+    bucket = TokenBucket(rate=100, burst=100)
+    bucket.consume(100)
+    sleep.assert_not_called()
+    bucket.consume(50)
+
+    assert sleep.call_count == 1
+    assert sleep.call_args.args[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_cp_with_limiter(logger, tmp_path: Path, mocker: MockerFixture):
+    from src.services.throttle import IOLimiter
+    from src.services.windows_console import WindowsConsoleService
+
+    limiter = IOLimiter(bwlimit=10 ** 9, iops_limit=10 ** 6)
+    io = mocker.spy(limiter, "io")
+    service = WindowsConsoleService(logger, limiter=limiter)
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "a.bin").write_bytes(b"a" * 3000)
+    (src_dir / "b.bin").write_bytes(b"b" * 2000)
+    service.cp(str(src_dir), str(tmp_path / "dst"), recursive=True)
+
+    assert (tmp_path / "dst" / "a.bin").read_bytes() == b"a" * 3000
+    assert sum(call.args[0] for call in io.call_args_list if call.args) == 5000
+
+    io.reset_mock()
+    service.rm(str(tmp_path / "dst"), recursive=True)
+    assert io.call_count == 3
+
+
+#тестим прогресс длительных операций
+def test_progress_events_cp_and_zip(service: OSConsoleServiceBase, tmp_path: Path):
+    events = []
+    service.set_progress_callback(events.append)
+    src_dir = tmp_path / "src"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "a.txt").write_bytes(b"a" * 1000)
+    (src_dir / "sub" / "b.txt").write_bytes(b"b" * 500)
+    service.cp(str(src_dir), str(tmp_path / "dst"), recursive=True)
+    service.zip(str(src_dir), str(tmp_path / "arch.zip"))
+    service.unzip(str(tmp_path / "arch.zip"), str(tmp_path / "out"))
+
+    finished = [e for e in events if e.finished]
+    assert [e.operation for e in finished] == ["cp", "zip", "unzip"]
+    for e in finished:
+        assert e.bytes_done == 1500
+        assert e.files_done == 2
+        assert e.bytes_total == 1500
+        assert e.files_total == 2
+        assert e.eta == 0
+
+
+def test_progress_not_finished_on_error(service: OSConsoleServiceBase, tmp_path: Path):
+    events = []
+    service.set_progress_callback(events.append)
+
+    with pytest.raises(FileNotFoundError):
+        service.tar_dir(str(tmp_path / "missing"), str(tmp_path / "a.tar.gz"))
+    assert not [e for e in events if e.finished]
+
+
+def test_progress_printer_format():
+    import io
+    from src.services.progress import ProgressEvent, ProgressPrinter
+
+    stream = io.StringIO()
+    ProgressPrinter(stream)(ProgressEvent("cp", 512 * 1024, 1, "a.bin", 1024 * 1024, 0.5, 1024 * 1024, 2))
+    out = stream.getvalue()
+
+    assert "cp: 512.0 KB / 1.0 MB ( 50.0%)" in out
+    assert "1.0 MB/s" in out
+    assert "ETA 00:00" in out
+    assert "a.bin" in out
+
+
+#тестим shell
+def test_shell_keeps_state_between_commands(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]):
+    import typer
+    from src.container import Container
+    from src.main import app
+    from src.shell import run_shell
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a b.txt").write_text("hello")
+    lines = ["cd sub  # переход сохраняется", "", "cat 'a b.txt'", "cat missing.txt", "exit", "cat 'a b.txt'"]
+    status = run_shell(typer.main.get_command(app), Container(console_service=service), lines)
+
+    out = capsys.readouterr().out
+    assert os.getcwd() == str(tmp_path / "sub")
+    assert out.count("hello") == 1
+    assert status == 0
+
+
+def test_shell_reports_failed_command(service: OSConsoleServiceBase, capsys: pytest.CaptureFixture[str]):
+    import typer
+    from src.container import Container
+    from src.main import app
+    from src.shell import run_shell
+
+    command = typer.main.get_command(app)
+    container = Container(console_service=service)
+    assert run_shell(command, container, ["no-such-command"]) == 2
+    assert run_shell(command, container, ["shell", "cat 'unterminated"]) == 2
+    assert "shell нельзя запускать внутри оболочки" in capsys.readouterr().err
+    assert run_shell(command, container, ["--timings ls ."]) == 2
+    assert "--timings" in capsys.readouterr().err
+
+
+def test_shell_dispatch_logs_unexpected_errors(service: OSConsoleServiceBase, caplog: pytest.LogCaptureFixture, capsys: pytest.CaptureFixture[str]):
+    from src.container import Container
+    from src.shell import dispatch
+
+    container = Container(console_service=service)
+    command = Mock()
+    command.main.side_effect = OSError("нет доступа")
+    with caplog.at_level("ERROR", logger="src.shell"):
+        assert dispatch(command, container, ["cat", "x"]) == 1
+        assert caplog.records == []
+        command.main.side_effect = RuntimeError("сбой")
+        assert dispatch(command, container, ["cat", "x"]) == 1
+    assert "cat: Непредвиденная ошибка команды" in caplog.text and "RuntimeError" in caplog.text
+    assert capsys.readouterr().err.splitlines() == ["cat: нет доступа", "cat: сбой"]
+
+
+#тестим run
+def test_run_script_parallel_and_fail_fast(service: OSConsoleServiceBase, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import logging
+    import typer
+    from src.container import Container
+    from src.main import app
+    from src.shell import format_report, run_script
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src.txt").write_text("data")
+    service = type(service)(logging.getLogger("test_run"))
+    script = [
+        "# копируем параллельно",
+        *[f"cp src.txt copy{i}.txt &" for i in range(8)],
+        "wait",
+        "cp missing.txt x.txt",
+        "cp src.txt after.txt",
+    ]
+    command = typer.main.get_command(app)
+    container = Container(console_service=service)
+
+    results = run_script(command, container, script, jobs=4)
+    assert [r.line.number for r in results] == [*range(2, 10), 11]
+    assert [r.status for r in results] == [0] * 8 + [1]
+    assert all((tmp_path / f"copy{i}.txt").read_text() == "data" for i in range(8))
+    assert not (tmp_path / "after.txt").exists()
+
+    results = run_script(command, container, script, jobs=4, fail_fast=False)
+    assert (tmp_path / "after.txt").exists()
+    report = format_report(results, 1.0)
+    assert report[0] == "run: строк 10, с ошибкой 1, время 1.000 с"
+    assert report[2].split()[:2] == ["cp", "10"]
+    assert report[-1] == "строка 11: cp missing.txt x.txt (код 1)"
+
+
+def test_run_script_rejects_bad_lines(service: OSConsoleServiceBase):
+    import typer
+    from src.container import Container
+    from src.main import app
+    from src.shell import run_script
+
+    command = typer.main.get_command(app)
+    container = Container(console_service=service)
+    with pytest.raises(ValueError):
+        run_script(command, container, ["cat 'unterminated"])
+    results = run_script(command, container, ["cd . &", "shell"], fail_fast=False)
+    assert [r.status for r in results] == [2, 2]
+
+
+#тестим время запуска
+# импорт src.main занимает ~90-140 мс, запас в ~3 раза на медленные машины CI
+STARTUP_BUDGET_US = 400_000
+LAZY_MODULES = {"zipfile", "tarfile", "hashlib", "json", "ctypes", "concurrent.futures", "logging.config", "logging.handlers",
+                "src.services.tar_tools", "src.services.zip_tools", "src.services.trash", "src.services.parallel_rm"}
+
+
+def test_startup_imports_within_budget():
+    import subprocess
+    import sys
+
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.main"], capture_output=True, text=True,
+                          cwd=Path(__file__).resolve().parent.parent, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, total, name = line.split("|")
+            cumulative[name.strip()] = int(total)
+    assert not LAZY_MODULES & cumulative.keys()
+    assert cumulative["src.main"] < STARTUP_BUDGET_US
+
+
+def test_logging_configured_on_first_record():
+    import subprocess
+    import sys
+
+    code = (
+        "import logging, sys\n"
+        "from src.config import setup_logging, stop_logging\n"
+        "setup_logging({'version': 1, 'disable_existing_loggers': False,\n"
+        "               'handlers': {'out': {'class': 'logging.StreamHandler', 'stream': 'ext://sys.stdout'}},\n"
+        "               'loggers': {'': {'handlers': ['out'], 'level': 'INFO'}}})\n"
+        "print('logging.config' in sys.modules)\n"
+        "logging.getLogger('a').info('first')\n"
+        "logging.getLogger('b').info('second')\n"
+        "stop_logging()\n"
+        "print('logging.config' in sys.modules)\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          cwd=Path(__file__).resolve().parent.parent, check=True)
+    assert proc.stdout.splitlines() == ["False", "first", "second", "True"]
+
+
+def test_logging_levels_from_env_and_arguments(monkeypatch: pytest.MonkeyPatch):
+    import logging
+    from src.config import LOGGING_CONFIG, with_levels
+
+    monkeypatch.delenv("SHELL_LOG_LEVEL", raising=False)
+    monkeypatch.setenv("SHELL_CONSOLE_LOG_LEVEL", "error")
+    config = with_levels(LOGGING_CONFIG)
+    assert config["handlers"]["console"]["level"] == logging.ERROR
+    assert config["handlers"]["file"]["level"] == logging.INFO
+    assert config["loggers"][""]["level"] == logging.INFO
+    assert LOGGING_CONFIG["handlers"]["console"]["level"] == "WARNING"
+
+    config = with_levels(LOGGING_CONFIG, level="DEBUG", console_level="warning")
+    assert config["loggers"][""]["level"] == logging.DEBUG
+    with pytest.raises(ValueError):
+        with_levels(LOGGING_CONFIG, level="verbose")
+
+
+#тестим замеры и профилирование
+def test_call_timings_records_outer_calls(service: OSConsoleServiceBase, tmp_path: Path):
+    from src.services.timings import CallTimings
+
+    (tmp_path / "src" / "sub").mkdir(parents=True)
+    (tmp_path / "src" / "sub" / "a.txt").write_bytes(b"x" * 10000)
+    timings = CallTimings()
+    timings.instrument(service, {"cp", "cat"})
+    service.cp(str(tmp_path / "src"), str(tmp_path / "dst"), recursive=True)
+    with pytest.raises(FileNotFoundError):
+        service.cat(str(tmp_path / "missing.txt"))
+
+    assert [(c.name, c.failed) for c in timings.calls] == [("cp", False), ("cat", True)]
+    cp = timings.calls[0]
+    assert cp.wall > 0 and cp.user >= 0 and cp.system >= 0
+    if cp.read_bytes is not None:
+        assert cp.read_bytes >= 10000 and cp.written_bytes >= 10000 and cp.syscalls > 0
+    out = io.StringIO()
+    timings.report(out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 3 and lines[1].startswith("cp ") and lines[2].endswith("(ошибка)")
+
+
+def test_call_timings_cover_generator_iteration(service: OSConsoleServiceBase, tmp_path: Path):
+    from src.services.timings import CallTimings
+
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(4 * 1024 * 1024))
+    timings = CallTimings()
+    timings.instrument(service, {"cat_stream", "ls_iter"})
+    stream = service.cat_stream(str(path), FileReadMode.bytes)
+    assert timings.calls == []
+    assert sum(len(chunk) for chunk in stream) == 4 * 1024 * 1024
+    lines = service.ls_iter(str(tmp_path))
+    next(lines)
+    lines.close()
+
+    assert [(c.name, c.failed) for c in timings.calls] == [("cat_stream", False), ("ls_iter", False)]
+    if timings.calls[0].read_bytes is not None:
+        assert timings.calls[0].read_bytes >= 4 * 1024 * 1024
+
+
+def test_profile_writes_pstats(tmp_path: Path):
+    import pstats
+    from src.services.timings import report_profile, start_profile
+
+    profiler = start_profile()
+    sorted(range(1000), key=lambda i: -i)
+    report_profile(profiler, str(tmp_path / "out.pstats"))
+    assert pstats.Stats(str(tmp_path / "out.pstats")).total_calls > 0
+
+    profiler = start_profile()
+    out = io.StringIO()
+    report_profile(profiler, top=3, stream=out)
+    assert "function calls" in out.getvalue()
+
+
+#тестим бюджет памяти
+def traced_peak(consume) -> int:
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        consume()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def big_text(tmp_path: Path) -> Path:
+    path = tmp_path / "big.txt"
+    line = b"0123456789 abcdefghijklmnopqrstuvwxyz " * 16 + b"\n"
+    with path.open("wb") as fh:
+        for i in range(32):
+            fh.write(line * 1250 + b"needle\n")
+    return path
+
+
+@pytest.mark.parametrize("mode", [FileReadMode.bytes, FileReadMode.string])
+def test_cat_stream_memory_ceiling(service: OSConsoleServiceBase, big_text: Path, mode: FileReadMode):
+    size = big_text.stat().st_size
+    total = 0
+
+    def consume():
+        nonlocal total
+        for chunk in service.cat_stream(str(big_text), mode):
+            total += len(chunk)
+
+    assert traced_peak(consume) < 6 * 1024 * 1024 < size
+    assert total == size
+
+
+def test_grep_iter_memory_ceiling(service: OSConsoleServiceBase, big_text: Path):
+    matches = []
+    peak = traced_peak(lambda: matches.extend(service.grep_iter("needle", str(big_text.parent), r=True, ignore_case=False)))
+    assert len(matches) == 32
+    assert peak < 1024 * 1024
+
+
+def test_ls_iter_memory_ceiling(service: OSConsoleServiceBase, tmp_path: Path):
+    for i in range(3000):
+        (tmp_path / f"file-with-a-rather-long-name-{i:05}.txt").touch()
+    count = 0
+
+    def consume():
+        nonlocal count
+        for _ in service.ls_iter(str(tmp_path), FileDisplayMode.long):
+            count += 1
+
+    peak = traced_peak(consume)
+    assert count == 3000
+    assert peak < 2 * 1024 * 1024
+    assert traced_peak(lambda: service.ls(str(tmp_path), FileDisplayMode.long)) > peak
+
+
+def test_memory_budget_shrinks_buffers_and_fails_early(service: OSConsoleServiceBase, big_text: Path):
+    from src.services.memory import MIN_BUFFER_SIZE, MemoryBudget, MemoryBudgetExceeded, current_rss
+
+    assert MemoryBudget(4 * 1024 * 1024).buffer_size(1024 * 1024) == 256 * 1024
+    assert MemoryBudget(1024 * 1024).buffer_size(1024 * 1024) == MIN_BUFFER_SIZE
+    rss = current_rss()
+    if rss is None:
+        pytest.skip("/proc/self/statm недоступен")
+
+    service.set_memory_budget(MemoryBudget(rss + 16 * 1024 * 1024))
+    with pytest.raises(MemoryBudgetExceeded):
+        service.cat(str(big_text), FileReadMode.bytes)
+    assert sum(len(c) for c in service.cat_stream(str(big_text), FileReadMode.bytes)) == big_text.stat().st_size
+
+    service.set_memory_budget(MemoryBudget(rss // 2))
+    with pytest.raises(MemoryBudgetExceeded):
+        next(iter(service.cat_stream(str(big_text), FileReadMode.bytes)))
+
+
+def test_grep_line_numbers_with_memory_budget(service: OSConsoleServiceBase, tmp_path: Path):
+    from src.services.memory import MIN_BUFFER_SIZE, MemoryBudget
+
+    path = tmp_path / "long.txt"
+    path.write_text("x" * (3 * MIN_BUFFER_SIZE) + "\nfirst needle\n" + "y" * MIN_BUFFER_SIZE + "\nsecond needle\n")
+    service.set_memory_budget(MemoryBudget(1024 * 1024))
+    assert [line.split(":")[-2] for line in service.grep_iter("needle", str(path), r=False, ignore_case=False)] == ["2", "4"]
+
+
+#тестим benchmarks
+def test_benchmarks_smoke_run(tmp_path: Path):
+    from benchmarks.datasets import build
+    from benchmarks.suite import run_suite
+
+    data = build(tmp_path / "data", scale=0.01)
+    work = tmp_path / "work"
+    work.mkdir()
+    result = run_suite(data, work, repeat=2, only=["ls/*", "grep/*", "rm/deep", "unzip/tiny", "tar-gz/*", "untar-gz/*"])
+
+    assert sorted(result["results"]) == ["grep/huge_text", "grep/tiny", "ls/tiny", "rm/deep", "tar-gz/mixed", "untar-gz/mixed",
+                                         "unzip/tiny"]
+    assert all(len(r["runs"]) == 2 and r["min"] <= r["median"] for r in result["results"].values())
+    assert result["results"]["grep/huge_text"]["bytes"] == data.huge_text_file.stat().st_size
+    tar = result["results"]["tar-gz/mixed"]
+    assert 0 < tar["out_bytes"] and tar["ratio"] == tar["out_bytes"] / tar["bytes"]
+    assert "ratio" not in result["results"]["untar-gz/mixed"]
+    assert list(work.iterdir()) == []
+
+
+def test_benchmarks_compare_flags_regressions():
+    from benchmarks.suite import compare
+
+    baseline = {"results": {"zip/tiny": {"median": 1.0}, "ls/tiny": {"median": 1.0}}}
+    current = {"results": {"zip/tiny": {"median": 1.25}, "ls/tiny": {"median": 1.05}, "cat/huge_text": {"median": 0.5}}}
+    lines, regressions = compare(current, baseline, threshold=0.1)
+    assert regressions == ["zip/tiny"]
+    assert lines[1].endswith("+25.0% !")
+    assert lines[3].split()[-1] == "новый"
+
+
+#тестим асинхронный сервис
+def test_async_service_runs_operations_concurrently(service: OSConsoleServiceBase, tmp_path: Path):
+    import asyncio
+    from src.container import Container
+    from src.services.async_console import AsyncConsoleService
+
+    for i in range(8):
+        (tmp_path / f"f{i}.txt").write_text(f"line {i}\nneedle {i}\n")
+
+    async def main() -> tuple[list, list[str], list[str]]:
+        async with AsyncConsoleService(service, limit=4) as svc:
+            container = Container(console_service=service, async_console_service=svc)
+            copies = [container.async_console_service.cp(tmp_path / f"f{i}.txt", tmp_path / f"c{i}.txt") for i in range(8)]
+            texts = await asyncio.gather(*copies, *(svc.cat(tmp_path / f"f{i}.txt") for i in range(8)))
+            lines = [line async for line in svc.ls_iter(tmp_path)]
+            matches = [line async for line in svc.grep_iter("needle", tmp_path, r=False, ignore_case=False)]
+            return texts, lines, matches
+
+    texts, lines, matches = asyncio.run(main())
+    assert texts[8:] == [f"line {i}\nneedle {i}\n" for i in range(8)]
+    assert sorted(lines) == sorted(service.ls(tmp_path))
+    assert len(lines) == 16
+    assert sorted(matches) == sorted(service.grep("needle", tmp_path, r=False, ignore_case=False))
+
+
+def test_async_service_keeps_service_progress_callback(service: OSConsoleServiceBase, tmp_path: Path):
+    import asyncio
+    from src.services.async_console import AsyncConsoleService
+
+    (tmp_path / "f.txt").write_text("data")
+    service_events, async_events = [], []
+    service.set_progress_callback(service_events.append)
+
+    async def main() -> None:
+        async with AsyncConsoleService(service, limit=1) as svc:
+            svc.set_progress_callback(async_events.append)
+            await svc.cp(tmp_path / "f.txt", tmp_path / "c.txt")
+
+    asyncio.run(main())
+    assert service_events and service_events == async_events
+    assert service.get_progress_callback() == service_events.append
+
+
+def test_async_service_limits_concurrency(service: OSConsoleServiceBase):
+    import asyncio
+    import threading
+    import time
+    from src.services.async_console import AsyncConsoleService
+
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def slow_cat(*args, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return "ok"
+
+    service.cat = slow_cat
+
+    async def main() -> tuple[list[str], int]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        async with AsyncConsoleService(service, limit=3) as svc:
+            tick_task = asyncio.create_task(ticker())
+            results = await asyncio.gather(*(svc.cat("x") for _ in range(12)))
+            tick_task.cancel()
+            return results, ticks
+
+    results, ticks = asyncio.run(main())
+    assert results == ["ok"] * 12
+    assert peak == 3
+    assert ticks >= 5
+
+
+def test_async_service_cancels_running_operation(service: OSConsoleServiceBase, tmp_path: Path):
+    import asyncio
+    import time
+    from src.services.async_console import AsyncConsoleService, OperationCancelled
+
+    state = {"stopped": None}
+
+    def long_cp(*args, **kwargs):
+        tracker = service._start_progress("cp")
+        try:
+            for _ in range(500):
+                time.sleep(0.01)
+                tracker.advance(1024, 1)
+        except OperationCancelled:
+            state["stopped"] = True
+            raise
+        state["stopped"] = False
+
+    service.cp = long_cp
+    events = []
+
+    async def main() -> None:
+        async with AsyncConsoleService(service, limit=1) as svc:
+            svc.set_progress_callback(events.append)
+            task = asyncio.create_task(svc.cp("a", "b"))
+            await asyncio.sleep(0.3)
+            start = time.perf_counter()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert time.perf_counter() - start < 1.0
+            assert state["stopped"] is True
+            assert await svc.ls(tmp_path) == []
+
+    asyncio.run(main())
+    assert events
+
+
+def test_async_service_logs_error_of_cancelled_operation(service: OSConsoleServiceBase, caplog: pytest.LogCaptureFixture):
+    import asyncio
+    import time
+    from src.services.async_console import AsyncConsoleService, OperationCancelled
+
+    def failing_cp(*args, **kwargs):
+        tracker = service._start_progress("cp")
+        try:
+            for _ in range(500):
+                time.sleep(0.01)
+                tracker.advance(1024, 1)
+        except OperationCancelled:
+            raise OSError("не удалось убрать частичную копию")
+
+    service.cp = failing_cp
+
+    async def main() -> None:
+        async with AsyncConsoleService(service, limit=1) as svc:
+            task = asyncio.create_task(svc.cp("a", "b"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    with caplog.at_level("ERROR", logger="src.services.async_console"):
+        asyncio.run(main())
+    assert "ошибка в отменённом вызове" in caplog.text
+    assert "не удалось убрать частичную копию" in caplog.text
+
+
+#тестим Linux-сервис
+linux_only = pytest.mark.skipif(not hasattr(os, "copy_file_range") or not hasattr(os, "O_NOATIME"), reason="только Linux")
+
+
+@pytest.fixture
+def linux_service(logger):
+    from src.services.linux_console import LinuxConsoleService
+
+    return LinuxConsoleService(logger)
+
+
+@pytest.fixture
+def sample_tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    (root / "sub" / "deeper").mkdir(parents=True)
+    (root / "a.txt").write_text("alpha\nneedle one\n")
+    (root / "b.bin").write_bytes(bytes(range(256)) * 40)
+    (root / "sub" / "c.txt").write_text("needle two\nbeta\n")
+    (root / "sub" / "deeper" / "d.txt").write_text("gamma\nNEEDLE three\n")
+    return root
+
+
+@linux_only
+def test_linux_service_matches_windows_output(service: OSConsoleServiceBase, linux_service: OSConsoleServiceBase, sample_tree: Path):
+    for mode in (FileDisplayMode.simple, FileDisplayMode.long):
+        assert linux_service.ls(sample_tree, mode) == service.ls(sample_tree, mode)
+    for mode in (FileReadMode.string, FileReadMode.bytes):
+        assert linux_service.cat(sample_tree / "b.bin" if mode == FileReadMode.bytes else sample_tree / "a.txt", mode) == \
+            service.cat(sample_tree / "b.bin" if mode == FileReadMode.bytes else sample_tree / "a.txt", mode)
+        assert list(linux_service.cat_stream(sample_tree / "a.txt", mode)) == list(service.cat_stream(sample_tree / "a.txt", mode))
+    for r, ignore_case in ((True, True), (True, False), (False, False)):
+        assert sorted(linux_service.grep("needle", sample_tree, r, ignore_case)) == sorted(service.grep("needle", sample_tree, r, ignore_case))
+    assert linux_service.grep("needle", sample_tree / "a.txt", False, False) == [f"{sample_tree / 'a.txt'}:2:needle one"]
+
+
+@linux_only
+def test_linux_service_cp_copies_in_kernel(linux_service: OSConsoleServiceBase, sample_tree: Path, tmp_path: Path, mocker: MockerFixture):
+    from src.services import linux_console
+
+    copy_range = mocker.spy(linux_console.os, "copy_file_range")
+    events = []
+    linux_service.set_progress_callback(events.append)
+    os.utime(sample_tree / "b.bin", (1_000_000, 1_000_000))
+
+    linux_service.cp(sample_tree, tmp_path / "copy", recursive=True)
+
+    for src in sample_tree.rglob("*"):
+        dst = tmp_path / "copy" / src.relative_to(sample_tree)
+        assert dst.is_dir() if src.is_dir() else dst.read_bytes() == src.read_bytes()
+    assert (tmp_path / "copy" / "b.bin").stat().st_mtime == 1_000_000
+    assert copy_range.call_count >= 4
+    assert events[-1].finished and events[-1].files_done == 4
+    assert events[-1].bytes_done == sum(p.stat().st_size for p in sample_tree.rglob("*") if p.is_file())
+
+
+@linux_only
+def test_linux_service_falls_back_without_kernel_support(linux_service: OSConsoleServiceBase, sample_tree: Path, tmp_path: Path, mocker: MockerFixture):
+    import errno
+
+    from src.services import linux_console
+
+    mocker.patch.object(linux_console.os, "copy_file_range", side_effect=OSError(errno.EXDEV, "Invalid cross-device link"))
+    linux_service.cp(sample_tree / "b.bin", tmp_path / "b.bin")
+    assert (tmp_path / "b.bin").read_bytes() == (sample_tree / "b.bin").read_bytes()
+
+    real_open = os.open
+
+    def no_noatime(path, flags, *args, **kwargs):
+        if flags & os.O_NOATIME:
+            raise PermissionError(errno.EPERM, "Operation not permitted")
+        return real_open(path, flags, *args, **kwargs)
+
+    mocker.patch.object(linux_console.os, "open", side_effect=no_noatime)
+    assert linux_service.cat(sample_tree / "a.txt") == "alpha\nneedle one\n"
+    assert len(linux_service.grep("needle", sample_tree, r=True, ignore_case=False)) == 2
+
+
+@linux_only
+def test_linux_grep_logs_skipped_directories(linux_service: OSConsoleServiceBase, logger, sample_tree: Path, mocker: MockerFixture):
+    import errno
+
+    from src.services import linux_console
+
+    real_open = os.open
+
+    def fail_on_sub(code):
+        def fake_open(path, flags, *args, **kwargs):
+            if path == "sub" and flags & os.O_DIRECTORY:
+                raise OSError(code, os.strerror(code))
+            return real_open(path, flags, *args, **kwargs)
+        return fake_open
+
+    mocker.patch.object(linux_console.os, "open", side_effect=fail_on_sub(errno.EACCES))
+    assert linux_service.grep("needle", sample_tree, r=True, ignore_case=False) == [f"{sample_tree / 'a.txt'}:2:needle one"]
+    assert "sub" in str(logger.warning.call_args)
+
+    mocker.patch.object(linux_console.os, "open", side_effect=fail_on_sub(errno.EMFILE))
+    with pytest.raises(OSError):
+        linux_service.grep("needle", sample_tree, r=True, ignore_case=False)
+
+
+def test_create_console_service_selects_backend(logger, mocker: MockerFixture):
+    from src.container import create_console_service
+    from src.services.linux_console import LinuxConsoleService
+    from src.services.windows_console import WindowsConsoleService
+
+    mocker.patch("src.container.sys.platform", "linux")
+    assert type(create_console_service(logger)) is LinuxConsoleService
+    mocker.patch("src.container.sys.platform", "win32")
+    assert type(create_console_service(logger)) is WindowsConsoleService